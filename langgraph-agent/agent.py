@@ -5,21 +5,35 @@ This module loads the graph configuration, initializes state with an input paylo
 and executes all stages in sequence for customer support workflows.
 """
 
+import argparse
 import json
-import yaml
+import os
+import time
+import uuid
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 import logging
 from datetime import datetime
+from concurrent.futures import Executor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+import threading
 
 from core.node import Node
+from core.deadline import Deadline, DeadlineExceeded
 from core.mcp_client import get_mcp_client
+from core.run_context import RunContext
+from core.plan import compile_plan
+from core.jsonl_stream import run_jsonl
+from core.result_cache import AbilityResultCache
+from core.coalescing import CallCoalescer, WorkflowCoalescer
+from core.retry import RetryEngine
+from core.metrics import get_metrics_registry
+from core.tracing import get_tracer
+from core.logging_config import configure_logging
+from core.config_snapshot import load_config
+from core.prefork import PreforkExecutor
+from core.checkpoint_store import WAITING, CheckpointStore, state_delta
+from core.scheduler import DeadlineScheduler, ScheduleQueue
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
@@ -28,171 +42,766 @@ class LangGraphAgent:
     
     def __init__(self, config_path: str = "graph_config.yaml"):
         """Initialize the agent with configuration."""
+        clock = time.perf_counter
+        started = clock()
         self.config_path = config_path
         self.config = self._load_config()
+        loaded = clock()
         self.mcp_client = get_mcp_client()
+        self.plan = compile_plan(self.config, self.mcp_client)
+        compiled = clock()
+        configure_logging(self.config.get('settings'))
+        logger.info("📋 Configuration loaded from %s (%s)", self.config_path, self.config_source)
+        self.mcp_client.configure_result_cache(
+            AbilityResultCache.from_config(self.config.get('settings', {}).get('result_cache'))
+        )
+        self.mcp_client.configure_coalescing(
+            CallCoalescer.from_config(self.config.get('settings', {}).get('coalescing'))
+        )
+        self.workflow_coalescer = WorkflowCoalescer.from_config(self.config.get('settings', {}).get('coalescing'))
+        self.mcp_client.configure_isolation(self.config.get('servers'))
+        self.retry_engine = RetryEngine.from_config(self.config.get('settings'), self.config.get('servers'))
+        self.checkpoints = CheckpointStore.from_config(
+            self.config.get('settings', {}).get('checkpoints'),
+            base_dir=os.path.dirname(os.path.abspath(self.config_path))
+        )
+        self.scheduler = DeadlineScheduler.from_config(self.config.get('settings', {}).get('scheduling'))
+        self._schedule_stats: Optional[Dict[str, Any]] = None
+        self.tracer = get_tracer()
+        self.tracer.configure(enabled=self.config.get('settings', {}).get('enable_tracing', False))
         self.nodes = self._initialize_nodes()
-        self.state = {}
+        self._local = threading.local()
+        # Seconds spent in each startup phase (see --startup-profile)
+        self.startup_timings = {
+            'load_config': loaded - started,
+            # Includes loading the servers whose abilities the plan resolves
+            'compile_plan': compiled - loaded,
+            'initialize': clock() - compiled,
+        }
         
-        logger.info(f"🚀 LangGraph Agent initialized with {len(self.nodes)} stages")
+        logger.info("🚀 LangGraph Agent initialized with %d stages", len(self.nodes))
     
     def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from YAML file."""
+        """Load configuration from YAML file (or its cached snapshot, see core/config_snapshot.py)."""
         try:
-            with open(self.config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                logger.info(f"📋 Configuration loaded from {self.config_path}")
-                return config
+            config, self.config_source = load_config(self.config_path)
+            return config
         except FileNotFoundError:
-            logger.error(f"❌ Configuration file {self.config_path} not found")
+            logger.error("❌ Configuration file %s not found", self.config_path)
             raise
     
     def _initialize_nodes(self) -> Dict[str, Node]:
-        """Initialize nodes based on configuration."""
+        """Initialize nodes from the compiled execution plan."""
         nodes = {}
-        stages = self.config.get('stages', [])
         
-        for stage_config in stages:
-            stage_name = stage_config['name']
-            # Import ExecutionMode and convert mode string to enum
-            from core.node import ExecutionMode
-            
-            mode_str = stage_config.get('mode', 'deterministic')
-            if mode_str == 'deterministic':
-                execution_mode = ExecutionMode.DETERMINISTIC
-            elif mode_str == 'non_deterministic':
-                execution_mode = ExecutionMode.NON_DETERMINISTIC
-            else:
-                execution_mode = ExecutionMode.ADAPTIVE
-                
-            nodes[stage_name] = Node(
-                name=stage_name,
-                abilities=stage_config.get('abilities', []),
+        for stage in self.plan:
+            nodes[stage.name] = Node(
+                name=stage.name,
+                abilities=stage.abilities,
                 mcp_client=self.mcp_client,
-                execution_mode=execution_mode,
-                server_type=stage_config.get('server', 'common'),
-                timeout=stage_config.get('timeout', 30),
-                quality_threshold=stage_config.get('quality_threshold', 0.8)
+                execution_mode=stage.mode,
+                server_type=stage.server,
+                timeout=stage.timeout,
+                ability_timeout=stage.ability_timeout,
+                quality_threshold=stage.quality_threshold,
+                parallel_abilities=stage.parallel_abilities,
+                params=stage.params,
+                retry_engine=self.retry_engine
             )
             
-        logger.info(f"🔧 Initialized {len(nodes)} workflow nodes")
+        logger.info("🔧 Initialized %d workflow nodes", len(nodes))
         return nodes
     
-    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Run the customer support workflow through all 11 stages."""
+    @property
+    def last_run(self) -> Optional[RunContext]:
+        """The most recent run started from the calling thread."""
+        return getattr(self._local, 'last_run', None)
+    
+    @property
+    def state(self) -> Dict[str, Any]:
+        """Final state of the calling thread's most recent run."""
+        run = self.last_run
+        return run.state if run else {}
+    
+    def run(self, input_data: Dict[str, Any], attach_duplicates: bool = False) -> RunContext:
+        """
+        Run the customer support workflow through all 11 stages.
+        
+        Returns a RunContext holding the final state of this run. The agent
+        keeps no shared per-run state, so one instance can be used from many
+        threads at once. With ``attach_duplicates`` and
+        `settings.coalescing.duplicate_workflows` enabled, a duplicate of a
+        ticket whose run is still in flight (same customer, query, urgency
+        and attachments) attaches to that run instead: it waits for it and
+        gets a copy of its outcome, with `attached` set (see core/coalescing.py).
+        """
+        run = self._execute_workflow(input_data, attach_duplicates)
+        self._local.last_run = run
+        return run
+    
+    async def arun(self, input_data: Dict[str, Any], attach_duplicates: bool = False) -> RunContext:
+        """
+        Run the customer support workflow on the running event loop.
+        
+        Stages, abilities and retries await instead of blocking, so a single
+        process can keep many workflows in flight (e.g. with asyncio.gather)
+        while they wait on external Atlas systems. ``attach_duplicates`` as
+        for run().
+        """
+        return await self._aexecute_workflow(input_data, attach_duplicates)
+    
+    def resume(self, workflow_id: str, event: Optional[Dict[str, Any]] = None) -> RunContext:
+        """
+        Continue a checkpointed workflow from the stage that failed or where it parked.
+        
+        The stages that completed are not run again: the state is rebuilt
+        from their checkpoints (see core/checkpoint_store.py) and the run
+        carries on with the stage that failed or timed out, or that was
+        running when its process died. A workflow parked at a `wait_for`
+        stage (status 'waiting') carries on once ``event`` delivers the field
+        it waits for, e.g. ``{'customer_response': "..."}``; ``event`` is
+        merged into the state. A completed workflow (kept with
+        `keep_completed`) is returned as it finished.
+        
+        Raises:
+            RuntimeError: checkpoints are not enabled (settings.checkpoints)
+            LookupError: there are no checkpoints for ``workflow_id``
+            ValueError: the workflow was checkpointed with other stages, is
+                waiting for a field ``event`` does not carry, or was resumed
+                by another caller in the meantime
+        """
+        run = self._resume_run(workflow_id, event)
+        if run.status == 'running':
+            run = self._execute_stages(run)
+        self._local.last_run = run
+        return run
+    
+    async def aresume(self, workflow_id: str, event: Optional[Dict[str, Any]] = None) -> RunContext:
+        """Async counterpart of resume()."""
+        run = self._resume_run(workflow_id, event)
+        if run.status == 'running':
+            run = await self._aexecute_stages(run)
+        return run
+    
+    def run_batch(self,
+                  payloads: Iterable[Dict[str, Any]],
+                  workers: Optional[int] = None,
+                  executor: str = "thread",
+                  max_in_flight: Optional[int] = None,
+                  ordered: bool = False) -> Iterator[Tuple[int, RunContext]]:
+        """
+        Run many payloads through the workflow on a worker pool.
+        
+        Results are streamed back as ``(index, run_context)`` tuples in completion
+        order, where ``index`` is the position of the payload in ``payloads``.
+        The parsed configuration, the Node objects and the server singletons are
+        shared by every worker: threads use this agent directly, and forked
+        processes inherit it. Payloads are consumed lazily and at most
+        ``max_in_flight`` of them are queued at once, so ``payloads`` may be an
+        arbitrarily long generator.
+        
+        Args:
+            payloads: Iterable of input payloads (same shape as demo_input.json)
+            workers: Pool size, defaults to the number of CPUs
+            executor: "thread", "process", or "prefork" (processes forked once
+                this agent is warmed up, restarted when they crash; SIGTERM
+                stops reading ``payloads`` and drains, see core/prefork.py)
+            max_in_flight: Upper bound on submitted but unfinished payloads
+                (defaults to 4 x workers, at least workers)
+            ordered: Yield results in input order instead; a slow payload then
+                holds back the ones after it, but never more than max_in_flight
+                (with scheduling, never more than the scheduling window)
+        
+        With `settings.scheduling` enabled, payloads are run in SLA deadline
+        order by lane instead of input order (see core/scheduler.py) and the
+        pool holds two payloads per worker, or ``max_in_flight`` if that is
+        less; in ``ordered`` mode a given ``max_in_flight`` also bounds the
+        results held back when it is below the scheduling window. The SLA
+        report of the batch is `get_schedule_stats()`.
+        
+        Duplicate tickets (with `settings.coalescing.duplicate_workflows`
+        enabled) and identical ability calls are coalesced within a process:
+        across all threads of a thread pool, but only within each worker of a
+        process or prefork pool.
+        """
+        if executor not in ("thread", "process", "prefork"):
+            raise ValueError(f"Unknown executor '{executor}', expected 'thread', 'process' or 'prefork'")
+        
+        workers = workers or os.cpu_count() or 1
+        # Scheduling keeps fewer payloads in flight by default, a given bound still applies
+        in_flight_bound = max(max_in_flight, workers) if max_in_flight else None
+        max_in_flight = max(max_in_flight or workers * 4, workers)
+        pool = self._create_batch_executor(executor, workers)
+        run_one = self._execute_batch_workflow if executor == "thread" else _run_in_batch_worker
+        
+        logger.info("📦 Starting batch execution with %d %s workers", workers, executor)
+        
+        pending = {}
+        try:
+            if self.scheduler is not None:
+                queue = self.scheduler.queue()
+                try:
+                    yield from self._run_scheduled(queue, payloads, pool, run_one, workers, ordered, pending,
+                                                   in_flight_bound)
+                finally:
+                    self._schedule_stats = queue.report()
+                return
+            
+            if ordered:
+                # Dicts keep insertion order: the first pending future is the oldest payload
+                for index, payload in self._batch_payloads(payloads, pool):
+                    pending[pool.submit(run_one, payload)] = index
+                    if len(pending) >= max_in_flight:
+                        yield self._batch_result(pending, next(iter(pending)))
+                while pending:
+                    yield self._batch_result(pending, next(iter(pending)))
+                return
+            
+            for index, payload in self._batch_payloads(payloads, pool):
+                pending[pool.submit(run_one, payload)] = index
+                if len(pending) >= max_in_flight:
+                    yield from self._drain_batch(pending)
+            while pending:
+                yield from self._drain_batch(pending)
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+    
+    def _run_scheduled(self, queue: ScheduleQueue, payloads: Iterable[Dict[str, Any]], pool: Executor,
+                       run_one: Any, workers: int, ordered: bool, pending: Dict[Any, int],
+                       max_in_flight: Optional[int] = None) -> Iterator[Tuple[int, RunContext]]:
+        """
+        Feed the pool from ``queue``, two payloads per worker, reading ahead up to the scheduling window.
+        
+        In ``ordered`` mode the window also bounds the results held back
+        until every earlier payload is done. ``max_in_flight`` caps both the
+        payloads in the pool and, in ``ordered`` mode, those held back.
+        """
+        source = self._batch_payloads(payloads, pool)
+        window = self.scheduler.window
+        submitted = _SCHEDULED_PER_WORKER * workers
+        if max_in_flight is not None:
+            submitted = min(submitted, max_in_flight)
+            if ordered:
+                window = min(window, max_in_flight)
+        tickets = {}
+        done: Dict[int, RunContext] = {}
+        read = next_index = 0
+        while True:
+            # Payloads read but not yielded yet (ordered), or waiting for a worker
+            while source is not None and (read - next_index if ordered else len(queue)) < window:
+                try:
+                    index, payload = next(source)
+                except StopIteration:
+                    source = None
+                    break
+                queue.push(index, payload)
+                read += 1
+            # Draining (prefork on SIGTERM) stops the reading above; what was read still runs,
+            # so that ordered results after a queued bulk payload are not lost
+            while len(pending) < submitted and queue:
+                ticket = queue.pop()
+                future = pool.submit(run_one, ticket.payload)
+                pending[future] = ticket.index
+                tickets[future] = ticket
+            if not pending:
+                return
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                queue.finish(tickets.pop(future))
+                index, run = self._batch_result(pending, future)
+                if ordered:
+                    done[index] = run
+                else:
+                    yield index, run
+            while next_index in done:
+                yield next_index, done.pop(next_index)
+                next_index += 1
+    
+    def _create_batch_executor(self, executor: str, workers: int) -> Executor:
+        """Create the worker pool used by run_batch."""
+        if executor == "thread":
+            return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="langgraph-batch")
+        
+        # Forked workers inherit this agent (config, nodes, server singletons)
+        # copy-on-write; spawn-only platforms rebuild it once per worker.
+        global _batch_agent
+        _batch_agent = self
+        if executor == "prefork":
+            self.warm_up()
+            return PreforkExecutor(workers)
+        # Imported here: multiprocessing adds to the startup of every CLI run
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        if "fork" in multiprocessing.get_all_start_methods():
+            return ProcessPoolExecutor(max_workers=workers,
+                                       mp_context=multiprocessing.get_context("fork"))
+        return ProcessPoolExecutor(max_workers=workers,
+                                   initializer=_init_batch_worker,
+                                   initargs=(self.config_path,))
+    
+    @staticmethod
+    def _batch_payloads(payloads: Iterable[Dict[str, Any]], pool: Executor) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Enumerate ``payloads`` until the pool starts draining (prefork on SIGTERM)."""
+        for index, payload in enumerate(payloads):
+            if getattr(pool, 'draining', False):
+                logger.warning("🛑 Batch draining: not reading payloads from index %d on", index)
+                return
+            yield index, payload
+    
+    def warm_up(self):
+        """Load every server and build its lazily built data (knowledge base index, payload models)."""
+        self.mcp_client.warm_up()
+    
+    @classmethod
+    def _drain_batch(cls, pending: Dict[Any, int]) -> Iterator[Tuple[int, RunContext]]:
+        """Yield results for finished futures and remove them from ``pending``."""
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield cls._batch_result(pending, future)
+    
+    @staticmethod
+    def _batch_result(pending: Dict[Any, int], future: Any) -> Tuple[int, RunContext]:
+        """Wait for one future, remove it from ``pending`` and return its indexed result."""
+        index = pending[future]
+        try:
+            run = future.result()
+        except Exception as e:
+            logger.error("❌ Batch item %d failed: %s", index, e)
+            run = RunContext(None, {
+                'workflow_status': 'failed',
+                'error': f"Workflow failed: {str(e)}"
+            })
+        del pending[future]
+        return index, run
+    
+    def _execute_batch_workflow(self, input_data: Dict[str, Any]) -> RunContext:
+        """Execute one payload of a batch: duplicates in flight attach to each other."""
+        return self._execute_workflow(input_data, attach_duplicates=True)
+    
+    def _execute_workflow(self, input_data: Dict[str, Any], attach_duplicates: bool = False) -> RunContext:
+        """Execute all stages for one payload and return its run context (a duplicate may attach instead)."""
+        key = self._workflow_key(input_data) if attach_duplicates else None
+        if key is None:
+            return self._execute_new_workflow(input_data)
+        return self._log_attached(self.workflow_coalescer.do('workflow', key, self._execute_new_workflow, input_data))
+    
+    def _execute_new_workflow(self, input_data: Dict[str, Any]) -> RunContext:
+        """Execute all stages for one payload in a run of its own."""
+        return self._execute_stages(self._start_run(input_data))
+    
+    def _execute_stages(self, run: RunContext) -> RunContext:
+        """Execute the stages of a run from ``run.next_stage`` on."""
+        with self.tracer.span("workflow", "workflow") as workflow_span:
+            workflow_span.set("workflow_id", run.workflow_id)
+            
+            # Execute stages in sequence
+            for stage_name in self._iter_stages(run):
+                with self.tracer.span(stage_name, "stage", position=run.state['current_stage']):
+                    try:
+                        stage_start_time = datetime.now()
+                        run.state = self.nodes[stage_name].execute(run.state, deadline=run.deadline)
+                        self._complete_stage(run, stage_name, stage_start_time)
+                    except Exception as e:
+                        self._fail_stage(run, stage_name, e)
+                        break
+            
+            run = self._finish_run(run)
+            workflow_span.set("status", run.state['workflow_status'])
+            return run
+    
+    async def _aexecute_workflow(self, input_data: Dict[str, Any], attach_duplicates: bool = False) -> RunContext:
+        """Async counterpart of _execute_workflow."""
+        key = self._workflow_key(input_data) if attach_duplicates else None
+        if key is None:
+            return await self._aexecute_new_workflow(input_data)
+        return self._log_attached(await self.workflow_coalescer.ado('workflow', key, self._aexecute_new_workflow, input_data))
+    
+    async def _aexecute_new_workflow(self, input_data: Dict[str, Any]) -> RunContext:
+        """Async counterpart of _execute_new_workflow."""
+        return await self._aexecute_stages(self._start_run(input_data))
+    
+    def _workflow_key(self, input_data: Dict[str, Any]) -> Optional[str]:
+        """Duplicate-detection key of a payload, or None when duplicate workflows are not coalesced."""
+        return self.workflow_coalescer.key_for(input_data) if self.workflow_coalescer is not None else None
+    
+    @staticmethod
+    def _log_attached(run: RunContext) -> RunContext:
+        """Log a duplicate ticket that attached to an earlier run."""
+        if run.attached:
+            logger.info("🔗 Duplicate ticket attached to workflow %s (%s)", run.workflow_id, run.status)
+        return run
+    
+    async def _aexecute_stages(self, run: RunContext) -> RunContext:
+        """Async counterpart of _execute_stages."""
+        with self.tracer.span("workflow", "workflow") as workflow_span:
+            workflow_span.set("workflow_id", run.workflow_id)
+            
+            # Execute stages in sequence
+            for stage_name in self._iter_stages(run):
+                with self.tracer.span(stage_name, "stage", position=run.state['current_stage']):
+                    try:
+                        stage_start_time = datetime.now()
+                        run.state = await self.nodes[stage_name].aexecute(run.state, deadline=run.deadline)
+                        self._complete_stage(run, stage_name, stage_start_time)
+                    except Exception as e:
+                        self._fail_stage(run, stage_name, e)
+                        break
+            
+            run = self._finish_run(run)
+            workflow_span.set("status", run.state['workflow_status'])
+            return run
+    
+    def _start_run(self, input_data: Dict[str, Any]) -> RunContext:
+        """Create the run context and initial state for one payload."""
         logger.info("🎯 Starting customer support workflow execution")
         
         # Initialize state with input data
-        self.state = {
-            'workflow_id': f"cs_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+        workflow_id = f"cs_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        state = {
+            'workflow_id': workflow_id,
             'start_time': datetime.now().isoformat(),
             'current_stage': 0,
-            'total_stages': len(self.config.get('stages', [])),
+            'total_stages': len(self.plan),
             'stage_results': {},
             'workflow_status': 'running',
             **input_data
         }
         
-        logger.info(f"📊 Initial state: {json.dumps({k: v for k, v in self.state.items() if k not in ['workflow_id', 'start_time']}, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Initial state: %s", json.dumps(
+                {k: v for k, v in state.items() if k not in ('workflow_id', 'start_time')}, default=str))
         
-        # Execute stages in sequence
-        stages = self.config.get('stages', [])
-        for i, stage_config in enumerate(stages, 1):
-            stage_name = stage_config['name']
+        run = RunContext(workflow_id, state)
+        run.deadline = Deadline("workflow", workflow_id, self.plan.max_workflow_time)
+        self._checkpoint_start(run)
+        return run
+    
+    def _resume_run(self, workflow_id: str, event: Optional[Dict[str, Any]] = None) -> RunContext:
+        """Rebuild the run context of a checkpointed workflow, ready to run its next stage."""
+        if self.checkpoints is None:
+            raise RuntimeError("checkpoints are not enabled (settings.checkpoints.enabled)")
+        checkpoint = self.checkpoints.load(workflow_id)
+        completed = list(checkpoint.stage_statuses)
+        if completed != [stage.name for stage in self.plan.stages[:len(completed)]]:
+            raise ValueError(f"workflow '{workflow_id}' was checkpointed with other stages: {completed}")
+        
+        run = RunContext(workflow_id, checkpoint.state)
+        run.stage_statuses.update(checkpoint.stage_statuses)
+        run.checkpoint_seq = checkpoint.seq
+        if not checkpoint.resumable:
+            return run
+        if checkpoint.status == WAITING and (event or {}).get(checkpoint.waiting_for) is None:
+            raise ValueError(f"workflow '{workflow_id}' is waiting for '{checkpoint.waiting_for}'")
+        
+        state = run.state
+        previous = dict(state)
+        run.next_stage = checkpoint.next_stage
+        state.update(event or {})
+        state.pop('waiting_for', None)
+        state['workflow_status'] = 'running'
+        state['resumed_from_stage'] = (self.plan.stages[run.next_stage].name
+                                       if run.next_stage < len(self.plan) else None)
+        
+        # Claims the run: a second resume of the same failure or reply finds it running
+        run.checkpoint_seq += 1
+        changes, removed = state_delta(previous, state)
+        if not self.checkpoints.mark_resumed(workflow_id, checkpoint.status, run.checkpoint_seq, changes, removed):
+            raise ValueError(f"workflow '{workflow_id}' was resumed by another caller")
+        run.checkpointed = dict(state)
+        logger.info("♻️ Resuming workflow %s at stage %s (was %s%s)", workflow_id, state['resumed_from_stage'],
+                    checkpoint.status, f": {checkpoint.error}" if checkpoint.error else "")
+        # A fresh time budget: the time spent before the failure (or waiting) is not held against the rerun
+        run.deadline = Deadline("workflow", workflow_id, self.plan.max_workflow_time)
+        return run
+    
+    def _iter_stages(self, run: RunContext) -> Iterator[str]:
+        """Yield the name of each stage that should run next, skipping those its conditions rule out."""
+        for stage in self.plan.stages[run.next_stage:]:
+            # Each stage replaces run.state
+            state = run.state
+            jump_target = state.get('skip_to_stage')
+            if jump_target is not None:
+                if jump_target != stage.name:
+                    self._skip_stage(run, stage, f"jumped to stage {jump_target}")
+                    continue
+                del state['skip_to_stage']
+            if stage.run_if is not None and not stage.run_if(state):
+                self._skip_stage(run, stage, f"run_if is false: {stage.run_if.source}")
+                continue
+            if stage.wait_for is not None and stage.wait_for.should_park(state) and self._park(run, stage):
+                return
+            logger.info("🔄 [%d/%d] Executing stage: %s (mode: %s, server: %s)",
+                        stage.position, len(self.plan), stage.name, stage.mode.value, stage.server)
+            logger.debug("🎯 Abilities: %s", stage.abilities)
             
-            if stage_name in self.nodes:
-                logger.info(f"\n🔄 [{i}/{len(stages)}] Executing stage: {stage_name.upper()}")
-                logger.info(f"📝 Mode: {stage_config.get('mode', 'deterministic')}")
-                logger.info(f"🎯 Abilities: {', '.join(stage_config.get('abilities', []))}")
-                logger.info(f"🖥️  Server: {stage_config.get('server', 'common')}")
-                
-                # Update current stage in state
-                self.state['current_stage'] = i
-                self.state['current_stage_name'] = stage_name
-                
-                # Execute the node
-                try:
-                    stage_start_time = datetime.now()
-                    self.state = self.nodes[stage_name].execute(self.state)
-                    stage_end_time = datetime.now()
-                    
-                    # Record stage execution details
-                    self.state['stage_results'][stage_name] = {
-                        'status': 'completed',
-                        'start_time': stage_start_time.isoformat(),
-                        'end_time': stage_end_time.isoformat(),
-                        'duration_ms': int((stage_end_time - stage_start_time).total_seconds() * 1000)
-                    }
-                    
-                    logger.info(f"✅ Stage {stage_name} completed successfully")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Stage {stage_name} failed: {str(e)}")
-                    self.state['error'] = f"Stage {stage_name} failed: {str(e)}"
-                    self.state['workflow_status'] = 'failed'
-                    self.state['failed_stage'] = stage_name
-                    
-                    # Record failed stage details
-                    self.state['stage_results'][stage_name] = {
-                        'status': 'failed',
-                        'error': str(e),
-                        'start_time': datetime.now().isoformat()
-                    }
-                    break
-            else:
-                logger.warning(f"⚠️  Stage '{stage_name}' not found in nodes")
-                self.state['workflow_status'] = 'failed'
-                self.state['error'] = f"Stage '{stage_name}' not found in nodes"
+            # Update current stage in state
+            state['current_stage'] = stage.position
+            state['current_stage_name'] = stage.name
+            
+            yield stage.name
+    
+    def _skip_stage(self, run: RunContext, stage: Any, reason: str):
+        """Record a stage the run does not need, as a checkpointed stage with status 'skipped'."""
+        logger.info("⏭️ [%d/%d] Skipping stage: %s (%s)", stage.position, len(self.plan), stage.name, reason)
+        run.record_stage(stage.name, 'skipped')
+        run.state['stage_results'][stage.name] = {'status': 'skipped', 'reason': reason}
+        run.next_stage = stage.position
+        self._checkpoint_stage(run, stage.name)
+    
+    def _park(self, run: RunContext, stage: Any) -> bool:
+        """
+        Park a run before ``stage`` until the field it waits for is delivered.
+        
+        The run is saved as a compact continuation (see
+        `CheckpointStore.park()`) and returns with status 'waiting', so the
+        worker is free; `resume(workflow_id, event)` picks it up. Returns
+        False, and the stage runs without the field, when the run cannot be
+        persisted (its checkpoints stopped).
+        """
+        if run.checkpointed is None:
+            logger.warning("⚠️ Workflow %s cannot park at stage %s without checkpoints, running it without '%s'",
+                           run.workflow_id, stage.name, stage.wait_for.field)
+            return False
+        state = run.state
+        state['workflow_status'] = WAITING
+        state['waiting_for'] = stage.wait_for.field
+        state['parked_at'] = datetime.now().isoformat()
+        self._write_checkpoint(run, self.checkpoints.park, run.workflow_id, run.next_stage, stage.wait_for.field, state)
+        if run.checkpointed is None:
+            state['workflow_status'] = 'running'
+            del state['waiting_for'], state['parked_at']
+            return False
+        return True
+    
+    def _complete_stage(self, run: RunContext, stage_name: str, stage_start_time: datetime):
+        """Record a successfully executed stage."""
+        stage_end_time = datetime.now()
+        run.record_stage(stage_name, run.state['_node_metadata']['status'])
+        
+        # Record stage execution details
+        run.state['stage_results'][stage_name] = {
+            'status': 'completed',
+            'start_time': stage_start_time.isoformat(),
+            'end_time': stage_end_time.isoformat(),
+            'duration_ms': int((stage_end_time - stage_start_time).total_seconds() * 1000)
+        }
+        stage = self.plan.stage(stage_name)
+        run.next_stage = stage.position
+        for edge in stage.edges:
+            if edge.when(run.state):
+                # In the state, so the jump is checkpointed with the stage and survives a resume
+                run.state['skip_to_stage'] = edge.goto
+                logger.info("↪️ Stage %s jumps to %s (%s)", stage_name, edge.goto, edge.when.source)
                 break
+        self._checkpoint_stage(run, stage_name)
+        
+        logger.info("✅ Stage %s completed successfully", stage_name)
+    
+    def _fail_stage(self, run: RunContext, stage_name: str, error: Exception):
+        """Record a stage that raised and mark the workflow as failed."""
+        state = run.state
+        logger.error("❌ Stage %s failed: %s", stage_name, error)
+        state['error'] = f"Stage {stage_name} failed: {str(error)}"
+        state['workflow_status'] = 'failed'
+        state['failed_stage'] = stage_name
+        
+        run.record_stage(stage_name, 'failed')
+        
+        # Record failed stage details
+        state['stage_results'][stage_name] = {
+            'status': 'failed',
+            'error': str(error),
+            'start_time': datetime.now().isoformat()
+        }
         
-        # Finalize state
-        self.state['end_time'] = datetime.now().isoformat()
-        if 'error' not in self.state:
-            self.state['workflow_status'] = 'completed'
+        if isinstance(error, DeadlineExceeded):
+            # Answer the customer with the configured fallback instead of nothing
+            state['workflow_status'] = 'timed_out'
+            state['timed_out_scope'] = error.deadline.scope
+            state['fallback_response'] = 'timeout_error'
+            state['response_text'] = self.plan.fallback_responses.get(
+                'timeout_error', "Your request is taking longer than expected. We'll follow up shortly.")
+        
+        if run.checkpointed is not None:
+            self._write_checkpoint(run, self.checkpoints.mark_failed,
+                                   run.workflow_id, state['workflow_status'], stage_name, state['error'])
+    
+    def _finish_run(self, run: RunContext) -> RunContext:
+        """Finalize the workflow state once no more stages will run."""
+        state = run.state
+        if state['workflow_status'] == WAITING:
+            logger.info("⏸️ Workflow %s parked before stage %s, waiting for '%s'",
+                        run.workflow_id, self.plan.stages[run.next_stage].name, state['waiting_for'])
+            return run
+        
+        state['end_time'] = datetime.now().isoformat()
+        if 'error' not in state:
+            state['workflow_status'] = 'completed'
         
         # Calculate total workflow duration
-        start_time = datetime.fromisoformat(self.state['start_time'])
-        end_time = datetime.fromisoformat(self.state['end_time'])
-        self.state['total_duration_ms'] = int((end_time - start_time).total_seconds() * 1000)
+        start_time = datetime.fromisoformat(state['start_time'])
+        end_time = datetime.fromisoformat(state['end_time'])
+        state['total_duration_ms'] = int((end_time - start_time).total_seconds() * 1000)
         
-        logger.info(f"\n🏁 Workflow completed with status: {self.state['workflow_status'].upper()}")
-        logger.info(f"⏱️  Total duration: {self.state['total_duration_ms']}ms")
-        logger.info(f"📋 Final structured payload:")
+        logger.info("🏁 Workflow completed with status: %s in %dms",
+                    state['workflow_status'].upper(), state['total_duration_ms'])
         
-        return self.state
+        if run.checkpointed is not None and state['workflow_status'] == 'completed':
+            changes, removed = state_delta(run.checkpointed, state)
+            self._write_checkpoint(run, self.checkpoints.complete,
+                                   run.workflow_id, run.checkpoint_seq + 1, changes, removed)
+        
+        return run
     
-    def get_workflow_summary(self) -> Dict[str, Any]:
-        """Get a summary of the workflow execution."""
-        if not self.state:
-            return {'error': 'No workflow has been executed yet'}
+    def _checkpoint_start(self, run: RunContext):
+        """Checkpoint the initial state of a run (when checkpoints are enabled)."""
+        if self.checkpoints is not None:
+            self._write_checkpoint(run, self.checkpoints.start, run.workflow_id, run.state)
+    
+    def _checkpoint_stage(self, run: RunContext, stage_name: str):
+        """Checkpoint what a completed stage changed in the state."""
+        if run.checkpointed is None:
+            return
+        changes, removed = state_delta(run.checkpointed, run.state)
+        run.checkpoint_seq += 1
+        self._write_checkpoint(run, self.checkpoints.save_stage,
+                               run.workflow_id, run.checkpoint_seq, stage_name, run.stage_statuses[stage_name],
+                               run.next_stage, changes, removed, run.state['stage_results'][stage_name])
+    
+    def _write_checkpoint(self, run: RunContext, write, *args):
+        """
+        Run one checkpoint write and remember the state it covers.
         
-        summary = {
-            'workflow_id': self.state.get('workflow_id'),
-            'status': self.state.get('workflow_status'),
-            'total_stages': self.state.get('total_stages'),
-            'completed_stages': len([r for r in self.state.get('stage_results', {}).values() if r.get('status') == 'completed']),
-            'total_duration_ms': self.state.get('total_duration_ms'),
-            'customer_info': {
-                'name': self.state.get('customer', {}).get('name'),
-                'email': self.state.get('customer', {}).get('email'),
-                'tier': self.state.get('customer', {}).get('tier')
-            },
-            'case_info': {
-                'case_id': self.state.get('case_id'),
-                'priority': self.state.get('priority'),
-                'category': self.state.get('category')
-            }
+        A failed write (disk full, database locked for too long) stops
+        checkpointing this run without failing it: resuming it later starts
+        after the last checkpoint that was written.
+        """
+        try:
+            write(*args)
+            run.checkpointed = dict(run.state)
+        except Exception as e:
+            run.checkpointed = None
+            logger.warning("⚠️ Checkpoints of workflow %s stopped: %s", run.workflow_id, e)
+    
+    def get_retry_stats(self) -> Dict[str, Any]:
+        """Retry budget counters (requests, retries, rejected retries) per server."""
+        return self.retry_engine.get_stats()
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Single-flight counters: ability calls executed/shared, and workflows run/attached by duplicates."""
+        workflows = self.workflow_coalescer
+        return {
+            'abilities': self.mcp_client.get_coalescing_stats(),
+            'workflows': {'enabled': True, **workflows.get_stats()} if workflows is not None else {'enabled': False}
         }
+    
+    def get_schedule_stats(self) -> Optional[Dict[str, Any]]:
+        """SLA report of the last scheduled batch: tickets, SLA misses (and those caused by queueing), queue waits per lane."""
+        return self._schedule_stats
+    
+    def get_performance_summary(self) -> Dict[str, Any]:
+        """Latency percentiles (p50/p95/p99/max, seconds) per stage, ability and server."""
+        metrics = get_metrics_registry()
+        return {
+            'stages': {name: node.get_performance_summary() for name, node in self.nodes.items()},
+            'abilities': metrics.summaries('ability_latency_seconds'),
+            'servers': {server: histogram.summary()
+                        for server, histogram in metrics.merged('ability_latency_seconds', 'server').items()}
+        }
+    
+    def export_metrics(self, path: Optional[str] = None) -> str:
+        """Latency metrics in the OpenMetrics text format, also written to ``path`` if given."""
+        metrics = get_metrics_registry()
+        return metrics.write_openmetrics(path) if path else metrics.render_openmetrics()
+    
+    def export_trace(self, path: str):
+        """Write the spans traced so far (settings.enable_tracing) as Chrome trace JSON."""
+        self.tracer.export_chrome_trace(path)
+    
+    def get_workflow_summary(self, run: Optional[RunContext] = None) -> Dict[str, Any]:
+        """Get a summary of a workflow run (defaults to this thread's last run)."""
+        run = run or self.last_run
+        if run is None:
+            return {'error': 'No workflow has been executed yet'}
         
-        if self.state.get('error'):
-            summary['error'] = self.state['error']
-            summary['failed_stage'] = self.state.get('failed_stage')
-        
-        return summary
+        return run.summary()
 
 
-def main():
-    """Main function to run the customer support agent demo."""
+# Scheduled payloads handed to the pool per worker: a worker that finishes finds
+# its next payload waiting, and a later, more urgent one overtakes all but these
+_SCHEDULED_PER_WORKER = 2
+
+# Agent shared with process-pool workers by run_batch
+_batch_agent: Optional[LangGraphAgent] = None
+
+
+def _init_batch_worker(config_path: str):
+    """Build the worker-local agent on platforms that cannot fork."""
+    global _batch_agent
+    if _batch_agent is None:
+        _batch_agent = LangGraphAgent(config_path)
+
+
+def _run_in_batch_worker(input_data: Dict[str, Any]) -> RunContext:
+    """Process-pool entry point for run_batch."""
+    return _batch_agent._execute_batch_workflow(input_data)
+
+
+def main(argv: Optional[list] = None):
+    """Run the demo, or stream a JSONL file of payloads with --input/--output."""
+    parser = argparse.ArgumentParser(description="LangGraph customer support agent")
+    parser.add_argument("--config", default="graph_config.yaml", help="Workflow configuration")
+    parser.add_argument("--input", help="JSONL file of payloads, one per line (default: run demo_input.json)")
+    parser.add_argument("--output", help="JSONL file for the results, one per input line")
+    parser.add_argument("--workers", type=int, help="Worker pool size (default: number of CPUs)")
+    parser.add_argument("--executor", choices=("thread", "process", "prefork"), default="thread")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the checkpoint of --output after an interrupted run")
+    parser.add_argument("--input-offset", type=int, default=0, help="Byte offset of --input to start at")
+    parser.add_argument("--summary-only", action="store_true", help="Write run summaries without final states")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Report import and initialization times of a fresh agent, then exit")
+    args = parser.parse_args(argv)
+    
+    if args.startup_profile:
+        # Not imported with the agent: it is only needed here
+        from core.startup_profile import profile_startup
+        print(profile_startup(args.config))
+        return
+    
+    # Until the agent applies settings.log_level
+    configure_logging()
+    
+    if args.input or args.output:
+        if not (args.input and args.output):
+            parser.error("--input and --output go together")
+        agent = LangGraphAgent(args.config)
+        try:
+            checkpoint = run_jsonl(agent, args.input, args.output,
+                                   workers=args.workers, executor=args.executor, resume=args.resume,
+                                   input_offset=args.input_offset, summary_only=args.summary_only)
+        except ValueError as e:
+            parser.error(str(e))
+        logger.info("📤 Wrote %d results to %s (%d failed, %d parked), input offset %d",
+                    checkpoint['lines'], args.output, checkpoint['failed'], checkpoint.get('parked', 0),
+                    checkpoint['input_offset'])
+        # Worker processes coalesce on their own: only thread pools report here
+        coalescing = agent.get_coalescing_stats()
+        if args.executor == "thread" and (coalescing['abilities']['enabled'] or coalescing['workflows']['enabled']):
+            logger.info("🔗 Coalesced: %d duplicate tickets attached, %d ability calls shared",
+                        coalescing['workflows'].get('coalesced', 0), coalescing['abilities'].get('coalesced', 0))
+        schedule = agent.get_schedule_stats()
+        if schedule is not None:
+            logger.info("⏱️ SLA (%s): %d of %d tickets missed their response time, %d because of queueing",
+                        schedule['policy'], schedule['sla_missed'], schedule['tickets'], schedule['missed_by_queueing'])
+            for lane, stats in schedule['lanes'].items():
+                logger.info("⏱️   %-10s %6d tickets, %d missed (%d queueing), wait p50 %.1fms p95 %.1fms",
+                            lane, stats['tickets'], stats['sla_missed'], stats['missed_by_queueing'],
+                            stats['wait_p50'] * 1000, stats['wait_p95'] * 1000)
+        return
+    
     print("🏗️  LangGraph Agent - Customer Support Workflow Demo")
     print("=" * 55)
     
@@ -201,27 +810,28 @@ def main():
         with open('demo_input.json', 'r') as f:
             demo_input = json.load(f)
             
-        logger.info(f"📥 Demo input loaded: {demo_input.get('customer', {}).get('name', 'Unknown')} - {demo_input.get('query', 'No query')}")
+        logger.info("📥 Demo input loaded: %s - %s",
+                    demo_input.get('customer', {}).get('name', 'Unknown'), demo_input.get('query', 'No query'))
         
         # Initialize and run agent
-        agent = LangGraphAgent()
-        result = agent.run(demo_input)
+        agent = LangGraphAgent(args.config)
+        run = agent.run(demo_input)
         
         print("\n" + "=" * 55)
         print("📋 WORKFLOW SUMMARY:")
         print("=" * 55)
-        summary = agent.get_workflow_summary()
+        summary = agent.get_workflow_summary(run)
         print(json.dumps(summary, indent=2, default=str))
         
         print("\n" + "=" * 55)
         print("📋 FINAL STRUCTURED PAYLOAD:")
         print("=" * 55)
-        print(json.dumps(result, indent=2, default=str))
+        print(json.dumps(run.state, indent=2, default=str))
         
     except FileNotFoundError as e:
-        logger.error(f"❌ Required file not found: {e}")
+        logger.error("❌ Required file not found: %s", e)
     except Exception as e:
-        logger.error(f"❌ Unexpected error: {e}")
+        logger.error("❌ Unexpected error: %s", e)
         raise
 
 
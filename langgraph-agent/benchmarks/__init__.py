@@ -0,0 +1,7 @@
+"""
+Benchmarks for the LangGraph customer support agent.
+
+Run a benchmark as a module from the `langgraph-agent` directory, e.g.:
+
+    python -m benchmarks.state_copy
+"""
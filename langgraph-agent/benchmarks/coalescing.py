@@ -0,0 +1,141 @@
+"""
+Request coalescing: Atlas round trips and batch time with and without single-flight.
+
+A seeded workload (see benchmarks/workload.py) is turned into an incident
+burst: tickets come from a small pool of `--customers`, and
+`--duplicate-rate` of them are resubmissions of a recent ticket (same
+customer and text, with a new case id, another channel and changed case
+and punctuation). Atlas answers after `--atlas-latency` seconds, like a
+remote system. Each part runs on `--workers` threads, once with
+`settings.coalescing` off and once as configured in graph_config.yaml,
+with `duplicate_workflows` switched on:
+
+- lookups: the customer lookups of every ticket through `call_atlas()`
+  (`LOOKUPS`), as support tooling makes them during an incident
+- workflows: the tickets through `run_batch()`; duplicates attach to the
+  workflow of the original while it is still running
+
+Workflows also make Atlas calls in parallel: with more than 8 workers they
+queue for Atlas's bulkhead slots, and that wait, not coalescing, then
+bounds the batch time.
+
+Usage (from the langgraph-agent directory):
+    python -m benchmarks.coalescing [--tickets 2000] [--seed 7] [--workers 8] [--customers 10]
+                                    [--duplicate-rate 0.15] [--atlas-latency 0.02]
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from agent import LangGraphAgent
+from benchmarks.workload import WorkloadGenerator
+from core.coalescing import CallCoalescer, WorkflowCoalescer
+from core.metrics import get_metrics_registry
+
+# Resubmissions repeat a ticket from at most this many tickets before them
+DUPLICATE_SPREAD = 20
+
+# Atlas customer lookups made for every ticket in the lookups part
+LOOKUPS = ("get_account_details", "fetch_interaction_history", "enrich_records")
+
+
+def incident_burst(count: int, seed: int, customers: int, duplicate_rate: float) -> List[Dict[str, Any]]:
+    """``count`` tickets from ``customers`` customers, ``duplicate_rate`` of them resubmitted."""
+    rng = random.Random(seed)
+    generator = WorkloadGenerator(seed=seed)
+    pool = [f"CUST-{number}" for number in rng.sample(range(100000, 1000000), customers)]
+    tickets: List[Dict[str, Any]] = []
+    for number in range(1, count + 1):
+        if tickets and rng.random() < duplicate_rate:
+            original = rng.choice(tickets[-DUPLICATE_SPREAD:])
+            ticket = dict(original, case_id=f"CASE-{number:09d}")
+            request = ticket['request'] = dict(original['request'], channel=rng.choice(("email", "chat", "web_form")))
+            request['description'] = request['description'].upper() + " !!"
+        else:
+            ticket = generator.ticket(number)
+            customer_id = rng.choice(pool)
+            ticket['customer_id'] = customer_id
+            ticket['contact_info']['email'] = f"{customer_id.lower()}@example.com"
+        tickets.append(ticket)
+    return tickets
+
+
+def atlas_calls() -> int:
+    """Atlas round trips made so far."""
+    atlas = get_metrics_registry().merged('ability_latency_seconds', 'server').get('atlas')
+    return atlas.count if atlas is not None else 0
+
+
+def measure(agent: LangGraphAgent, coalescing: bool, run: Callable[[], Any]) -> Dict[str, Any]:
+    """Call ``run`` with coalescing on (as configured, duplicate workflows on) or off; wall time, Atlas calls and counters."""
+    settings = None
+    if coalescing:
+        settings = dict(agent.config.get('settings', {}).get('coalescing') or {}, enabled=True)
+        settings['duplicate_workflows'] = dict(settings.get('duplicate_workflows') or {}, enabled=True)
+    agent.mcp_client.configure_coalescing(CallCoalescer.from_config(settings))
+    agent.workflow_coalescer = WorkflowCoalescer.from_config(settings)
+    calls = atlas_calls()
+    start = time.perf_counter()
+    run()
+    return {
+        'seconds': time.perf_counter() - start,
+        'atlas_calls': atlas_calls() - calls,
+        **agent.get_coalescing_stats()
+    }
+
+
+def lookups(agent: LangGraphAgent, tickets: List[Dict[str, Any]], workers: int):
+    """Make the `LOOKUPS` of every ticket on ``workers`` threads."""
+    def look_up(ticket: Dict[str, Any]):
+        for ability in LOOKUPS:
+            agent.mcp_client.call_atlas(ability, {'customer_id': ticket['customer_id']})
+
+    with ThreadPoolExecutor(workers) as pool:
+        for _ in pool.map(look_up, tickets):
+            pass
+
+
+def workflows(agent: LangGraphAgent, tickets: List[Dict[str, Any]], workers: int):
+    """Run every ticket through the workflow on ``workers`` threads."""
+    for _ in agent.run_batch(iter(tickets), workers=workers):
+        pass
+
+
+def main():
+    """Run both parts without and with coalescing and print round trips, shared calls, attached tickets and time."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=2000, help="Tickets in the batch")
+    parser.add_argument("--seed", type=int, default=7, help="Workload seed")
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads")
+    parser.add_argument("--customers", type=int, default=10, help="Customers the tickets come from")
+    parser.add_argument("--duplicate-rate", type=float, default=0.15, help="Fraction of resubmitted tickets")
+    parser.add_argument("--atlas-latency", type=float, default=0.02, help="Simulated Atlas round trip, seconds")
+    parser.add_argument("--config", default="graph_config.yaml", help="Workflow configuration")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = LangGraphAgent(args.config)
+    logging.getLogger().setLevel(logging.WARNING)
+    agent.mcp_client.servers['atlas'].simulated_latency = args.atlas_latency
+    tickets = incident_burst(args.tickets, args.seed, args.customers, args.duplicate_rate)
+
+    print(f"{args.tickets} tickets from {args.customers} customers, {args.duplicate_rate:.0%} resubmitted, "
+          f"{args.workers} workers, Atlas round trip {args.atlas_latency * 1e3:.0f}ms\n")
+    print(f"{'part':<10} {'coalescing':<11} {'atlas calls':>12} {'shared':>8} {'attached':>9} "
+          f"{'seconds':>8} {'tickets/s':>10}")
+    for part in (lookups, workflows):
+        for coalescing in (False, True):
+            report = measure(agent, coalescing, lambda: part(agent, tickets, args.workers))
+            print(f"{part.__name__:<10} {'on' if coalescing else 'off':<11} {report['atlas_calls']:>12} "
+                  f"{report['abilities'].get('coalesced', 0):>8} {report['workflows'].get('coalesced', 0):>9} "
+                  f"{report['seconds']:>8.2f} {args.tickets / report['seconds']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
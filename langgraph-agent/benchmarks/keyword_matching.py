@@ -0,0 +1,120 @@
+"""
+Keyword matching: per-ability rescans vs the shared matcher.
+
+- rescan: the previous behaviour, every text-classifying ability lowercases
+  its text again and scans it with its own `any(word in text ...)` loops
+  (reproduced below exactly as the abilities did it)
+- shared: `match_keywords` matches every text source once; the abilities
+  only look their tables up in the stored match sets
+
+Only the matching work of the eight abilities (five on common, three on
+atlas) is timed, over a ticket whose description grows with pasted log
+lines, the case the shared matcher is meant for.
+
+Usage (from the langgraph-agent directory):
+    python -m benchmarks.keyword_matching [--runs 200] [--sizes 300 5000 50000]
+"""
+
+import argparse
+import time
+from typing import Any, Dict
+
+from servers.keyword_matcher import KEYWORD_TABLES, SOURCE_TABLES, TEXT_SOURCES, keyword_matches, match_text_sources
+
+_SOURCE_PREFIXES = {source: tuple(prefixes) for source, prefixes in SOURCE_TABLES.items()}
+
+LOG_LINE = "2024-01-15 02:15:33 WARN upstream responded 503 after 30000ms on /api/v2/auth, retrying\n"
+
+
+def make_state(size: int) -> Dict[str, Any]:
+    """A ticket whose description is padded with log lines to ``size`` characters."""
+    description = "Our integration is not working since the last deploy, this is urgent. Logs:\n"
+    description += LOG_LINE * max(0, (size - len(description)) // len(LOG_LINE))
+    query = "API authentication failing - error AUTH_TIMEOUT after upgrade"
+    return {
+        "query": query,
+        "request": {"subject": query, "description": description},
+        "customer_message": description,
+        "message": description,
+        "priority": "high",
+    }
+
+
+def _tables(prefix: str):
+    """Keyword lists of the tables with a name prefix, in declaration order."""
+    return [keywords for name, keywords in KEYWORD_TABLES.items() if name.startswith(prefix)]
+
+
+def rescan(state: Dict[str, Any]):
+    """Previous behaviour: each ability lowercases and scans its own text."""
+    # categorize_request: if/elif chain of any() over the normalized query
+    query = TEXT_SOURCES["query_normalized"](state).lower()
+    for keywords in _tables("category."):
+        if any(word in query for word in keywords):
+            break
+    # classify_intent: keyword counts per intent over subject + description
+    text = TEXT_SOURCES["request_subject_description"](state).lower()
+    for keywords in _tables("intent."):
+        sum(1 for keyword in keywords if keyword in text)
+    # add_flags_calculations: any() per flag over the query
+    query = TEXT_SOURCES["query"](state).lower()
+    for keywords in _tables("flags."):
+        any(keyword in query for keyword in keywords)
+    # parse_request_text: every keyword over the request text
+    text = TEXT_SOURCES["request_text"](state).lower()
+    for keywords in _tables("parse."):
+        [keyword for keyword in keywords if keyword in text]
+    # extract_entities (common): lowercased again for every check
+    text = TEXT_SOURCES["request_description"](state)
+    urgency, technical, products = _tables("entities.")
+    any(word in text.lower() for word in urgency)
+    any(word in text.lower() for word in technical)
+    [word for word in products if word in text.lower()]
+    # extract_entities (atlas): lowercased again for every word
+    message = TEXT_SOURCES["customer_message"](state)
+    for keywords in _tables("atlas_entities."):
+        any(word in message.lower() for word in keywords)
+    # analyze_sentiment / detect_language: counts over the lowercased message
+    for prefix in ("sentiment.", "language."):
+        message_lower = TEXT_SOURCES["message"](state).lower()
+        for keywords in _tables(prefix):
+            sum(1 for word in keywords if word in message_lower)
+
+
+def shared(state: Dict[str, Any]):
+    """Current behaviour: one match_keywords pass, then table lookups per ability."""
+    state = dict(state, keyword_matches=match_text_sources(state))
+    for source in TEXT_SOURCES:
+        matches = keyword_matches(state, source)
+        for table in KEYWORD_TABLES:
+            if table.startswith(_SOURCE_PREFIXES[source]):
+                matches.count(table)
+
+
+def time_per_call(fn, runs: int, *args) -> float:
+    """Average microseconds per call."""
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn(*args)
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main():
+    """Compare both strategies for each description size and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200, help="Repetitions per measurement")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[300, 5000, 50000],
+                        help="Description sizes in characters")
+    args = parser.parse_args()
+
+    print(f"{'chars':>7} {'rescan us':>10} {'shared us':>10} {'speedup':>8}")
+    for size in args.sizes:
+        state = make_state(size)
+        before = time_per_call(rescan, args.runs, state)
+        after = time_per_call(shared, args.runs, state)
+        print(f"{size:>7} {before:>10.1f} {after:>10.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Knowledge base search: index build time and query latency vs corpus size.
+
+A synthetic corpus is generated by recombining the titles and solution steps
+of data/knowledge_base.jsonl, plus a body drawn from a Zipf-distributed
+filler vocabulary like natural text (seeded, so runs are comparable).
+Queries are the subject + description of typical tickets, the text
+`knowledge_base_search` searches with.
+
+Usage (from the langgraph-agent directory):
+    python -m benchmarks.knowledge_base [--sizes 1000 10000 50000] [--queries 200]
+"""
+
+import argparse
+import itertools
+import random
+import time
+from typing import Any, Dict, List
+
+from servers.atlas import DEFAULT_KNOWLEDGE_BASE_PATH
+from servers.knowledge_base import KnowledgeBase
+
+QUERIES = [
+    "API authentication failing - error 401 after upgrade, our integration is broken",
+    "I forgot my password and my account is locked after too many login attempts",
+    "We were charged twice this month, please refund the duplicate charge on the invoice",
+    "Webhooks stopped being delivered to our endpoint since yesterday",
+    "Feature request: custom fields on tickets and workflow automation",
+]
+
+
+def make_corpus(size: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """``size`` synthetic articles built from the shipped corpus."""
+    rng = random.Random(seed)
+    base = list(KnowledgeBase.from_file(DEFAULT_KNOWLEDGE_BASE_PATH).articles)
+    steps = [step for article in base for step in article["solution_steps"]]
+    filler = [f"term{index}" for index in range(50000)]
+    zipf = list(itertools.accumulate(1 / rank for rank in range(1, len(filler) + 1)))
+    corpus = []
+    for index in range(size):
+        template = rng.choice(base)
+        corpus.append({
+            "id": f"kb_{index:06d}",
+            "title": f"{template['title']} {' '.join(rng.sample(filler, 2))}",
+            "category": template["category"],
+            "solution_steps": rng.sample(steps, 3) + [" ".join(rng.choices(filler, cum_weights=zipf, k=30))],
+            "url": template["url"],
+        })
+    return corpus
+
+
+def main():
+    """Index corpora of each size and print build time and search latency."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Corpus sizes in articles")
+    parser.add_argument("--queries", type=int, default=200, help="Searches timed per size")
+    args = parser.parse_args()
+
+    print(f"{'articles':>9} {'build ms':>9} {'search us':>10} {'p99 us':>8}")
+    for size in args.sizes:
+        corpus = make_corpus(size)
+        start = time.perf_counter()
+        knowledge_base = KnowledgeBase(corpus)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        latencies = []
+        for index in range(args.queries):
+            start = time.perf_counter()
+            knowledge_base.search(QUERIES[index % len(QUERIES)], max_results=5,
+                                  relevance_threshold=0.75, category="technical_issue")
+            latencies.append((time.perf_counter() - start) * 1e6)
+        latencies.sort()
+        mean = sum(latencies) / len(latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{size:>9} {build_ms:>9.1f} {mean:>10.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
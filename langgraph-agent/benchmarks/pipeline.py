@@ -0,0 +1,264 @@
+"""
+Pipeline benchmark: the full 11-stage workflow, every ability, and MCPClient dispatch.
+
+Three groups of measurements, each reported as latency percentiles:
+
+- end to end: `LangGraphAgent.run()` on each `demo_input*.json` payload
+  (empty or invalid files are skipped), with throughput (sequential
+  runs per second) and the peak and retained memory of one run
+  (tracemalloc); duplicate workflow coalescing is off, as every run
+  repeats its payload
+- abilities: each ability declared under `servers:` in graph_config.yaml,
+  called directly with the state it saw during a recorded demo run
+  (abilities the demo does not reach get the final state)
+- dispatch: one cheap ability called directly, through
+  `MCPClient.invoke()` and through `MCPClient.call()`; the difference is
+  the client's per-call overhead (result cache off for this group)
+
+`--save-baseline` stores the results as JSON; `--baseline` compares against
+such a file and exits with status 1, listing every regression, when a p50
+or p95 latency grew (or throughput fell) by more than `--tolerance`.
+Baselines are machine specific: regenerate benchmarks/baseline.json on
+the machine that runs the comparison.
+
+Usage (from the langgraph-agent directory):
+    python -m benchmarks.pipeline [--runs 500] [--ability-runs 2000]
+                                  [--baseline benchmarks/baseline.json] [--save-baseline PATH]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+from agent import LangGraphAgent
+
+# Ability used to measure MCPClient dispatch overhead (cheap and side-effect free)
+DISPATCH_ABILITY = ("common", "normalize_fields")
+
+# Latencies below this many microseconds of growth never count as a regression
+NOISE_FLOOR_US = 2.0
+
+
+def percentiles(samples_ns: List[int]) -> Dict[str, float]:
+    """p50/p95/p99/max of nanosecond samples, in microseconds."""
+    ordered = sorted(samples_ns)
+    last = len(ordered) - 1
+
+    def at(q: float) -> float:
+        return ordered[round(q * last)] / 1000
+
+    return {"p50_us": at(0.5), "p95_us": at(0.95), "p99_us": at(0.99), "max_us": ordered[-1] / 1000}
+
+
+def time_calls(fn: Callable[[], Any], runs: int, warmup: int = 20) -> List[int]:
+    """Nanoseconds taken by each of ``runs`` calls of ``fn``."""
+    for _ in range(warmup):
+        fn()
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(runs):
+        start = clock()
+        fn()
+        samples.append(clock() - start)
+    return samples
+
+
+def load_inputs(pattern: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """The payload files matching ``pattern`` that hold a JSON object."""
+    inputs = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, "r") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+        if isinstance(payload, dict):
+            inputs.append((path, payload))
+    return inputs
+
+
+def bench_end_to_end(agent: LangGraphAgent, payload: Dict[str, Any], runs: int) -> Dict[str, float]:
+    """Latency percentiles, throughput and memory of full workflow runs."""
+    samples = time_calls(lambda: agent.run(payload), runs)
+    timed = sum(samples) / 1e9
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    agent.run(payload)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "runs": runs,
+        "throughput_per_s": runs / timed if timed else 0.0,
+        **percentiles(samples),
+        "peak_kib": (peak - before) / 1024,
+        "retained_kib": (current - before) / 1024,
+    }
+
+
+def record_contexts(agent: LangGraphAgent, payload: Dict[str, Any]) -> Tuple[Dict[Tuple[str, str], Mapping[str, Any]], Dict[str, Any]]:
+    """The state each ability was called with during one run, and the final state."""
+    contexts: Dict[Tuple[str, str], Mapping[str, Any]] = {}
+    invoke = agent.mcp_client.invoke
+
+    def recording_invoke(bound, context):
+        # The view follows the live state, so keep a snapshot of what it showed
+        contexts.setdefault((bound.server_name, bound.name), MappingProxyType(dict(context)))
+        return invoke(bound, context)
+
+    agent.mcp_client.invoke = recording_invoke
+    try:
+        final_state = agent.run(payload).state
+    finally:
+        agent.mcp_client.invoke = invoke
+    return contexts, final_state
+
+
+def bench_abilities(agent: LangGraphAgent, payload: Dict[str, Any], runs: int) -> Dict[str, Dict[str, float]]:
+    """Latency percentiles of every declared ability, called directly."""
+    contexts, final_state = record_contexts(agent, payload)
+    fallback = MappingProxyType(dict(final_state))
+    results = {}
+    for server_name, server_config in (agent.config.get("servers") or {}).items():
+        for ability in (server_config or {}).get("abilities", []):
+            bound = agent.mcp_client.resolve(server_name, ability)
+            context = contexts.get((server_name, ability), fallback)
+            results[f"{server_name}.{ability}"] = {
+                **percentiles(time_calls(lambda: bound.fn(context), runs)),
+                "recorded_input": (server_name, ability) in contexts,
+            }
+    return results
+
+
+def bench_dispatch(agent: LangGraphAgent, payload: Dict[str, Any], runs: int) -> Dict[str, float]:
+    """Per-call overhead of MCPClient.invoke() and MCPClient.call() over a direct call."""
+    client = agent.mcp_client
+    server_name, ability = DISPATCH_ABILITY
+    bound = client.resolve(server_name, ability)
+    context = MappingProxyType(dict(agent._start_run(payload).state))
+
+    result_cache, client.result_cache = client.result_cache, None
+    try:
+        direct = percentiles(time_calls(lambda: bound.fn(context), runs))["p50_us"]
+        invoke = percentiles(time_calls(lambda: client.invoke(bound, context), runs))["p50_us"]
+        call = percentiles(time_calls(lambda: client.call(server_name, ability, context), runs))["p50_us"]
+    finally:
+        client.result_cache = result_cache
+
+    return {
+        "ability": f"{server_name}.{ability}",
+        "direct_p50_us": direct,
+        "invoke_p50_us": invoke,
+        "call_p50_us": call,
+        "invoke_overhead_us": invoke - direct,
+        "call_overhead_us": call - direct,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline``, as readable lines."""
+    regressions = []
+
+    def check_latency(name: str, current: float, base: float):
+        if current > base * (1 + tolerance) + NOISE_FLOOR_US:
+            regressions.append(f"{name}: {current:.1f}us vs baseline {base:.1f}us")
+
+    for path, base in baseline.get("end_to_end", {}).items():
+        current = results["end_to_end"].get(path)
+        if current is None:
+            continue
+        for key in ("p50_us", "p95_us"):
+            check_latency(f"end_to_end[{path}].{key}", current[key], base[key])
+        if current["throughput_per_s"] < base["throughput_per_s"] / (1 + tolerance):
+            regressions.append(f"end_to_end[{path}].throughput_per_s: {current['throughput_per_s']:.0f}/s "
+                               f"vs baseline {base['throughput_per_s']:.0f}/s")
+    for name, base in baseline.get("abilities", {}).items():
+        current = results["abilities"].get(name)
+        if current is not None:
+            check_latency(f"abilities[{name}].p50_us", current["p50_us"], base["p50_us"])
+    base = baseline.get("dispatch")
+    if base:
+        check_latency("dispatch.call_p50_us", results["dispatch"]["call_p50_us"], base["call_p50_us"])
+        check_latency("dispatch.invoke_p50_us", results["dispatch"]["invoke_p50_us"], base["invoke_p50_us"])
+    return regressions
+
+
+def print_report(results: Dict[str, Any]):
+    """Print the results as tables."""
+    print(f"{'end to end':<34} {'runs/s':>8} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>9} "
+          f"{'peak KiB':>9} {'kept KiB':>9}")
+    for path, r in results["end_to_end"].items():
+        print(f"{path:<34} {r['throughput_per_s']:>8.0f} {r['p50_us']:>9.1f} {r['p95_us']:>9.1f} "
+              f"{r['p99_us']:>9.1f} {r['max_us']:>9.1f} {r['peak_kib']:>9.1f} {r['retained_kib']:>9.1f}")
+
+    print(f"\n{'ability':<40} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>9}")
+    for name, r in results["abilities"].items():
+        marker = "" if r["recorded_input"] else " *"
+        print(f"{name + marker:<40} {r['p50_us']:>9.1f} {r['p95_us']:>9.1f} {r['p99_us']:>9.1f} {r['max_us']:>9.1f}")
+    print("* not reached by the demo payload, called with the final state")
+
+    d = results["dispatch"]
+    print(f"\ndispatch ({d['ability']}, p50): direct {d['direct_p50_us']:.2f}us, "
+          f"invoke {d['invoke_p50_us']:.2f}us (+{d['invoke_overhead_us']:.2f}), "
+          f"call {d['call_p50_us']:.2f}us (+{d['call_overhead_us']:.2f})")
+
+
+def main():
+    """Run every group, print the report, and compare against or save a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--inputs", default="demo_input*.json", help="Glob of payloads to run end to end")
+    parser.add_argument("--config", default="graph_config.yaml", help="Workflow configuration")
+    parser.add_argument("--runs", type=int, default=500, help="Workflow runs per payload")
+    parser.add_argument("--ability-runs", type=int, default=2000, help="Calls per ability and dispatch path")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against (exit 1 on regression)")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown, as a fraction")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    inputs = load_inputs(args.inputs)
+    if not inputs:
+        parser.error(f"no payloads match {args.inputs}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = LangGraphAgent(args.config)
+        results = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "end_to_end": {path: bench_end_to_end(agent, payload, args.runs) for path, payload in inputs},
+            "abilities": bench_abilities(agent, inputs[0][1], args.ability_runs),
+            "dispatch": bench_dispatch(agent, inputs[0][1], args.ability_runs),
+        }
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nPERFORMANCE REGRESSION against {args.baseline} (tolerance {args.tolerance:.0%}):",
+                  file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Batch scheduling: SLA misses with FIFO vs earliest-deadline-first lanes.
+
+A seeded workload (see benchmarks/workload.py) is run through
+`run_batch()` once per policy, with the lanes and SLA targets of
+graph_config.yaml. Real response targets are minutes to days while a
+batch takes seconds, so every target is scaled to `--seconds-per-hour`
+(0.5: a 15-minute enterprise SLA becomes 125ms, a 72-hour one 36s);
+queueing then decides which tickets miss, as it would in a backlog.
+
+Usage (from the langgraph-agent directory):
+    python -m benchmarks.scheduling [--tickets 4000] [--seed 7] [--workers 4] [--seconds-per-hour 0.5]
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import time
+from typing import Any, Dict
+
+from agent import LangGraphAgent
+from benchmarks.workload import WorkloadGenerator
+from core.scheduler import POLICIES, DeadlineScheduler
+
+
+class ScaledScheduler(DeadlineScheduler):
+    """A scheduler whose SLA targets are multiplied by ``scale``."""
+
+    scale = 1.0
+
+    def sla_seconds(self, payload: Dict[str, Any]) -> float:
+        return super().sla_seconds(payload) * self.scale
+
+
+def run_policy(agent: LangGraphAgent, policy: str, tickets: list, workers: int, scale: float) -> Dict[str, Any]:
+    """Run ``tickets`` under ``policy`` and return the batch's SLA report, with its wall time."""
+    settings = agent.config.get('settings', {}).get('scheduling') or {}
+    agent.scheduler = ScaledScheduler.from_config(dict(settings, enabled=True, policy=policy))
+    agent.scheduler.scale = scale
+    start = time.perf_counter()
+    for _ in agent.run_batch(iter(tickets), workers=workers):
+        pass
+    report = agent.get_schedule_stats()
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def main():
+    """Run the workload under each policy and print SLA misses and queue waits per lane."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=4000, help="Tickets in the batch")
+    parser.add_argument("--seed", type=int, default=7, help="Workload seed")
+    parser.add_argument("--workers", type=int, default=4, help="Worker threads")
+    parser.add_argument("--seconds-per-hour", type=float, default=0.5,
+                        help="Scaled length of one hour of SLA")
+    parser.add_argument("--config", default="graph_config.yaml", help="Workflow configuration")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = LangGraphAgent(args.config)
+    logging.getLogger().setLevel(logging.WARNING)
+    tickets = list(WorkloadGenerator(seed=args.seed).tickets(args.tickets))
+    scale = args.seconds_per_hour / 3600
+
+    print(f"{args.tickets} tickets, {args.workers} workers, 1h of SLA = {args.seconds_per_hour}s\n")
+    print(f"{'policy':<6} {'lane':<10} {'tickets':>8} {'missed':>7} {'queueing':>9} {'wait p50':>10} {'wait p95':>10}")
+    for policy in POLICIES[::-1]:
+        report = run_policy(agent, policy, tickets, args.workers, scale)
+        for lane, stats in report['lanes'].items():
+            print(f"{policy:<6} {lane:<10} {stats['tickets']:>8} {stats['sla_missed']:>7} "
+                  f"{stats['missed_by_queueing']:>9} {stats['wait_p50'] * 1e3:>8.1f}ms {stats['wait_p95'] * 1e3:>8.1f}ms")
+        print(f"{policy:<6} {'total':<10} {report['tickets']:>8} {report['sla_missed']:>7} "
+              f"{report['missed_by_queueing']:>9}   ({report['seconds']:.2f}s)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Workflow state handling: a dict copy per ability call vs a read-only view.
+
+The demo payload is run through the agent once while recording, per stage,
+which abilities ran and what they returned. The recording is then replayed
+without the abilities themselves, so only the state handling is timed:
+
+- copy: the previous behaviour, `input_data.copy()` per stage and
+  `data.copy()` per ability call, then `update()` with the result
+- view: the current Node behaviour, `input_data.copy()` per stage and a
+  `MappingProxyType` view per ability call, same updates
+
+`--pad-fields` adds top-level fields to the initial state to show how each
+strategy scales with the size of the state.
+
+Usage (from the langgraph-agent directory):
+    python -m benchmarks.state_copy [--input demo_input.json] [--runs 2000] [--pad-fields 0 100 1000]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from types import MappingProxyType
+
+from agent import LangGraphAgent
+
+# (stage name, [(ability, declared reads, result)])
+Recording = List[Tuple[str, List[Tuple[str, List[str], Any]]]]
+
+
+def record_workflow(agent: LangGraphAgent, input_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Recording]:
+    """Run one workflow and record the ability results of every stage."""
+    recording: Recording = []
+    invoke = agent.mcp_client.invoke
+
+    def recording_invoke(bound, context):
+        result = invoke(bound, context)
+        stage = context["_execution_context"]["node_name"]
+        if not recording or recording[-1][0] != stage:
+            recording.append((stage, []))
+        reads = sorted(bound.dataflow.reads - {"*"})
+        recording[-1][1].append((bound.name, reads, result))
+        return result
+
+    agent.mcp_client.invoke = recording_invoke
+    try:
+        initial_state = agent._start_run(input_data).state
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.run(input_data)
+    finally:
+        agent.mcp_client.invoke = invoke
+
+    missing = set(agent.nodes) - {stage for stage, _ in recording}
+    if missing:
+        raise RuntimeError(f"Stages not recorded: {sorted(missing)}")
+    return initial_state, recording
+
+
+def replay_copy(initial_state: Dict[str, Any], recording: Recording) -> Dict[str, Any]:
+    """Previous behaviour: copy the state per stage and per ability call."""
+    state = initial_state
+    for stage, calls in recording:
+        result = state.copy()
+        context = {"node_name": stage}
+        for ability, reads, ability_result in calls:
+            ability_input = result.copy()
+            ability_input["_execution_context"] = context
+            for field in reads:
+                ability_input.get(field)
+            if isinstance(ability_result, dict):
+                result.update(ability_result)
+            else:
+                result[f"{ability}_result"] = ability_result
+        result["_node_metadata"] = {"node_name": stage}
+        state = result
+    return state
+
+
+def replay_view(initial_state: Dict[str, Any], recording: Recording) -> Dict[str, Any]:
+    """Current behaviour: copy the state per stage, a read-only view per ability call."""
+    state = initial_state
+    for stage, calls in recording:
+        result = state.copy()
+        result["_execution_context"] = {"node_name": stage}
+        for ability, reads, ability_result in calls:
+            ability_input = MappingProxyType(result)
+            for field in reads:
+                ability_input.get(field)
+            if isinstance(ability_result, dict):
+                result.update(ability_result)
+            else:
+                result[f"{ability}_result"] = ability_result
+        result.pop("_execution_context", None)
+        result["_node_metadata"] = {"node_name": stage}
+        state = result
+    return state
+
+
+def measure(replay: Callable[[Dict[str, Any], Recording], Dict[str, Any]],
+            initial_state: Dict[str, Any], recording: Recording, runs: int) -> Dict[str, float]:
+    """Time ``runs`` replays and measure the peak memory of one replay."""
+    replay(initial_state, recording)  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        replay(initial_state, recording)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    replay(initial_state, recording)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"us_per_workflow": elapsed / runs * 1e6, "peak_kib": peak / 1024}
+
+
+def main():
+    """Compare both strategies for each state size and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default="demo_input.json", help="Payload to record")
+    parser.add_argument("--runs", type=int, default=2000, help="Replays per measurement")
+    parser.add_argument("--pad-fields", type=int, nargs="+", default=[0, 100, 1000],
+                        help="Extra top-level fields added to the initial state")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    with open(args.input, "r") as f:
+        input_data = json.load(f)
+
+    agent = LangGraphAgent()
+    initial_state, recording = record_workflow(agent, input_data)
+    calls = sum(len(stage_calls) for _, stage_calls in recording)
+    print(f"Recorded {len(recording)} stages, {calls} ability calls from {args.input}")
+    print(f"{'pad':>6} {'fields':>7} {'copy us':>10} {'view us':>10} {'speedup':>8} {'copy KiB':>9} {'view KiB':>9}")
+
+    for pad in args.pad_fields:
+        state = dict(initial_state)
+        state.update({f"_pad_{i}": i for i in range(pad)})
+
+        # Both strategies must produce the same final state
+        if replay_copy(state, recording) != replay_view(state, recording):
+            raise AssertionError("view replay diverged from the copying replay")
+
+        copy = measure(replay_copy, state, recording, args.runs)
+        view = measure(replay_view, state, recording, args.runs)
+        print(f"{pad:>6} {len(state):>7} {copy['us_per_workflow']:>10.1f} {view['us_per_workflow']:>10.1f} "
+              f"{copy['us_per_workflow'] / view['us_per_workflow']:>7.1f}x "
+              f"{copy['peak_kib']:>9.1f} {view['peak_kib']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
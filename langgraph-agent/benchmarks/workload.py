@@ -0,0 +1,324 @@
+"""
+Synthetic ticket workload: seeded payloads shaped like demo_input.json, streamed as JSONL.
+
+Each line is one ticket with the sections the abilities read
+(`customer_id`, `contact_info`, `request`, `customer_context`,
+`system_context`, `business_impact`). What varies, and how, is set by a
+profile (defaults in `DEFAULT_PROFILE`):
+
+- categories, urgency, channels and customer tiers: weighted choices
+- description length (words): log-normal, capped
+- attachments per ticket: Poisson; attachment size (bytes): log-normal, capped
+- interaction-history depth: Poisson, capped
+
+Descriptions are built from phrases typical of each category (including
+the keywords the classifying abilities look for) mixed with filler text,
+so category and urgency detection see realistic input.
+
+The same seed and profile always produce byte-identical output: all
+randomness comes from one `random.Random(seed)` and timestamps are
+offsets from a fixed epoch, never the current time. Tickets are generated
+and written one at a time, so millions of them need no more memory than one.
+
+Usage (from the langgraph-agent directory):
+    python -m benchmarks.workload --count 1000000 --seed 7 --output tickets.jsonl [--profile profile.yaml]
+
+A profile file (YAML or JSON) overrides top-level keys of DEFAULT_PROFILE,
+e.g. `urgency: {low: 0.1, medium: 0.3, high: 0.3, critical: 0.3}`.
+"""
+
+import argparse
+import copy
+import json
+import math
+import random
+import sys
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+import yaml
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    # Weighted choices
+    'categories': {'technical_issue': 0.35, 'billing_inquiry': 0.25, 'account_access': 0.2,
+                   'feature_request': 0.1, 'general_inquiry': 0.1},
+    'urgency': {'low': 0.3, 'medium': 0.4, 'high': 0.2, 'critical': 0.1},
+    'channels': {'email': 0.5, 'web_form': 0.3, 'chat': 0.15, 'phone': 0.05},
+    'tiers': {'basic': 0.45, 'standard': 0.3, 'premium': 0.2, 'enterprise': 0.05},
+    # Log-normal in words: median and sigma of the underlying normal
+    'description_words': {'median': 60, 'sigma': 0.8, 'max': 5000},
+    # Poisson count per ticket, log-normal size in bytes
+    'attachments': {'mean_count': 0.8, 'max_count': 8, 'size_median_bytes': 20000,
+                    'size_sigma': 1.5, 'max_size_bytes': 50_000_000},
+    # Poisson depth of customer_context.previous_interactions
+    'history': {'mean_depth': 2.0, 'max_depth': 50},
+}
+
+# Profile sections that are replaced as a whole (weights), not merged (parameters)
+_WEIGHTED_SECTIONS = ('categories', 'urgency', 'channels', 'tiers')
+
+# Tier -> (account_type, subscription_tier, SLA response time, SLA resolution time)
+_TIER_DETAILS = {
+    'basic': ('standard', 'basic', '48_hours', '5_days'),
+    'standard': ('business', 'standard', '24_hours', '3_days'),
+    'premium': ('enterprise', 'premium', '1_hour', '8_hours'),
+    'enterprise': ('enterprise', 'enterprise', '15_minutes', '4_hours'),
+}
+
+# Subjects and description phrases per category
+_SUBJECTS = {
+    'technical_issue': ["API integration error", "Dashboard not working", "Webhook delivery failure",
+                        "Timeout on authentication endpoint", "Export job broken since update"],
+    'billing_inquiry': ["Duplicate charge on invoice", "Refund request", "Payment method declined",
+                        "Question about billing cycle", "Invoice shows wrong amount"],
+    'account_access': ["Cannot login to account", "Password reset not received", "Account locked",
+                       "Access denied for team member", "Two-factor login problem"],
+    'feature_request': ["Feature request: bulk export", "Enhancement for reporting", "Request: custom fields",
+                        "Feature request: webhook retry logic", "Add SSO support"],
+    'general_inquiry': ["Question about plans", "How do I configure notifications", "Data retention question",
+                        "Help with onboarding", "Where can I find the API docs"],
+}
+_PHRASES = {
+    'technical_issue': ["we are getting a 500 error", "the integration is broken", "the api returns a timeout",
+                        "this is not working since the last release", "we see a bug in the export",
+                        "requests fail with error code AUTH_TIMEOUT_5001"],
+    'billing_inquiry': ["we were charged twice", "the invoice is wrong", "please refund the payment",
+                        "our billing contact changed", "the charge does not match our plan"],
+    'account_access': ["i cannot login", "the password reset email never arrives", "my account is locked",
+                       "access was removed for our admin", "reset link expired"],
+    'feature_request': ["it would be great to have this feature", "we would love an enhancement",
+                        "please add support for", "this improvement would help our team", "as a feature request"],
+    'general_inquiry': ["could you help us understand", "we have a question about", "i need some assistance with",
+                        "where can we find information on", "please advise on"],
+}
+_URGENCY_PHRASES = {
+    'low': [],
+    'medium': [],
+    'high': ["this is blocking our team", "please look at this soon"],
+    'critical': ["this is urgent", "production is down", "we need help immediately", "critical emergency"],
+}
+_FILLER = ("the our we this that it with for on in after before since customers users team account "
+           "service system dashboard report data today yesterday morning release version update settings "
+           "please thanks again also still now every some many request page screen workflow").split()
+_ATTACHMENT_TYPES = [("log", "txt", "text/plain"), ("screenshot", "png", "image/png"),
+                     ("trace", "pcap", "application/octet-stream"), ("export", "csv", "text/csv"),
+                     ("invoice", "pdf", "application/pdf")]
+_INTERACTION_TYPES = ["technical_support", "billing_inquiry", "account_access", "feature_request", "onboarding"]
+_SEVERITY = {'low': 'low', 'medium': 'medium', 'high': 'high', 'critical': 'high'}
+
+# Words of filler text drawn once per generator; descriptions take a slice of it
+_FILLER_POOL_WORDS = 1 << 16
+
+# Fixed epoch: generated timestamps never depend on when the generator runs
+_EPOCH = datetime(2024, 1, 1)
+
+
+class _Weighted:
+    """Weighted choice with precomputed cumulative weights."""
+
+    def __init__(self, name: str, weights: Dict[str, float]):
+        if not weights or any(weight < 0 for weight in weights.values()) or sum(weights.values()) <= 0:
+            raise ValueError(f"{name}: weights must be non-negative with a positive sum")
+        self.values = list(weights)
+        self.cum_weights = list(accumulate(weights.values()))
+
+    def pick(self, rng: random.Random) -> str:
+        return rng.choices(self.values, cum_weights=self.cum_weights)[0]
+
+
+def load_profile(path: Optional[str]) -> Dict[str, Any]:
+    """DEFAULT_PROFILE with the top-level keys of a YAML/JSON profile file replaced."""
+    profile = copy.deepcopy(DEFAULT_PROFILE)
+    if path:
+        with open(path, "r") as f:
+            overrides = yaml.safe_load(f) or {}
+        unknown = set(overrides) - set(DEFAULT_PROFILE)
+        if unknown:
+            raise ValueError(f"unknown profile keys: {', '.join(sorted(unknown))}")
+        for key, value in overrides.items():
+            if key in _WEIGHTED_SECTIONS:
+                profile[key] = value
+            else:
+                profile[key].update(value)
+    return profile
+
+
+class WorkloadGenerator:
+    """Deterministic stream of synthetic tickets for a seed and a profile."""
+
+    def __init__(self, seed: int = 0, profile: Optional[Dict[str, Any]] = None):
+        profile = profile or DEFAULT_PROFILE
+        unknown = set(profile['categories']) - set(_SUBJECTS)
+        if unknown:
+            raise ValueError(f"categories: unknown {', '.join(sorted(unknown))} (known: {', '.join(_SUBJECTS)})")
+        for key, known in (('urgency', _URGENCY_PHRASES), ('tiers', _TIER_DETAILS)):
+            unknown = set(profile[key]) - set(known)
+            if unknown:
+                raise ValueError(f"{key}: unknown {', '.join(sorted(unknown))} (known: {', '.join(known)})")
+
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.categories = _Weighted('categories', profile['categories'])
+        self.urgency = _Weighted('urgency', profile['urgency'])
+        self.channels = _Weighted('channels', profile['channels'])
+        self.tiers = _Weighted('tiers', profile['tiers'])
+        self.words = profile['description_words']
+        self.attachments = profile['attachments']
+        self.history = profile['history']
+        if not 1 <= self.words['max'] <= _FILLER_POOL_WORDS:
+            raise ValueError(f"description_words.max must be between 1 and {_FILLER_POOL_WORDS}")
+
+        # One draw per filler word would dominate generation time: draw a pool once
+        # (from the same seeded stream) and cut each description's filler out of it
+        pool = self.rng.choices(_FILLER, k=_FILLER_POOL_WORDS)
+        self._filler_text = " ".join(pool)
+        self._filler_offsets = list(accumulate((len(word) + 1 for word in pool), initial=0))
+
+    def tickets(self, count: int) -> Iterator[Dict[str, Any]]:
+        """Yield ``count`` tickets, numbered from 1."""
+        for number in range(1, count + 1):
+            yield self.ticket(number)
+
+    def ticket(self, number: int) -> Dict[str, Any]:
+        """The next ticket (its ids are derived from ``number``)."""
+        rng = self.rng
+        category = self.categories.pick(rng)
+        urgency = self.urgency.pick(rng)
+        tier = self.tiers.pick(rng)
+        account_type, subscription_tier, sla_response, sla_resolution = _TIER_DETAILS[tier]
+        created = _EPOCH + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        customer_number = rng.randrange(100000, 1000000)
+
+        customer_context: Dict[str, Any] = {
+            'account_type': account_type,
+            'subscription_tier': subscription_tier,
+            'previous_interactions': self._history(created),
+        }
+        if tier in ('premium', 'enterprise'):
+            customer_context['contract_details'] = {
+                'contract_id': f"PS-{created.year}-{customer_number % 1000:03d}",
+                'sla_response_time': sla_response,
+                'sla_resolution_time': sla_resolution,
+            }
+
+        return {
+            'customer_id': f"CUST-{customer_number}",
+            'case_id': f"CASE-{number:09d}",
+            'contact_info': {
+                'email': f"user{customer_number}@example.com",
+                'preferred_contact': 'email',
+                'timezone': rng.choice(("America/New_York", "Europe/London", "Asia/Tokyo", "UTC")),
+            },
+            'request': {
+                'subject': rng.choice(_SUBJECTS[category]),
+                'description': self._description(category, urgency),
+                'category': category,
+                'urgency': urgency,
+                'channel': self.channels.pick(rng),
+                'attachments': self._attachments(),
+            },
+            'customer_context': customer_context,
+            'system_context': {
+                'timestamp': created.isoformat() + "Z",
+                'source_system': 'customer_portal',
+                'session_id': f"sess_{rng.getrandbits(48):012x}",
+            },
+            'business_impact': {
+                'severity': _SEVERITY[urgency],
+                'affected_users': int(rng.lognormvariate(math.log(50), 2)) if urgency != 'low' else 0,
+            },
+        }
+
+    def _description(self, category: str, urgency: str) -> str:
+        """Category and urgency phrases padded with filler to a log-normal word count."""
+        rng = self.rng
+        target = min(self.words['max'], max(5, int(rng.lognormvariate(math.log(self.words['median']),
+                                                                      self.words['sigma']))))
+        parts: List[str] = [rng.choice(_PHRASES[category])]
+        if _URGENCY_PHRASES[urgency]:
+            parts.append(rng.choice(_URGENCY_PHRASES[urgency]))
+        words = sum(len(part.split()) for part in parts)
+        if target > words:
+            start = rng.randrange(_FILLER_POOL_WORDS - (target - words) + 1)
+            end = start + target - words
+            parts.append(self._filler_text[self._filler_offsets[start]:self._filler_offsets[end] - 1])
+        text = ". ".join(parts)
+        return text[:1].upper() + text[1:] + "."
+
+    def _attachments(self) -> List[Dict[str, Any]]:
+        rng = self.rng
+        config = self.attachments
+        count = min(config['max_count'], _poisson(rng, config['mean_count']))
+        attachments = []
+        for index in range(count):
+            stem, extension, mime = rng.choice(_ATTACHMENT_TYPES)
+            size = int(rng.lognormvariate(math.log(config['size_median_bytes']), config['size_sigma']))
+            attachments.append({
+                'name': f"{stem}_{index + 1}.{extension}",
+                'type': mime,
+                'size': max(1, min(config['max_size_bytes'], size)),
+            })
+        return attachments
+
+    def _history(self, created: datetime) -> List[Dict[str, Any]]:
+        rng = self.rng
+        depth = min(self.history['max_depth'], _poisson(rng, self.history['mean_depth']))
+        history = []
+        for _ in range(depth):
+            date = created - timedelta(days=rng.randrange(1, 730))
+            history.append({
+                'date': date.date().isoformat(),
+                'type': rng.choice(_INTERACTION_TYPES),
+                'status': 'resolved' if rng.random() < 0.9 else 'open',
+                'satisfaction_score': round(rng.uniform(1, 5) * 2) / 2,
+            })
+        return history
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """Poisson sample (Knuth's method; the means used here are small)."""
+    if mean <= 0:
+        return 0
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def write_jsonl(tickets: Iterator[Dict[str, Any]], out: TextIO) -> int:
+    """Write one compact JSON object per line; returns the number written."""
+    written = 0
+    for ticket in tickets:
+        out.write(json.dumps(ticket, separators=(',', ':')))
+        out.write("\n")
+        written += 1
+    return written
+
+
+def main():
+    """Generate tickets to a JSONL file or stdout."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000, help="Number of tickets")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same output)")
+    parser.add_argument("--profile", help="YAML/JSON file overriding DEFAULT_PROFILE keys")
+    parser.add_argument("--output", default="-", help="JSONL file to write, '-' for stdout")
+    args = parser.parse_args()
+
+    try:
+        generator = WorkloadGenerator(args.seed, load_profile(args.profile))
+    except ValueError as e:
+        parser.error(str(e))
+
+    tickets = generator.tickets(args.count)
+    if args.output == "-":
+        write_jsonl(tickets, sys.stdout)
+        return
+    with open(args.output, "w", buffering=1 << 20) as f:
+        written = write_jsonl(tickets, f)
+    print(f"Wrote {written} tickets to {args.output} (seed {args.seed})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Durable per-stage workflow checkpoints (**CheckpointStore**), in SQLite.
+
+    settings:
+      checkpoints:
+        enabled: true
+        path: "checkpoints.sqlite3"   # relative to graph_config.yaml
+        keep_completed: false         # drop a run's checkpoints once it completes
+
+With checkpoints enabled, the agent records every run as it goes:
+- the initial state, when the run starts
+- after each completed stage, a **delta**: only the top-level state fields
+  the stage set or removed, plus its `stage_results` entry. Nodes copy the
+  state and abilities return their changes instead of mutating it, so a
+  field still holding the same object as at the previous checkpoint is
+  unchanged; a delta costs what the stage changed, not the whole state
+- the run's status, next stage and (when it failed) failed stage and error
+
+A failure is not a delta: `load()` replays the deltas into the state as it
+was after the last completed stage, and `LangGraphAgent.resume(workflow_id)`
+carries on from the stage that failed (or was running when the process
+died) instead of repeating Atlas calls and enrichment.
+
+A run that reaches a stage with `wait_for` before the customer replied is
+**parked** (`park()`): its deltas are compacted into its full state, kept
+with a row per completed stage, and it waits in status `waiting` without
+holding a worker until `resume(workflow_id, event)` delivers the reply.
+
+The database runs in WAL mode with `synchronous=NORMAL`: each checkpoint
+is one small transaction that survives a process crash without an fsync
+(`synchronous: FULL` also survives power loss). Every thread (and forked
+process) gets its own connection, and concurrent writers wait on each
+other for up to `busy_timeout_seconds`.
+
+How to extend:
+- Retention: `delete()` workflows found with `list_workflows()`
+  (`list_workflows([WAITING])` for parked conversations)
+- More per-run columns: add them to `_SCHEMA` and bump `_SCHEMA_VERSION`
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    workflow_id  TEXT PRIMARY KEY,
+    status       TEXT NOT NULL,
+    next_stage   INTEGER NOT NULL,
+    failed_stage TEXT,
+    error        TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    waiting_for  TEXT
+);
+CREATE TABLE IF NOT EXISTS deltas (
+    workflow_id  TEXT NOT NULL,
+    seq          INTEGER NOT NULL,
+    stage        TEXT,
+    node_status  TEXT,
+    changes      TEXT NOT NULL,
+    removed      TEXT,
+    stage_result TEXT,
+    PRIMARY KEY (workflow_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS workflows_status ON workflows (status, updated_at);
+"""
+
+# Schema changes from each earlier version
+_MIGRATIONS = {
+    1: "ALTER TABLE workflows ADD COLUMN waiting_for TEXT",
+}
+
+SYNCHRONOUS_MODES = ("NORMAL", "FULL")
+
+# Statuses of runs that stopped before completing and can be resumed as they are
+RESUMABLE_STATUSES = ("running", "failed", "timed_out")
+
+# Status of a parked run, resumed by the event it waits for
+WAITING = "waiting"
+
+_MISSING = object()
+
+
+# One encoder for every write: json.dumps() builds a new one per call when given options
+_dumps = json.JSONEncoder(default=str, separators=(',', ':')).encode
+
+
+def state_delta(previous: Dict[str, Any], state: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Top-level fields of ``state`` set since ``previous`` (a shallow copy), and the fields removed.
+
+    Fields are compared by identity: stages replace values, they do not
+    mutate them (the agent's own `stage_results` is checkpointed separately).
+    """
+    changes = {key: value for key, value in state.items()
+               if previous.get(key, _MISSING) is not value and key != 'stage_results'}
+    removed = [key for key in previous if key not in state]
+    return changes, removed
+
+
+class Checkpoint:
+    """A workflow rebuilt from its checkpoints."""
+
+    def __init__(self,
+                 workflow_id: str,
+                 state: Dict[str, Any],
+                 status: str,
+                 next_stage: int,
+                 stage_statuses: Dict[str, str],
+                 seq: int,
+                 failed_stage: Optional[str] = None,
+                 error: Optional[str] = None,
+                 waiting_for: Optional[str] = None):
+        self.workflow_id = workflow_id
+        # State after the last checkpointed stage (the final state once completed)
+        self.state = state
+        self.status = status
+        # Plan index of the first stage that has not completed
+        self.next_stage = next_stage
+        self.stage_statuses = stage_statuses
+        # Sequence number of the last delta
+        self.seq = seq
+        self.failed_stage = failed_stage
+        self.error = error
+        # State field a parked run waits for
+        self.waiting_for = waiting_for
+
+    @property
+    def resumable(self) -> bool:
+        """Whether the workflow stopped before completing (failed, interrupted or parked)."""
+        return self.status in RESUMABLE_STATUSES or self.status == WAITING
+
+    def __repr__(self) -> str:
+        return f"Checkpoint(workflow_id='{self.workflow_id}', status={self.status}, next_stage={self.next_stage})"
+
+
+class CheckpointStore:
+    """SQLite (WAL) store of workflow states as per-stage deltas."""
+
+    def __init__(self,
+                 path: str,
+                 keep_completed: bool = False,
+                 synchronous: str = "NORMAL",
+                 busy_timeout: float = 5.0):
+        """
+        Create a store; the database is opened on first use.
+
+        Raises:
+            ValueError: ``synchronous`` is not NORMAL or FULL, or ``busy_timeout`` is negative
+        """
+        synchronous = str(synchronous).upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_MODES)}, got {synchronous!r}")
+        if isinstance(busy_timeout, bool) or not isinstance(busy_timeout, (int, float)) or busy_timeout < 0:
+            raise ValueError(f"busy_timeout_seconds must be a non-negative number, got {busy_timeout!r}")
+        self.path = path
+        self.keep_completed = keep_completed
+        self.synchronous = synchronous
+        self.busy_timeout = float(busy_timeout)
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, checkpoint_config: Optional[Dict[str, Any]],
+                    base_dir: str = ".") -> Optional["CheckpointStore"]:
+        """
+        Build the store from `settings.checkpoints`; None when disabled.
+
+        Raises:
+            ValueError: invalid settings
+        """
+        if not checkpoint_config or not checkpoint_config.get('enabled', False):
+            return None
+        path = checkpoint_config.get('path', 'checkpoints.sqlite3')
+        if not isinstance(path, str) or not path:
+            raise ValueError(f"path must be a file name, got {path!r}")
+        return cls(os.path.join(base_dir, path),
+                   keep_completed=bool(checkpoint_config.get('keep_completed', False)),
+                   synchronous=checkpoint_config.get('synchronous', 'NORMAL'),
+                   busy_timeout=checkpoint_config.get('busy_timeout_seconds', 5.0))
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (a forked child opens its own)."""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Default isolation: a transaction opens at the first write and `with` commits it
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={self.synchronous}")
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != _SCHEMA_VERSION:
+                with connection:
+                    connection.executescript(_SCHEMA)
+                    # A new database gets the current schema, an older one its migrations
+                    for older in range(version, _SCHEMA_VERSION) if version else ():
+                        connection.execute(_MIGRATIONS[older])
+                    connection.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def start(self, workflow_id: str, state: Dict[str, Any]):
+        """Record a new run with its initial state (delta 0)."""
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute("INSERT INTO workflows (workflow_id, status, next_stage, created_at, updated_at) "
+                               "VALUES (?, 'running', 0, ?, ?)", (workflow_id, now, now))
+            connection.execute("INSERT INTO deltas VALUES (?, 0, NULL, NULL, ?, NULL, NULL)",
+                               (workflow_id, _dumps(state)))
+
+    def save_stage(self,
+                   workflow_id: str,
+                   seq: int,
+                   stage_name: str,
+                   node_status: str,
+                   next_stage: int,
+                   changes: Dict[str, Any],
+                   removed: List[str],
+                   stage_result: Dict[str, Any]):
+        """Record a completed stage: its delta and the next stage to run, in one transaction."""
+        connection = self._connection()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO deltas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (workflow_id, seq, stage_name, node_status, _dumps(changes),
+                                _dumps(removed) if removed else None, _dumps(stage_result)))
+            connection.execute("UPDATE workflows SET status = 'running', next_stage = ?, updated_at = ? "
+                               "WHERE workflow_id = ?", (next_stage, time.time(), workflow_id))
+
+    def mark_resumed(self, workflow_id: str, status: str, seq: int,
+                     changes: Dict[str, Any], removed: List[str]) -> bool:
+        """
+        Record that a run in ``status`` was resumed, with what resuming changed (the delivered event).
+
+        Returns:
+            False, recording nothing, when the run is no longer in ``status``
+            (another caller resumed it first)
+        """
+        connection = self._connection()
+        with connection:
+            claimed = connection.execute(
+                "UPDATE workflows SET status = 'running', failed_stage = NULL, error = NULL, waiting_for = NULL, "
+                "updated_at = ? WHERE workflow_id = ? AND status = ?", (time.time(), workflow_id, status)).rowcount
+            if claimed:
+                connection.execute("INSERT OR REPLACE INTO deltas VALUES (?, ?, NULL, NULL, ?, ?, NULL)",
+                                   (workflow_id, seq, _dumps(changes), _dumps(removed) if removed else None))
+        return bool(claimed)
+
+    def park(self, workflow_id: str, next_stage: int, waiting_for: str, state: Dict[str, Any]):
+        """
+        Park a run until ``waiting_for`` is delivered, as one compact continuation.
+
+        The deltas are folded into delta 0 (the state at this point); the
+        rows of the completed stages keep only their status and result.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute("UPDATE deltas SET changes = ?, removed = NULL WHERE workflow_id = ? AND seq = 0",
+                               (_dumps(state), workflow_id))
+            connection.execute("DELETE FROM deltas WHERE workflow_id = ? AND seq > 0 AND stage IS NULL",
+                               (workflow_id,))
+            connection.execute("UPDATE deltas SET changes = '{}', removed = NULL WHERE workflow_id = ? AND seq > 0",
+                               (workflow_id,))
+            connection.execute("UPDATE workflows SET status = ?, next_stage = ?, waiting_for = ?, updated_at = ? "
+                               "WHERE workflow_id = ?", (WAITING, next_stage, waiting_for, time.time(), workflow_id))
+
+    def mark_failed(self, workflow_id: str, status: str, failed_stage: str, error: str):
+        """Record that a run stopped at ``failed_stage``; its deltas stay resumable."""
+        connection = self._connection()
+        with connection:
+            connection.execute("UPDATE workflows SET status = ?, failed_stage = ?, error = ?, updated_at = ? "
+                               "WHERE workflow_id = ?", (status, failed_stage, error, time.time(), workflow_id))
+
+    def complete(self, workflow_id: str, seq: int, changes: Dict[str, Any], removed: List[str]):
+        """Record a completed run (its final fields as the last delta), or drop it unless keep_completed."""
+        if not self.keep_completed:
+            self.delete(workflow_id)
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO deltas VALUES (?, ?, NULL, NULL, ?, ?, NULL)",
+                               (workflow_id, seq, _dumps(changes), _dumps(removed) if removed else None))
+            connection.execute("UPDATE workflows SET status = 'completed', failed_stage = NULL, error = NULL, "
+                               "updated_at = ? WHERE workflow_id = ?", (time.time(), workflow_id))
+
+    def load(self, workflow_id: str) -> Checkpoint:
+        """
+        Rebuild a workflow from its deltas.
+
+        Raises:
+            LookupError: no checkpoints for ``workflow_id``
+        """
+        connection = self._connection()
+        row = connection.execute("SELECT status, next_stage, failed_stage, error, waiting_for FROM workflows "
+                                 "WHERE workflow_id = ?", (workflow_id,)).fetchone()
+        if row is None:
+            raise LookupError(f"no checkpoints for workflow '{workflow_id}'")
+        status, next_stage, failed_stage, error, waiting_for = row
+
+        state: Dict[str, Any] = {}
+        stage_statuses: Dict[str, str] = {}
+        seq = -1
+        for seq, stage, node_status, changes, removed, stage_result in connection.execute(
+                "SELECT seq, stage, node_status, changes, removed, stage_result FROM deltas "
+                "WHERE workflow_id = ? ORDER BY seq", (workflow_id,)):
+            state.update(json.loads(changes))
+            for key in json.loads(removed) if removed else ():
+                state.pop(key, None)
+            if stage is not None:
+                state['stage_results'][stage] = json.loads(stage_result)
+                stage_statuses[stage] = node_status
+        return Checkpoint(workflow_id, state, status, next_stage, stage_statuses, seq,
+                          failed_stage, error, waiting_for)
+
+    def delete(self, workflow_id: str):
+        """Drop every checkpoint of a workflow."""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM deltas WHERE workflow_id = ?", (workflow_id,))
+            connection.execute("DELETE FROM workflows WHERE workflow_id = ?", (workflow_id,))
+
+    def list_workflows(self, statuses: Iterable[str] = RESUMABLE_STATUSES,
+                       limit: int = 100) -> List[Dict[str, Any]]:
+        """Workflows in the given statuses, least recently updated first."""
+        statuses = list(statuses)
+        placeholders = ", ".join("?" * len(statuses))
+        rows = self._connection().execute(
+            f"SELECT workflow_id, status, next_stage, failed_stage, error, waiting_for, created_at, updated_at "
+            f"FROM workflows WHERE status IN ({placeholders}) ORDER BY updated_at LIMIT ?",
+            (*statuses, limit))
+        columns = ('workflow_id', 'status', 'next_stage', 'failed_stage', 'error', 'waiting_for',
+                   'created_at', 'updated_at')
+        return [dict(zip(columns, row)) for row in rows]
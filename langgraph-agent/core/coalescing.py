@@ -0,0 +1,357 @@
+"""
+Single-flight request coalescing (**SingleFlight**) for abilities and whole workflows.
+
+    settings:
+      coalescing:
+        enabled: true
+        abilities: [enrich_records, get_account_details, fetch_interaction_history]
+        duplicate_workflows:
+          enabled: false
+          window_seconds: 0
+
+Abilities: MCPClient runs an identical call (same server, ability and
+declared read fields, the result cache's key) that arrives
+while the first one is still in flight as a **follower**: it waits for
+the first call (the **leader**) instead of making its own round trip, and
+gets a deep copy of its result with `_metadata.coalesced`. A burst of
+workflows looking up the same customer during an incident costs one Atlas
+call per customer, and followers take no bulkhead slot. Only abilities
+listed here are coalesced: they must declare their reads, and their
+result must depend on nothing else.
+
+Duplicate workflows (off by default): in `run_batch()`, and in `run()`
+and `arun()` only when called with ``attach_duplicates=True``, a ticket
+from the same customer (customer_id, else email) with the same normalised
+query (the `query`, else request subject and description; case,
+punctuation and whitespace ignored), urgency and attachments as one whose
+workflow is still running attaches to that workflow instead of running:
+it waits for it and returns its outcome (`RunContext.attached`, same
+workflow id, a deep copy of its final state). A ticket with another
+urgency or other attachments is a follow-up and runs on its own. With a
+`window_seconds`, finished workflows also answer duplicates until that
+long after they started, at most `max_recent_workflows` of them; those
+that did not complete only answer the duplicates that were already
+waiting, a later resubmission runs again.
+
+Threads coalesce with threads, and coroutines with coroutines on the same
+event loop; each worker process of a process pool coalesces on its own.
+A leader that raises passes the exception to its followers; an async
+leader that is cancelled (its deadline) hands the call to a follower.
+
+How to extend:
+- Other workflow identities: change `workflow_key()`
+- New coalesced abilities: list them under `settings.coalescing.abilities`
+  (checked like `settings.result_cache`: declared, with declared reads)
+- Coalescing elsewhere: `SingleFlight.do(name, key, fn, *args)` for any
+  call whose result can be shared
+"""
+
+import asyncio
+import copy
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Iterable, Mapping, Optional, Tuple
+
+from core.dataflow import ANY_FIELD
+from core.result_cache import AbilityResultCache
+from core.run_context import RunContext
+
+# (server, ability, read values or their fingerprint)
+FlightKey = Tuple[str, str, Hashable]
+
+# Finished workflows answer no duplicates: only running ones do
+DEFAULT_WINDOW_SECONDS = 0.0
+DEFAULT_MAX_RECENT_WORKFLOWS = 1024
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+# ASCII punctuation and control characters (what _NON_WORD matches in ASCII text)
+_ASCII_NON_WORD = {code: " " for code in range(128) if not chr(code).isalnum()}
+
+
+def normalize_query(text: str) -> str:
+    """Query text with Unicode forms, case, punctuation and whitespace normalised."""
+    if text.isascii():
+        # Same result, without the regex: most tickets are ASCII
+        return " ".join(text.lower().translate(_ASCII_NON_WORD).split())
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def workflow_key(payload: Dict[str, Any]) -> Optional[str]:
+    """
+    Identity of a ticket for duplicate detection; None if it has no customer or query.
+
+    Customer, normalised query, urgency and attachments: a resubmission
+    through another channel is a duplicate, an escalation or a ticket
+    adding files is not.
+    """
+    customer = payload.get('customer') if isinstance(payload.get('customer'), dict) else {}
+    contact = payload.get('contact_info') if isinstance(payload.get('contact_info'), dict) else {}
+    request = payload.get('request') if isinstance(payload.get('request'), dict) else {}
+    who = payload.get('customer_id') or customer.get('id') or customer.get('email') or contact.get('email')
+    query = payload.get('query')
+    if not isinstance(query, str) or not query.strip():
+        query = f"{request.get('subject') or ''} {request.get('description') or ''}"
+    query = normalize_query(query)
+    if not who or not query:
+        return None
+    urgency = str(request.get('urgency') or '').strip().casefold()
+    attachments = request.get('attachments') if isinstance(request.get('attachments'), list) else []
+    files = sorted(f"{item.get('name')}:{item.get('size')}" if isinstance(item, dict) else str(item)
+                   for item in attachments)
+    encoded = "\x00".join([str(who).strip().casefold(), query, urgency, *files]).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class _Flight:
+    """One execution shared by its leader and followers."""
+
+    __slots__ = ("name", "done", "result", "error", "followers", "started", "finished", "future")
+
+    def __init__(self, name: str, started: float):
+        self.name = name
+        # Created when a thread starts waiting: most calls have no follower
+        self.done: Optional[threading.Event] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.started = started
+        self.finished = False
+        # Async flights: resolved on the leader's event loop
+        self.future: Optional[asyncio.Future] = None
+
+
+class SingleFlight:
+    """Identical calls made while one is running (or, with ``linger``, since it started) share its execution."""
+
+    def __init__(self,
+                 copy_result: Callable[[Any], Any] = copy.deepcopy,
+                 snapshot: bool = True,
+                 linger: float = 0.0,
+                 max_lingering: int = DEFAULT_MAX_RECENT_WORKFLOWS):
+        """
+        Args:
+            copy_result: Makes a follower's result from the leader's
+            snapshot: Copy the leader's result before waking followers (when
+                there are any), for callers that change their result
+            linger: Seconds after its start that a finished call still
+                answers identical calls (0: only while it runs)
+            max_lingering: Finished calls remembered at most (oldest dropped first)
+        """
+        self.copy_result = copy_result
+        self.snapshot = snapshot
+        self.linger = linger
+        self.max_lingering = max_lingering
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._finished: "OrderedDict[Hashable, _Flight]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def do(self, name: str, key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)``, or share the result of the identical call ``key`` already made."""
+        flight, leader = self._join(name, key)
+        if not leader:
+            if flight.done is not None:
+                flight.done.wait()
+            return self._follow(flight)
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._land(key, flight, error=e)
+            raise
+        self._land(key, flight, result=result)
+        return result
+
+    async def ado(self, name: str, key: Hashable, afn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Async counterpart of `do()`; coalesces with calls made on the same event loop."""
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        while True:
+            flight, leader = self._join(name, key, loop)
+            if leader:
+                break
+            if not flight.future.done():
+                try:
+                    await asyncio.shield(flight.future)
+                except asyncio.CancelledError:
+                    if not flight.future.cancelled():
+                        raise
+                    # The leader was cancelled: the next caller leads
+                    continue
+                except BaseException:
+                    pass
+            return self._follow(flight)
+        try:
+            result = await afn(*args)
+        except asyncio.CancelledError:
+            self._abandon(key, flight)
+            raise
+        except BaseException as e:
+            self._land(key, flight, error=e)
+            raise
+        self._land(key, flight, result=result)
+        return result
+
+    def _join(self, name: str, key: Hashable, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """The flight for ``key`` and whether the caller leads it (starts a new one)."""
+        now = time.monotonic() if self.linger > 0 else 0.0
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None and self.linger > 0:
+                flight = self._finished.get(key)
+                if flight is not None and now - flight.started > self.linger:
+                    del self._finished[key]
+                    flight = None
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {'executions': 0, 'coalesced': 0}
+            if flight is not None:
+                flight.followers += 1
+                stats['coalesced'] += 1
+                if not flight.finished and flight.future is None and flight.done is None:
+                    flight.done = threading.Event()
+                return flight, False
+            flight = self._flights[key] = _Flight(name, now)
+            if loop is not None:
+                flight.future = loop.create_future()
+            stats['executions'] += 1
+            return flight, True
+
+    def _land(self, key: Hashable, flight: _Flight, result: Any = None, error: Optional[BaseException] = None):
+        """Publish the leader's outcome and wake the followers."""
+        with self._lock:
+            # Followers copy from a snapshot: the leader's caller may change its result
+            snapshot = self.snapshot and flight.followers and error is None
+            flight.result = self.copy_result(result) if snapshot else result
+            flight.error = error
+            flight.finished = True
+            del self._flights[key]
+            if self.linger > 0 and error is None and self._lingers(result):
+                self._finished[key] = flight
+                self._expire(time.monotonic())
+            if flight.done is not None:
+                flight.done.set()
+        if flight.future is not None and not flight.future.done():
+            flight.future.set_result(None)
+
+    def _lingers(self, result: Any) -> bool:
+        """Whether a finished call's result may answer identical calls for the rest of ``linger``."""
+        return True
+
+    def _abandon(self, key: Hashable, flight: _Flight):
+        """Drop a cancelled leader's flight; its followers retry."""
+        with self._lock:
+            del self._flights[key]
+        flight.future.cancel()
+
+    def _follow(self, flight: _Flight) -> Any:
+        if flight.error is not None:
+            raise flight.error
+        return self.copy_result(flight.result)
+
+    def _expire(self, now: float):
+        """Forget lingering calls past their window, and the oldest beyond max_lingering (lock held)."""
+        finished = self._finished
+        while finished:
+            key, oldest = next(iter(finished.items()))
+            if len(finished) <= self.max_lingering and now - oldest.started <= self.linger:
+                break
+            del finished[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Executions and coalesced calls, in total and per name."""
+        with self._lock:
+            per_name = {name: dict(stats) for name, stats in self._stats.items()}
+            in_flight = len(self._flights)
+        executions = sum(stats['executions'] for stats in per_name.values())
+        coalesced = sum(stats['coalesced'] for stats in per_name.values())
+        return {
+            'executions': executions,
+            'coalesced': coalesced,
+            'coalesced_rate': coalesced / (executions + coalesced) if executions + coalesced else 0.0,
+            'in_flight': in_flight,
+            'calls': per_name
+        }
+
+
+class CallCoalescer(SingleFlight):
+    """Single-flight ability calls for the abilities of `settings.coalescing.abilities`."""
+
+    def __init__(self, abilities: Iterable[str]):
+        super().__init__(copy_result=self._coalesced_copy)
+        self.abilities = frozenset(abilities)
+
+    @classmethod
+    def from_config(cls, coalescing_config: Optional[Dict[str, Any]]) -> Optional["CallCoalescer"]:
+        """Build the coalescer from `settings.coalescing`; None when disabled or no ability is listed."""
+        if not coalescing_config or not coalescing_config.get('enabled', False):
+            return None
+        abilities = coalescing_config.get('abilities') or []
+        if not isinstance(abilities, list) or not all(isinstance(name, str) for name in abilities):
+            raise ValueError(f"abilities must be a list of ability names, got {abilities!r}")
+        return cls(abilities) if abilities else None
+
+    def coalesces(self, ability_name: str) -> bool:
+        """Whether calls of this ability are coalesced."""
+        return ability_name in self.abilities
+
+    def key_for(self, server_name: str, ability_name: str,
+                reads: FrozenSet[str], context: Mapping[str, Any]) -> Optional[FlightKey]:
+        """Flight key of a call, or None if the call is not coalesced."""
+        if ability_name not in self.abilities or ANY_FIELD in reads:
+            return None
+        # Flight keys only live while the call runs: plain read values (a
+        # customer_id) need no digest, others are fingerprinted like the cache's
+        fields = tuple((field, type(context[field]), context[field]) for field in sorted(reads) if field in context)
+        try:
+            hash(fields)
+        except TypeError:
+            return (server_name, ability_name, AbilityResultCache.fingerprint(reads, context))
+        return (server_name, ability_name, fields)
+
+    @staticmethod
+    def _coalesced_copy(result: Any) -> Any:
+        result = copy.deepcopy(result)
+        if isinstance(result, dict):
+            result.setdefault('_metadata', {})['coalesced'] = True
+        return result
+
+
+class WorkflowCoalescer(SingleFlight):
+    """Attaches duplicate tickets (see `workflow_key()`) to the workflow started for the first one."""
+
+    def __init__(self,
+                 window_seconds: float = DEFAULT_WINDOW_SECONDS,
+                 max_recent_workflows: int = DEFAULT_MAX_RECENT_WORKFLOWS):
+        # A finished run is no longer changed: it is only copied for duplicates, when they attach
+        super().__init__(copy_result=RunContext.attach, snapshot=False, linger=window_seconds,
+                         max_lingering=max_recent_workflows)
+
+    def key_for(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Flight key of a ticket, or None if it cannot be identified."""
+        return workflow_key(payload)
+
+    def _lingers(self, result: Any) -> bool:
+        # A resubmitted ticket gets a new run unless the first one completed
+        return result.succeeded
+
+    @classmethod
+    def from_config(cls, coalescing_config: Optional[Dict[str, Any]]) -> Optional["WorkflowCoalescer"]:
+        """Build the coalescer from `settings.coalescing.duplicate_workflows`; None when disabled."""
+        if not coalescing_config or not coalescing_config.get('enabled', False):
+            return None
+        section = coalescing_config.get('duplicate_workflows') or {}
+        if not section.get('enabled', False):
+            return None
+        window = section.get('window_seconds', DEFAULT_WINDOW_SECONDS)
+        if isinstance(window, bool) or not isinstance(window, (int, float)) or window < 0:
+            raise ValueError(f"duplicate_workflows.window_seconds must be a non-negative number, got {window!r}")
+        max_recent = section.get('max_recent_workflows', DEFAULT_MAX_RECENT_WORKFLOWS)
+        if isinstance(max_recent, bool) or not isinstance(max_recent, int) or max_recent < 0:
+            raise ValueError(f"duplicate_workflows.max_recent_workflows must be a non-negative integer, "
+                             f"got {max_recent!r}")
+        return cls(float(window), max_recent)
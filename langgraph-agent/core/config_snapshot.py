@@ -0,0 +1,136 @@
+"""
+Cached binary snapshots of graph_config.yaml (**load_config**).
+
+Parsing the YAML takes ~18ms with the pure-Python loader (~2ms with
+libyaml), paid by every CLI job and worker start. The parsed config is
+therefore also written as a `marshal` snapshot, like a .pyc for the
+config, next to it:
+
+    <config dir>/__pycache__/graph_config.yaml.<python tag>.snapshot
+
+The snapshot header records the config's mtime, size and SHA-256. A
+snapshot whose mtime and size match is used without reading the YAML at
+all. When the mtime changed (a checkout, a `touch`), the YAML is read and
+hashed; same content means the snapshot is still used, and its header is
+refreshed. A config modified within the last two seconds when its
+snapshot is written could change again within the same mtime tick, so
+that snapshot records no mtime and is only trusted after hashing. Otherwise the YAML is parsed again (with libyaml when
+available) and the snapshot rewritten atomically. A config that marshal
+cannot represent (e.g. YAML timestamps) or a read-only directory just
+means no snapshot.
+
+How to extend:
+- Other config formats: parse them in `_parse()`
+"""
+
+import hashlib
+import logging
+import marshal
+import os
+import struct
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# magic, format version, source mtime_ns, source size, source sha256
+_HEADER = struct.Struct("<4sHqq32s")
+_MAGIC = b"LGCS"
+_FORMAT_VERSION = 1
+
+# Configs modified more recently than this get no mtime in their snapshot
+_RACY_WINDOW_NS = 2_000_000_000
+
+SOURCE_SNAPSHOT = "snapshot"
+SOURCE_REVALIDATED = "snapshot (revalidated by hash)"
+SOURCE_PARSED = "parsed"
+
+
+def snapshot_path(config_path: str) -> str:
+    """Where the snapshot of ``config_path`` is kept (marshal data is specific to the Python version)."""
+    directory, name = os.path.split(os.path.abspath(config_path))
+    return os.path.join(directory, "__pycache__", f"{name}.{sys.implementation.cache_tag}.snapshot")
+
+
+def load_config(config_path: str, use_snapshot: bool = True) -> Tuple[Dict[str, Any], str]:
+    """
+    Load a YAML config, from its snapshot when the snapshot is current.
+
+    Returns:
+        The config and where it came from (SOURCE_SNAPSHOT,
+        SOURCE_REVALIDATED or SOURCE_PARSED)
+
+    Raises:
+        FileNotFoundError: ``config_path`` does not exist
+    """
+    stat = os.stat(config_path)
+    if not use_snapshot:
+        with open(config_path, "rb") as f:
+            return _parse(f.read()), SOURCE_PARSED
+
+    path = snapshot_path(config_path)
+    header, payload = _read_snapshot(path)
+    if header is not None and header[:2] == (stat.st_mtime_ns, stat.st_size):
+        return marshal.loads(payload), SOURCE_SNAPSHOT
+
+    with open(config_path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha256(source).digest()
+    if header is not None and header[2] == digest:
+        if header[0] != _trusted_mtime(stat):
+            _write_snapshot(path, stat, digest, payload)
+        return marshal.loads(payload), SOURCE_REVALIDATED
+
+    config = _parse(source)
+    try:
+        payload = marshal.dumps(config)
+    except ValueError:
+        logger.debug("Config %s has values marshal cannot store, not snapshotting it", config_path)
+        return config, SOURCE_PARSED
+    _write_snapshot(path, stat, digest, payload)
+    return config, SOURCE_PARSED
+
+
+def _parse(source: bytes) -> Dict[str, Any]:
+    """Parse YAML, with the libyaml loader when it is installed."""
+    import yaml  # Only needed when there is no current snapshot
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(source, Loader=loader)
+
+
+def _trusted_mtime(stat: os.stat_result) -> int:
+    """The mtime to record in a snapshot, 0 while the config may still change within its mtime tick."""
+    return stat.st_mtime_ns if time.time_ns() - stat.st_mtime_ns > _RACY_WINDOW_NS else 0
+
+
+def _read_snapshot(path: str) -> Tuple[Optional[Tuple[int, int, bytes]], bytes]:
+    """The (mtime_ns, size, sha256) header and marshal payload of a snapshot, (None, b"") if unusable."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None, b""
+    if len(data) < _HEADER.size:
+        return None, b""
+    magic, version, mtime_ns, size, digest = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _FORMAT_VERSION:
+        return None, b""
+    return (mtime_ns, size, digest), data[_HEADER.size:]
+
+
+def _write_snapshot(path: str, stat: os.stat_result, digest: bytes, payload: bytes):
+    """Replace the snapshot atomically; failing to write one is not an error."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, _trusted_mtime(stat), stat.st_size, digest))
+            f.write(payload)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.debug("Could not write config snapshot %s: %s", path, e)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
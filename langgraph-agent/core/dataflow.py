@@ -0,0 +1,95 @@
+"""
+Dataflow analysis for the abilities of a workflow stage.
+
+Servers declare, per ability, which top-level state fields it reads and which
+it writes (`ABILITY_DATAFLOW`). From those declarations this module splits an
+ordered list of abilities into **levels**: every ability in a level only
+depends on abilities from earlier levels, so a level can run in parallel.
+
+Abilities in a level all see the same snapshot of the state and their results
+are merged back in the original order, so the outcome is identical to
+sequential execution:
+- read-after-write: an ability that reads a field written by an earlier
+  ability is placed in a strictly later level
+- write-after-write / write-after-read: the later ability may share the
+  level of the earlier one (snapshot + ordered merge keep the sequential
+  result) but is never moved before it
+
+How to extend:
+- Declare `reads`/`writes` for new abilities in the server's ABILITY_DATAFLOW
+- Abilities without a declaration are treated as reading and writing
+  everything, which makes them a barrier (they run alone, in order)
+"""
+
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence
+
+# Field wildcard: "reads/writes any state field"
+ANY_FIELD = "*"
+
+
+class AbilityDataflow:
+    """Fields read and written by one ability."""
+
+    __slots__ = ("reads", "writes")
+
+    def __init__(self, reads: Optional[Sequence[str]] = None, writes: Optional[Sequence[str]] = None):
+        """Create a declaration; a missing side defaults to "any field"."""
+        self.reads: FrozenSet[str] = frozenset(reads if reads is not None else [ANY_FIELD])
+        self.writes: FrozenSet[str] = frozenset(writes if writes is not None else [ANY_FIELD])
+
+    @classmethod
+    def from_declaration(cls, declaration: Optional[Dict[str, Sequence[str]]]) -> "AbilityDataflow":
+        """Build from a server ABILITY_DATAFLOW entry (None = undeclared)."""
+        if not declaration:
+            return cls()
+        return cls(declaration.get("reads"), declaration.get("writes"))
+
+    def reads_output_of(self, earlier: "AbilityDataflow") -> bool:
+        """Read-after-write: this ability needs the results of ``earlier``."""
+        return self._overlaps(self.reads, earlier.writes)
+
+    def conflicts_with(self, earlier: "AbilityDataflow") -> bool:
+        """Write-after-write or write-after-read against ``earlier``."""
+        return self._overlaps(self.writes, earlier.writes) or self._overlaps(self.writes, earlier.reads)
+
+    @staticmethod
+    def _overlaps(fields: FrozenSet[str], other: FrozenSet[str]) -> bool:
+        """Whether two field sets intersect, honouring the wildcard."""
+        if ANY_FIELD in fields or ANY_FIELD in other:
+            return True
+        return not fields.isdisjoint(other)
+
+    def __repr__(self) -> str:
+        """String representation of the declaration."""
+        return f"AbilityDataflow(reads={sorted(self.reads)}, writes={sorted(self.writes)})"
+
+
+def build_execution_levels(abilities: Sequence[str],
+                           dataflow_for: Callable[[str], AbilityDataflow]) -> List[List[str]]:
+    """
+    Split an ordered list of abilities into levels that can run in parallel.
+
+    Args:
+        abilities: Abilities in their sequential execution order
+        dataflow_for: Returns the declaration of an ability
+
+    Returns:
+        Levels in execution order; each level keeps the sequential order of
+        its abilities, which is also the order their results are merged in
+    """
+    flows = [dataflow_for(ability) for ability in abilities]
+    ability_levels: List[int] = []
+
+    for i, flow in enumerate(flows):
+        level = 0
+        for j in range(i):
+            if flow.reads_output_of(flows[j]):
+                level = max(level, ability_levels[j] + 1)
+            elif flow.conflicts_with(flows[j]):
+                level = max(level, ability_levels[j])
+        ability_levels.append(level)
+
+    levels: List[List[str]] = [[] for _ in range(max(ability_levels, default=-1) + 1)]
+    for ability, level in zip(abilities, ability_levels):
+        levels[level].append(ability)
+    return levels
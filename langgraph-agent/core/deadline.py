@@ -0,0 +1,86 @@
+"""
+Nested time budgets for workflows, stages and abilities (**Deadline**).
+
+Budgets come from graph_config.yaml:
+- workflow: `settings.performance.max_total_workflow_time_seconds`
+- stage: `timeout_seconds` of the stage, within the workflow budget
+- ability: `ability_timeout_seconds` of the stage (all attempts of one
+  ability, retries and backoff included), within the stage budget. It
+  defaults to the stage timeout minus `stage_timeout_buffer_seconds`, so an
+  overrunning ability is failed while its stage still has time to finish.
+
+A child deadline never outlives its parent, and remembers which deadline
+bounds it (`bound`), so the caller can tell an ability that ran out of its
+own budget (recorded as a failed ability, the workflow goes on) from one
+stopped by its stage or workflow budget (the workflow ends with the
+`timeout_error` fallback response).
+
+Deadlines use `time.monotonic()` and are immutable, so one can be shared by
+threads and tasks.
+
+How to extend:
+- Derive further budgets with `child()`; raise `DeadlineExceeded` through
+  `check()` rather than comparing clocks by hand
+"""
+
+import math
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work runs past a workflow, stage or ability deadline."""
+
+    def __init__(self, deadline: "Deadline"):
+        self.deadline = deadline
+        super().__init__(f"{deadline.scope} '{deadline.name}' exceeded its {deadline.budget:g}s deadline")
+
+
+class Deadline:
+    """An absolute point in time by which some work must be done."""
+
+    __slots__ = ("scope", "name", "budget", "expires_at", "bound")
+
+    def __init__(self, scope: str, name: str, budget: Optional[float], parent: Optional["Deadline"] = None):
+        """
+        Args:
+            scope: What the budget applies to ("workflow", "stage", "ability")
+            name: Name of the workflow, stage or ability
+            budget: Seconds from now, None for no budget of its own
+            parent: Enclosing deadline, which this one never outlives
+        """
+        self.scope = scope
+        self.name = name
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget if budget is not None else math.inf
+        # The deadline that actually expires first: this one or an ancestor's
+        self.bound = self
+        if parent is not None and parent.expires_at <= self.expires_at:
+            self.expires_at = parent.expires_at
+            self.bound = parent.bound
+
+    def child(self, scope: str, name: str, budget: Optional[float]) -> "Deadline":
+        """A deadline for part of this work, never later than this one."""
+        return Deadline(scope, name, budget, parent=self)
+
+    def remaining(self) -> float:
+        """Seconds left (inf without any budget, negative once expired)."""
+        return self.expires_at - time.monotonic()
+
+    def timeout(self) -> Optional[float]:
+        """Seconds left as a wait timeout (None = wait forever, never negative)."""
+        if self.expires_at == math.inf:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        """Raise DeadlineExceeded (for the deadline that is bound) once expired."""
+        if time.monotonic() >= self.expires_at:
+            raise DeadlineExceeded(self.bound)
+
+    def __repr__(self) -> str:
+        return f"Deadline({self.scope}='{self.name}', remaining={self.remaining():.3f}s)"
@@ -0,0 +1,270 @@
+"""
+Per-server failure isolation for MCPClient: **CircuitBreaker** and **Bulkhead**.
+
+Configured per server in graph_config.yaml:
+
+    servers:
+      atlas:
+        bulkhead: {max_concurrent: 16, max_wait_seconds: 0.05}
+        circuit_breaker:
+          failure_rate_threshold: 0.5     # open when half the calls fail...
+          slow_call_seconds: 5            # ...or when calls slower than this
+          slow_call_rate_threshold: 0.8   # make up 80% of the window
+          window_size: 20                 # last N calls
+          minimum_calls: 10
+          open_seconds: 30                # then probe again (half-open)
+          half_open_calls: 3
+
+- Bulkhead: at most `max_concurrent` calls in flight per server. A call
+  made by a stage waits for a slot until its ability deadline, then is
+  rejected (with no time left to retry); a call without a deadline
+  (`MCPClient.call()`) waits up to `max_wait_seconds`. A slow or hung Atlas
+  can only tie up its own slots, never the callers of Common, which needs
+  no bulkhead: its calls run in-process and take microseconds.
+- CircuitBreaker: over a window of the last calls, opens when the share of
+  failed (raised) or slow calls crosses its threshold. While open, calls are
+  rejected without touching the server. After `open_seconds` it lets
+  `half_open_calls` probes through: all fine closes it, any failure or slow
+  probe opens it again.
+
+Rejected calls return MCPClient's usual error shape (`success: False`) with
+`rejected_by`; circuit-open rejections are `retryable: False`, so the retry
+engine (core/retry.py) does not hammer an open circuit.
+
+How to extend:
+- Add the sections above to a server in graph_config.yaml; servers without
+  them are not guarded and pay nothing
+- Breaker/bulkhead state is reported by `MCPClient.health_check()`
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Mapping, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Poll interval while an async caller waits for a bulkhead slot
+_ASYNC_WAIT_INTERVAL = 0.005
+
+
+def _options(config: Optional[Mapping[str, Any]], defaults: Dict[str, Any], where: str) -> Dict[str, Any]:
+    """Merge a config section over its defaults; unknown keys are an error."""
+    config = dict(config or {})
+    unknown = set(config) - set(defaults)
+    if unknown:
+        raise ValueError(f"{where}: unknown settings: {', '.join(sorted(unknown))}")
+    return {**defaults, **config}
+
+
+class CircuitBreaker:
+    """Failure-rate and slow-call-rate circuit breaker over a sliding window of calls."""
+
+    DEFAULTS = {
+        'failure_rate_threshold': 0.5,
+        'slow_call_seconds': 10.0,
+        'slow_call_rate_threshold': 1.0,
+        'window_size': 20,
+        'minimum_calls': 10,
+        'open_seconds': 30.0,
+        'half_open_calls': 3,
+    }
+
+    def __init__(self, name: str, **options):
+        """``options`` are the keys of DEFAULTS."""
+        options = _options(options, self.DEFAULTS, f"circuit_breaker ({name})")
+        for key in ('failure_rate_threshold', 'slow_call_rate_threshold'):
+            if not 0 < options[key] <= 1:
+                raise ValueError(f"circuit_breaker ({name}): {key} must be in (0, 1]")
+        if options['window_size'] < 1 or not 1 <= options['minimum_calls'] <= options['window_size']:
+            raise ValueError(f"circuit_breaker ({name}): need 1 <= minimum_calls <= window_size")
+        if options['half_open_calls'] < 1 or options['open_seconds'] <= 0 or options['slow_call_seconds'] <= 0:
+            raise ValueError(f"circuit_breaker ({name}): half_open_calls, open_seconds and slow_call_seconds must be positive")
+
+        self.name = name
+        self.failure_rate_threshold = options['failure_rate_threshold']
+        self.slow_call_seconds = options['slow_call_seconds']
+        self.slow_call_rate_threshold = options['slow_call_rate_threshold']
+        self.minimum_calls = options['minimum_calls']
+        self.open_seconds = options['open_seconds']
+        self.half_open_calls = options['half_open_calls']
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        # (failed, slow) of the last window_size calls, with running counts
+        self._window: deque = deque(maxlen=options['window_size'])
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probes_passed = 0
+        self._stats = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'opened': 0}
+
+    @classmethod
+    def from_config(cls, name: str, config: Optional[Mapping[str, Any]]) -> Optional["CircuitBreaker"]:
+        """Build from a `circuit_breaker` section; None when there is none."""
+        if config is None:
+            return None
+        return cls(name, **config)
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (counts a rejection otherwise)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+                self._probes_passed = 0
+            if self.state == HALF_OPEN and self._probes_in_flight + self._probes_passed < self.half_open_calls:
+                self._probes_in_flight += 1
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def record(self, failed: bool, duration: float):
+        """Record the outcome of an allowed call."""
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['failures'] += failed
+            self._stats['slow_calls'] += slow
+
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed or slow:
+                    self._open()
+                else:
+                    self._probes_passed += 1
+                    if self._probes_passed >= self.half_open_calls:
+                        self._close()
+                return
+            if self.state == OPEN:
+                # A call admitted before the circuit opened
+                return
+
+            window = self._window
+            if len(window) == window.maxlen:
+                old_failed, old_slow = window[0]
+                self._failures -= old_failed
+                self._slow -= old_slow
+            window.append((failed, slow))
+            self._failures += failed
+            self._slow += slow
+            calls = len(window)
+            if calls >= self.minimum_calls and (self._failures / calls >= self.failure_rate_threshold
+                                                or self._slow / calls >= self.slow_call_rate_threshold):
+                self._open()
+
+    def _open(self):
+        """Open the circuit (caller holds the lock)."""
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._stats['opened'] += 1
+
+    def _close(self):
+        """Close the circuit with a fresh window (caller holds the lock)."""
+        self.state = CLOSED
+        self._window.clear()
+        self._failures = 0
+        self._slow = 0
+
+    def get_state(self) -> Dict[str, Any]:
+        """State, window rates and counters."""
+        with self._lock:
+            calls = len(self._window)
+            state = {
+                'state': self.state,
+                'failure_rate': round(self._failures / calls, 3) if calls else 0.0,
+                'slow_call_rate': round(self._slow / calls, 3) if calls else 0.0,
+                'window_calls': calls,
+                **self._stats
+            }
+            if self.state == OPEN:
+                state['retry_in_seconds'] = round(max(0.0, self._opened_at + self.open_seconds - time.monotonic()), 3)
+            return state
+
+
+class Bulkhead:
+    """Bounded number of concurrent calls to one server."""
+
+    DEFAULTS = {'max_concurrent': 16, 'max_wait_seconds': 0.0}
+
+    def __init__(self, name: str, **options):
+        """``options`` are the keys of DEFAULTS."""
+        options = _options(options, self.DEFAULTS, f"bulkhead ({name})")
+        if options['max_concurrent'] < 1 or options['max_wait_seconds'] < 0:
+            raise ValueError(f"bulkhead ({name}): need max_concurrent >= 1 and max_wait_seconds >= 0")
+        self.name = name
+        self.max_concurrent = options['max_concurrent']
+        self.max_wait = options['max_wait_seconds']
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._in_use = 0
+        self._stats = {'admitted': 0, 'rejected': 0, 'peak_in_use': 0}
+
+    @classmethod
+    def from_config(cls, name: str, config: Optional[Mapping[str, Any]]) -> Optional["Bulkhead"]:
+        """Build from a `bulkhead` section; None when there is none."""
+        if config is None:
+            return None
+        return cls(name, **config)
+
+    def _take(self) -> bool:
+        """Take a free slot if there is one (caller holds the lock)."""
+        if self._in_use >= self.max_concurrent:
+            return False
+        self._in_use += 1
+        self._stats['admitted'] += 1
+        if self._in_use > self._stats['peak_in_use']:
+            self._stats['peak_in_use'] = self._in_use
+        return True
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a slot, waiting up to ``timeout`` (default: max_wait_seconds); False if rejected."""
+        wait = self.max_wait if timeout is None else timeout
+        with self._lock:
+            if self._take():
+                return True
+            if wait > 0:
+                deadline = time.monotonic() + wait
+                remaining = wait
+                while remaining > 0:
+                    self._slot_freed.wait(remaining)
+                    if self._take():
+                        return True
+                    remaining = deadline - time.monotonic()
+            self._stats['rejected'] += 1
+            return False
+
+    async def aacquire(self, timeout: Optional[float] = None) -> bool:
+        """Async counterpart of acquire(); waiting does not block the event loop."""
+        with self._lock:
+            if self._take():
+                return True
+        wait = self.max_wait if timeout is None else timeout
+        deadline = time.monotonic() + wait
+        remaining = wait
+        while remaining > 0:
+            await asyncio.sleep(min(_ASYNC_WAIT_INTERVAL, remaining))
+            with self._lock:
+                if self._take():
+                    return True
+            remaining = deadline - time.monotonic()
+        with self._lock:
+            self._stats['rejected'] += 1
+        return False
+
+    def release(self):
+        """Give a slot back."""
+        with self._lock:
+            self._in_use -= 1
+            self._slot_freed.notify()
+
+    def get_state(self) -> Dict[str, Any]:
+        """Slots in use and counters."""
+        with self._lock:
+            return {'max_concurrent': self.max_concurrent, 'in_use': self._in_use, **self._stats}
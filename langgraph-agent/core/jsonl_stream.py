@@ -0,0 +1,184 @@
+"""
+Streaming JSONL processing for the agent CLI (**run_jsonl**).
+
+    python agent.py --input tickets.jsonl --output results.jsonl [--workers 8] [--resume]
+
+- Input is read line by line in binary mode, so byte offsets are exact and
+  a file of any size is never held in memory: at most `max_in_flight`
+  payloads (with `settings.scheduling`, its `window`) are parsed and
+  waiting at any time (see `LangGraphAgent.run_batch(ordered=True)`).
+- Each result is written as soon as it and every earlier line are done,
+  one compact JSON object per input line, in input order. A line that is
+  not a JSON object gets an error record instead of stopping the run. A
+  ticket parked to wait for a reply is written with its workflow id and
+  status 'waiting', and counted as `parked`.
+- A checkpoint next to the output (`<output>.checkpoint`) records the input
+  offset up to which results are safely written, and the output size at
+  that point. It is rewritten atomically every `checkpoint_every` records,
+  after the output is flushed and synced. `--resume` truncates the output
+  to the checkpointed size (dropping any partial or unconfirmed tail) and
+  carries on from the checkpointed input offset, so after a crash every
+  input line ends up with exactly one result line. Lines after the
+  checkpoint are processed again.
+
+How to extend:
+- Other result shapes: change `result_record()`
+"""
+
+import json
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+
+def read_jsonl(path: str, offset: int = 0) -> Iterator[Tuple[int, int, Any]]:
+    """
+    Yield (start offset, end offset, payload) for each non-blank line from ``offset``.
+
+    ``payload`` is the decoded object, or the ValueError for a line that is
+    not a JSON object.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        position = offset
+        for line in f:
+            start, position = position, position + len(line)
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+                if not isinstance(payload, dict):
+                    raise ValueError(f"expected a JSON object, got {type(payload).__name__}")
+            except ValueError as e:
+                payload = e
+            yield start, position, payload
+
+
+def result_record(line: int, input_offset: int, run: Any, summary_only: bool = False) -> Dict[str, Any]:
+    """The output record of one input line."""
+    record = {'line': line, 'input_offset': input_offset, 'summary': run.summary()}
+    if not summary_only:
+        record['state'] = run.state
+    return record
+
+
+def load_checkpoint(output_path: str) -> Optional[Dict[str, Any]]:
+    """The checkpoint of an output file, None if there is none."""
+    try:
+        with open(output_path + CHECKPOINT_SUFFIX, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(output_path: str, checkpoint: Dict[str, Any]):
+    """Replace the checkpoint atomically."""
+    path = output_path + CHECKPOINT_SUFFIX
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def run_jsonl(agent: Any,
+              input_path: str,
+              output_path: str,
+              workers: Optional[int] = None,
+              executor: str = "thread",
+              resume: bool = False,
+              input_offset: int = 0,
+              summary_only: bool = False,
+              checkpoint_every: int = 100) -> Dict[str, Any]:
+    """
+    Run every payload of a JSONL file through ``agent`` and stream the results to ``output_path``.
+
+    Args:
+        agent: The LangGraphAgent to run payloads with
+        input_path: JSONL file, one payload per line
+        output_path: JSONL file for the results (replaced unless resuming)
+        workers: Worker pool size (see `run_batch()`)
+        executor: "thread", "process" or "prefork"
+        resume: Continue from the checkpoint of ``output_path``
+        input_offset: Byte offset to start reading at (ignored when resuming)
+        summary_only: Write the run summary without the final state
+        checkpoint_every: Results between checkpoints
+
+    Returns:
+        The final checkpoint (offsets and counts)
+
+    Raises:
+        ValueError: ``resume`` was asked for an output that has no checkpoint,
+            or a checkpoint of another input file
+    """
+    checkpoint = {'input': os.path.abspath(input_path), 'input_offset': input_offset,
+                  'output_offset': 0, 'lines': 0, 'failed': 0, 'parked': 0}
+    mode = "wb"
+    if resume:
+        saved = load_checkpoint(output_path)
+        if saved is None:
+            raise ValueError(f"no checkpoint to resume from: {output_path}{CHECKPOINT_SUFFIX}")
+        if saved.get('input') != checkpoint['input']:
+            raise ValueError(f"checkpoint of {output_path} belongs to {saved.get('input')}, not {input_path}")
+        checkpoint = saved
+        mode = "r+b" if os.path.exists(output_path) else "wb"
+
+    # Lines read but not written yet, in input order: (start, end, error or None)
+    lines: Deque[Tuple[int, int, Optional[Exception]]] = deque()
+
+    def payloads() -> Iterator[Dict[str, Any]]:
+        for start, end, payload in read_jsonl(input_path, checkpoint['input_offset']):
+            if isinstance(payload, Exception):
+                lines.append((start, end, payload))
+            else:
+                lines.append((start, end, None))
+                yield payload
+
+    with open(output_path, mode) as out:
+        # Drop whatever was written after the last checkpoint
+        out.truncate(checkpoint['output_offset'])
+        out.seek(checkpoint['output_offset'])
+        since_checkpoint = 0
+
+        def write(record: Dict[str, Any], end: int):
+            nonlocal since_checkpoint
+            out.write(json.dumps(record, separators=(',', ':'), default=str).encode("utf-8"))
+            out.write(b"\n")
+            checkpoint['lines'] += 1
+            checkpoint['input_offset'] = end
+            since_checkpoint += 1
+            if since_checkpoint >= checkpoint_every:
+                commit()
+
+        def commit():
+            nonlocal since_checkpoint
+            out.flush()
+            os.fsync(out.fileno())
+            checkpoint['output_offset'] = out.tell()
+            _save_checkpoint(output_path, checkpoint)
+            since_checkpoint = 0
+
+        def write_invalid_lines():
+            while lines and lines[0][2] is not None:
+                start, end, error = lines.popleft()
+                checkpoint['failed'] += 1
+                write({'line': checkpoint['lines'] + 1, 'input_offset': start,
+                       'error': f"invalid input line: {error}"}, end)
+
+        for _, run in agent.run_batch(payloads(), workers=workers, executor=executor, ordered=True):
+            write_invalid_lines()
+            start, end, _ = lines.popleft()
+            if run.parked:
+                # Waiting for a reply (see LangGraphAgent.resume), not failed
+                checkpoint['parked'] = checkpoint.get('parked', 0) + 1
+            elif not run.succeeded:
+                checkpoint['failed'] += 1
+            write(result_record(checkpoint['lines'] + 1, start, run, summary_only), end)
+        # Invalid lines at the end of the input
+        write_invalid_lines()
+        commit()
+
+    return checkpoint
@@ -0,0 +1,144 @@
+"""
+Non-blocking logging for the agent (**configure_logging**).
+
+Log records are put on an in-memory queue by a `QueueHandler` on the root
+logger and written to stderr by a `QueueListener` thread, so a worker
+thread or the event loop never waits on terminal or file I/O:
+
+    configure_logging(config.get('settings'))   # done by LangGraphAgent
+
+The level comes from `settings.log_level` (DEBUG, INFO, WARNING, ...), and
+`settings.enable_logging: false` turns logging off. A disabled level costs
+one cached `isEnabledFor()` check, provided the call site formats lazily:
+
+    logger.info("Routing request: %s.%s", server_name, ability_name)   # not an f-string
+
+Arguments that are expensive to compute even before formatting (JSON dumps
+of the state, joins) go behind `logger.isEnabledFor(level)`.
+
+As with `logging.basicConfig()`, the writer is only installed when the
+root logger has no handlers yet, so an application that configured logging
+itself keeps its handlers (the level is still applied). Queued records are
+flushed at interpreter exit, and a process forked with the writer running
+(e.g. `run_batch(executor="process")`) starts its own writer.
+
+How to extend:
+- Other destinations: `configure_logging(settings, handlers=[...])`; the
+  handlers run on the writer thread
+"""
+
+import atexit
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Root level while settings.enable_logging is false: above every standard level
+DISABLED_LEVEL = logging.CRITICAL + 1
+
+_lock = threading.Lock()
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def log_level_from_settings(settings: Optional[Dict[str, Any]]) -> int:
+    """
+    The root log level configured by ``settings``.
+
+    Raises:
+        ValueError: ``log_level`` is not a standard level name
+    """
+    settings = settings or {}
+    if not settings.get('enable_logging', True):
+        return DISABLED_LEVEL
+    name = str(settings.get('log_level', 'INFO')).upper()
+    level = logging.getLevelName(name)
+    if not isinstance(level, int):
+        raise ValueError(f"unknown log_level '{settings.get('log_level')}'")
+    return level
+
+
+def configure_logging(settings: Optional[Dict[str, Any]] = None,
+                      handlers: Optional[List[logging.Handler]] = None) -> int:
+    """
+    Apply ``settings.log_level``/``enable_logging`` and start the background writer.
+
+    Safe to call again (every agent does): the level is updated and the
+    running writer is kept.
+
+    Args:
+        settings: The `settings` section of graph_config.yaml
+        handlers: Handlers for the writer thread (default: stderr with LOG_FORMAT)
+
+    Returns:
+        The root log level now in effect
+    """
+    global _queue_handler, _listener
+    level = log_level_from_settings(settings)
+    root = logging.getLogger()
+    with _lock:
+        root.setLevel(level)
+        if _queue_handler is None and not root.handlers:
+            if handlers is None:
+                stream_handler = logging.StreamHandler()
+                stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+                handlers = [stream_handler]
+            _queue_handler, _listener = _start_writer(handlers)
+            root.addHandler(_queue_handler)
+    return level
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler for a queue drained in this process: records are not copied."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, as they may change before the writer gets to
+        # them; the stock prepare() also copies and fully formats each record
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _start_writer(handlers: List[logging.Handler]):
+    """A queue handler and the started listener that drains its queue into ``handlers``."""
+    # SimpleQueue never blocks the caller and is cheaper than a bounded Queue
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return _InProcessQueueHandler(records), listener
+
+
+def stop_logging():
+    """Write the queued records and stop the background writer (run at exit)."""
+    global _queue_handler, _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = _listener = None
+
+
+def _restart_writer_in_child():
+    """Give a forked child its own writer: the parent's thread does not exist there."""
+    global _lock, _queue_handler, _listener
+    if _listener is None:
+        return
+    # The inherited lock may have been held by another thread at fork time
+    _lock = threading.Lock()
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _queue_handler, _listener = _start_writer(list(_listener.handlers))
+    root.addHandler(_queue_handler)
+    # Pool workers leave with os._exit(), which skips atexit but runs these
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=0)
+
+
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_writer_in_child)
@@ -5,13 +5,31 @@ Responsibilities:
 - Receives ability execution requests from Node
 - Routes them to the correct MCP server (Common 🏠 or Atlas 🌍)
 - Returns server results back to the Node
+- Offers an async path (`acall()`) for event-loop based execution
+- Optionally memoizes results of pure abilities (see core/result_cache.py)
+- Optionally coalesces identical in-flight calls of the same ability into
+  one execution (see core/coalescing.py); checked after the cache, and
+  followers take no bulkhead slot
+- Optionally isolates servers with circuit breakers and bulkheads (see
+  core/isolation.py); cache hits are served without touching either, and
+  `invoke()` calls wait for a bulkhead slot until their deadline
+- Records the latency of every server call (see core/metrics.py), and traces
+  it as a span when tracing is enabled (see core/tracing.py)
+- Loads each server module on first use (see `LazyServers`), so importing
+  the client or creating it costs nothing until a server is needed
 
 How to extend:
-- If you add new servers (besides Common/Atlas), update the `call()` method to handle them
+- If you add new servers (besides Common/Atlas), add their module to
+  `SERVER_MODULES`; the module must provide `get_server()`
 """
 
+import time
 import logging
-from typing import Dict, Any, Optional
+from datetime import datetime
+import importlib
+import threading
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, List, Optional, Callable, Awaitable, Tuple
 import sys
 import os
 
@@ -20,47 +38,119 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-try:
-    # Import using absolute path from project root
-    from servers.common import get_server as get_common_server
-    from servers.atlas import get_server as get_atlas_server
-except ImportError as e:
-    logging.error(f"Failed to import server modules: {e}")
-    # Fallback for testing
-    get_common_server = None
-    get_atlas_server = None
+from core.dataflow import AbilityDataflow
+from core.deadline import Deadline
+from core.result_cache import AbilityResultCache, CacheKey
+from core.coalescing import CallCoalescer, FlightKey
+from core.isolation import Bulkhead, CircuitBreaker
+from core.metrics import get_metrics_registry
+from core.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
+# Server name -> module providing get_server(), imported on first use
+SERVER_MODULES = {
+    'common': 'servers.common',  # internal abilities
+    'atlas': 'servers.atlas',    # external abilities
+}
+
+
+class LazyServers(Mapping):
+    """Server instances by name, each imported and created on first access"""
+    
+    def __init__(self, modules: Dict[str, str]):
+        self._modules = dict(modules)
+        self._servers: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # Seconds taken to import and create each loaded server
+        self.load_times: Dict[str, float] = {}
+    
+    def __getitem__(self, name: str) -> Any:
+        server = self._servers.get(name)
+        if server is None:
+            server = self._load(name)
+        return server
+    
+    def _load(self, name: str) -> Any:
+        """Import a server module and get its server; a server that fails to load is dropped"""
+        with self._lock:
+            server = self._servers.get(name)
+            if server is not None:
+                return server
+            module = self._modules.get(name)
+            if module is None:
+                raise KeyError(name)
+            start = time.perf_counter()
+            try:
+                server = importlib.import_module(module).get_server()
+            except Exception as e:
+                logger.error("Failed to load server '%s' from %s: %s", name, module, e)
+                del self._modules[name]
+                raise KeyError(name) from e
+            self.load_times[name] = time.perf_counter() - start
+            self._servers[name] = server
+        logger.info("Connected to %s server (%s, %.1fms)", name, module, self.load_times[name] * 1000)
+        return server
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self._modules
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._modules))
+    
+    def __len__(self) -> int:
+        return len(self._modules)
+    
+    def items(self) -> List[Tuple[str, Any]]:
+        """Every server, loading the ones not used yet (servers that fail to load are left out)"""
+        items = []
+        for name in self:
+            server = self.get(name)
+            if server is not None:
+                items.append((name, server))
+        return items
+    
+    def loaded(self) -> List[str]:
+        """Names of the servers loaded so far"""
+        return list(self._servers)
+
+
+class BoundAbility:
+    """An ability resolved once to the callable(s) that implement it on a server"""
+    
+    __slots__ = ('server_name', 'name', 'fn', 'afn', 'dataflow')
+    
+    def __init__(self,
+                 server_name: str,
+                 name: str,
+                 fn: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 afn: Optional[Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]],
+                 dataflow: AbilityDataflow):
+        self.server_name = server_name
+        self.name = name
+        self.fn = fn
+        self.afn = afn
+        self.dataflow = dataflow
+    
+    def __repr__(self) -> str:
+        return f"BoundAbility({self.server_name}.{self.name})"
+
+
 class MCPClient:
     """MCP Client - Dispatcher between nodes and MCP servers"""
     
     def __init__(self):
         """Initialize the MCP client with server connections"""
-        self.servers = {}
-        self._initialize_servers()
+        self.servers = LazyServers(SERVER_MODULES)
+        self._bound_abilities: Dict[Tuple[str, str], BoundAbility] = {}
+        self.result_cache: Optional[AbilityResultCache] = None
+        self.coalescer: Optional[CallCoalescer] = None
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self.bulkheads: Dict[str, Bulkhead] = {}
+        self.metrics = get_metrics_registry()
+        self.tracer = get_tracer()
         logger.info("MCPClient initialized successfully")
     
-    def _initialize_servers(self):
-        """Initialize connections to available MCP servers"""
-        try:
-            # Initialize Common server (internal abilities)
-            if get_common_server:
-                self.servers['common'] = get_common_server()
-                logger.info("Connected to Common server (internal abilities)")
-            else:
-                logger.warning("Common server not available")
-            
-            # Initialize Atlas server (external abilities)
-            if get_atlas_server:
-                self.servers['atlas'] = get_atlas_server()
-                logger.info("Connected to Atlas server (external abilities)")
-            else:
-                logger.warning("Atlas server not available")
-                
-        except Exception as e:
-            logger.error(f"Error initializing servers: {e}")
-    
     def get_available_servers(self) -> Dict[str, Any]:
         """Get information about available servers"""
         server_info = {}
@@ -72,7 +162,7 @@ class MCPClient:
                     'abilities': server.get_abilities()
                 }
             except Exception as e:
-                logger.error(f"Error getting info for server {name}: {e}")
+                logger.error("Error getting info for server %s: %s", name, e)
                 server_info[name] = {'error': str(e)}
         
         return server_info
@@ -89,47 +179,370 @@ class MCPClient:
         Returns:
             Dict containing the execution result
         """
-        logger.info(f"Routing request: {server_name}.{ability_name}")
-        
-        # Validate server exists
-        if server_name not in self.servers:
-            error_msg = f"Server '{server_name}' not found. Available servers: {list(self.servers.keys())}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
-                'server': server_name,
-                'ability': ability_name
-            }
+        logger.debug("Routing request: %s.%s", server_name, ability_name)
+        
+        # Get the target server (loaded on first use)
+        server = self.servers.get(server_name)
+        if server is None:
+            return self._server_not_found(server_name, ability_name)
         
-        # Get the target server
-        server = self.servers[server_name]
+        cache_key, cached = self._cached_result(server_name, ability_name, None, context)
+        if cached is not None:
+            return cached
         
+        flight_key = self._flight_key(server_name, ability_name, None, context)
+        if flight_key is not None:
+            return self.coalescer.do(ability_name, flight_key, self._call_server,
+                                     server, server_name, ability_name, context, cache_key)
+        return self._call_server(server, server_name, ability_name, context, cache_key)
+    
+    def _call_server(self, server: Any, server_name: str, ability_name: str,
+                     context: Dict[str, Any], cache_key: Optional[CacheKey]) -> Dict[str, Any]:
+        """Admit and execute a `call()` not served from the cache."""
+        rejection = self._admit(server_name, ability_name)
+        if rejection is not None:
+            return rejection
+        
+        start, failed = time.perf_counter(), True
         try:
-            # Execute the ability on the target server
-            result = server.execute_ability(ability_name, context)
+            with self.tracer.span(f"{server_name}.{ability_name}", "mcp"):
+                # Execute the ability on the target server
+                result = server.execute_ability(ability_name, context)
+            result = self._attach_metadata(server_name, ability_name, result)
+            failed = False
             
-            # Add metadata to the result
-            if isinstance(result, dict):
-                result['_metadata'] = {
-                    'server': server_name,
-                    'ability': ability_name,
-                    'client': 'MCPClient'
-                }
-            
-            logger.info(f"Successfully executed {server_name}.{ability_name}")
-            return result
+        except Exception as e:
+            return self._execution_error(server_name, ability_name, e)
+        finally:
+            self._finish_call(server_name, ability_name, start, failed)
+        
+        return self._store_result(cache_key, result)
+    
+    async def acall(self, server_name: str, ability_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async counterpart of `call()`.
+        
+        Servers that implement `aexecute_ability` (Atlas) are awaited so the
+        event loop keeps serving other workflows while they wait on external
+        systems; in-process servers (Common) run inline.
+        """
+        logger.debug("Routing async request: %s.%s", server_name, ability_name)
+        
+        server = self.servers.get(server_name)
+        if server is None:
+            return self._server_not_found(server_name, ability_name)
+        
+        cache_key, cached = self._cached_result(server_name, ability_name, None, context)
+        if cached is not None:
+            return cached
+        
+        flight_key = self._flight_key(server_name, ability_name, None, context)
+        if flight_key is not None:
+            return await self.coalescer.ado(ability_name, flight_key, self._acall_server,
+                                            server, server_name, ability_name, context, cache_key)
+        return await self._acall_server(server, server_name, ability_name, context, cache_key)
+    
+    async def _acall_server(self, server: Any, server_name: str, ability_name: str,
+                            context: Dict[str, Any], cache_key: Optional[CacheKey]) -> Dict[str, Any]:
+        """Admit and execute an `acall()` not served from the cache."""
+        rejection = await self._aadmit(server_name, ability_name)
+        if rejection is not None:
+            return rejection
+        
+        start, failed = time.perf_counter(), True
+        try:
+            with self.tracer.span(f"{server_name}.{ability_name}", "mcp"):
+                if hasattr(server, 'aexecute_ability'):
+                    result = await server.aexecute_ability(ability_name, context)
+                else:
+                    result = server.execute_ability(ability_name, context)
+            result = self._attach_metadata(server_name, ability_name, result)
+            failed = False
             
         except Exception as e:
-            error_msg = f"Error executing {server_name}.{ability_name}: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
+            return self._execution_error(server_name, ability_name, e)
+        finally:
+            # Also runs when the call is cancelled at its deadline
+            self._finish_call(server_name, ability_name, start, failed)
+        
+        return self._store_result(cache_key, result)
+    
+    def resolve(self, server_name: str, ability_name: str) -> BoundAbility:
+        """
+        Resolve an ability to a BoundAbility once, so execution needs no per-call lookups
+        
+        Raises:
+            LookupError: if the server is not connected or does not provide the ability
+        """
+        key = (server_name, ability_name)
+        bound = self._bound_abilities.get(key)
+        if bound is not None:
+            return bound
+        
+        server = self.servers.get(server_name)
+        if server is None:
+            raise LookupError(f"Server '{server_name}' not found. Available servers: {list(self.servers.keys())}")
+        
+        fn = server.resolve_ability(ability_name)
+        if fn is None:
+            raise LookupError(f"Server '{server_name}' has no ability '{ability_name}'")
+        afn = server.resolve_async_ability(ability_name) if hasattr(server, 'resolve_async_ability') else None
+        
+        bound = BoundAbility(server_name, ability_name, fn, afn,
+                             self.get_ability_dataflow(server_name, ability_name))
+        self._bound_abilities[key] = bound
+        return bound
+    
+    def invoke(self, ability: BoundAbility, context: Dict[str, Any],
+               deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Execute a pre-resolved ability (see `resolve()`); same result contract as `call()`"""
+        logger.debug("Routing request: %s.%s", ability.server_name, ability.name)
+        
+        cache_key, cached = self._cached_result(ability.server_name, ability.name, ability.dataflow, context)
+        if cached is not None:
+            return cached
+        
+        flight_key = self._flight_key(ability.server_name, ability.name, ability.dataflow, context)
+        if flight_key is not None:
+            return self.coalescer.do(ability.name, flight_key, self._invoke_ability,
+                                     ability, context, cache_key, deadline)
+        return self._invoke_ability(ability, context, cache_key, deadline)
+    
+    def _invoke_ability(self, ability: BoundAbility, context: Dict[str, Any],
+                        cache_key: Optional[CacheKey], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Admit and execute an `invoke()` not served from the cache."""
+        rejection = self._admit(ability.server_name, ability.name, deadline)
+        if rejection is not None:
+            return rejection
+        
+        start, failed = time.perf_counter(), True
+        try:
+            with self.tracer.span(f"{ability.server_name}.{ability.name}", "mcp"):
+                result = ability.fn(context)
+            result = self._attach_metadata(ability.server_name, ability.name, result)
+            failed = False
+        except Exception as e:
+            return self._execution_error(ability.server_name, ability.name, e)
+        finally:
+            self._finish_call(ability.server_name, ability.name, start, failed)
+        
+        return self._store_result(cache_key, result)
+    
+    async def ainvoke(self, ability: BoundAbility, context: Dict[str, Any],
+                      deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Async counterpart of `invoke()`; awaits servers that provide async abilities"""
+        logger.debug("Routing async request: %s.%s", ability.server_name, ability.name)
+        
+        cache_key, cached = self._cached_result(ability.server_name, ability.name, ability.dataflow, context)
+        if cached is not None:
+            return cached
+        
+        flight_key = self._flight_key(ability.server_name, ability.name, ability.dataflow, context)
+        if flight_key is not None:
+            return await self.coalescer.ado(ability.name, flight_key, self._ainvoke_ability,
+                                            ability, context, cache_key, deadline)
+        return await self._ainvoke_ability(ability, context, cache_key, deadline)
+    
+    async def _ainvoke_ability(self, ability: BoundAbility, context: Dict[str, Any],
+                               cache_key: Optional[CacheKey], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Admit and execute an `ainvoke()` not served from the cache."""
+        rejection = await self._aadmit(ability.server_name, ability.name, deadline)
+        if rejection is not None:
+            return rejection
+        
+        start, failed = time.perf_counter(), True
+        try:
+            with self.tracer.span(f"{ability.server_name}.{ability.name}", "mcp"):
+                if ability.afn is not None:
+                    result = await ability.afn(context)
+                else:
+                    result = ability.fn(context)
+            result = self._attach_metadata(ability.server_name, ability.name, result)
+            failed = False
+        except Exception as e:
+            return self._execution_error(ability.server_name, ability.name, e)
+        finally:
+            # Also runs when the call is cancelled at its deadline
+            self._finish_call(ability.server_name, ability.name, start, failed)
+        
+        return self._store_result(cache_key, result)
+    
+    def configure_result_cache(self, cache: Optional[AbilityResultCache]):
+        """Enable memoization of ability results with the given cache (None disables it)"""
+        self.result_cache = cache
+        if cache is not None:
+            logger.info("Result cache enabled (max %d entries)", cache.max_entries)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters of the result cache"""
+        if self.result_cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.result_cache.get_stats()}
+    
+    def _cached_result(self, server_name: str, ability_name: str,
+                       dataflow: Optional[AbilityDataflow],
+                       context: Dict[str, Any]) -> Tuple[Optional[CacheKey], Optional[Dict[str, Any]]]:
+        """Look up a memoized result; returns the cache key (None if not cacheable) and the hit, if any."""
+        cache = self.result_cache
+        if cache is None or not cache.caches(ability_name):
+            return None, None
+        
+        if dataflow is None:
+            dataflow = self.get_ability_dataflow(server_name, ability_name)
+        cache_key = cache.key_for(server_name, ability_name, dataflow.reads, context)
+        if cache_key is None:
+            return None, None
+        
+        result = cache.get(cache_key)
+        if result is not None:
+            # A hit is this call's result: its timestamps are the time of the call, not of the first one
+            now = datetime.now().isoformat()
+            for field in result:
+                if field.endswith('_timestamp'):
+                    result[field] = now
+            result.setdefault('_metadata', {})['cache_hit'] = True
+            logger.debug("Cache hit for %s.%s", server_name, ability_name)
+        return cache_key, result
+    
+    def configure_coalescing(self, coalescer: Optional[CallCoalescer]):
+        """Share identical in-flight calls of the coalescer's abilities (None disables it)"""
+        self.coalescer = coalescer
+        if coalescer is not None:
+            logger.info("Coalescing identical in-flight calls of %s", ", ".join(sorted(coalescer.abilities)))
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Get executed/coalesced counters of single-flight ability calls"""
+        if self.coalescer is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.coalescer.get_stats()}
+    
+    def _flight_key(self, server_name: str, ability_name: str,
+                    dataflow: Optional[AbilityDataflow], context: Dict[str, Any]) -> Optional[FlightKey]:
+        """Key under which identical in-flight calls are coalesced; None if the call is not coalesced."""
+        coalescer = self.coalescer
+        if coalescer is None or not coalescer.coalesces(ability_name):
+            return None
+        if dataflow is None:
+            dataflow = self.get_ability_dataflow(server_name, ability_name)
+        return coalescer.key_for(server_name, ability_name, dataflow.reads, context)
+    
+    def configure_isolation(self, servers_config: Optional[Dict[str, Any]]):
+        """
+        Set up circuit breakers and bulkheads from the `servers` section of graph_config.yaml
+        
+        Raises:
+            ValueError: for invalid circuit_breaker/bulkhead settings
+        """
+        circuit_breakers, bulkheads = {}, {}
+        for server_name, server_config in (servers_config or {}).items():
+            server_config = server_config or {}
+            breaker = CircuitBreaker.from_config(server_name, server_config.get('circuit_breaker'))
+            if breaker is not None:
+                circuit_breakers[server_name] = breaker
+            bulkhead = Bulkhead.from_config(server_name, server_config.get('bulkhead'))
+            if bulkhead is not None:
+                bulkheads[server_name] = bulkhead
+        self.circuit_breakers = circuit_breakers
+        self.bulkheads = bulkheads
+    
+    def _admit(self, server_name: str, ability_name: str,
+               deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Take a bulkhead slot (waiting until ``deadline``) and pass the circuit breaker; returns the rejection, if any."""
+        bulkhead = self.bulkheads.get(server_name)
+        if bulkhead is not None and not bulkhead.acquire(deadline.timeout() if deadline is not None else None):
+            return self._rejected(server_name, ability_name, 'bulkhead')
+        return self._check_breaker(server_name, ability_name, bulkhead)
+    
+    async def _aadmit(self, server_name: str, ability_name: str,
+                      deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Async counterpart of `_admit()`; waiting for a slot does not block the loop"""
+        bulkhead = self.bulkheads.get(server_name)
+        if bulkhead is not None and not await bulkhead.aacquire(deadline.timeout() if deadline is not None else None):
+            return self._rejected(server_name, ability_name, 'bulkhead')
+        return self._check_breaker(server_name, ability_name, bulkhead)
+    
+    def _check_breaker(self, server_name: str, ability_name: str,
+                       bulkhead: Optional[Bulkhead]) -> Optional[Dict[str, Any]]:
+        """Ask the circuit breaker; a rejected call gives its bulkhead slot back."""
+        breaker = self.circuit_breakers.get(server_name)
+        if breaker is not None and not breaker.allow():
+            if bulkhead is not None:
+                bulkhead.release()
+            return self._rejected(server_name, ability_name, 'circuit_breaker')
+        return None
+    
+    def _finish_call(self, server_name: str, ability_name: str, start: float, failed: bool):
+        """Record an admitted call's latency (and with the circuit breaker), and free its bulkhead slot."""
+        duration = time.perf_counter() - start
+        self.metrics.histogram('ability_latency_seconds', server=server_name, ability=ability_name).record(duration)
+        breaker = self.circuit_breakers.get(server_name)
+        if breaker is not None:
+            breaker.record(failed, duration)
+        bulkhead = self.bulkheads.get(server_name)
+        if bulkhead is not None:
+            bulkhead.release()
+    
+    @staticmethod
+    def _rejected(server_name: str, ability_name: str, rejected_by: str) -> Dict[str, Any]:
+        """Build the error result for a call rejected by a circuit breaker or bulkhead."""
+        if rejected_by == 'circuit_breaker':
+            error_msg = f"Circuit breaker for server '{server_name}' is open, {ability_name} not called"
+        else:
+            error_msg = f"Server '{server_name}' is at its concurrency limit, {ability_name} not called"
+        logger.warning(error_msg)
+        return {
+            'success': False,
+            'error': error_msg,
+            'server': server_name,
+            'ability': ability_name,
+            'rejected_by': rejected_by,
+            # Retrying cannot help before the breaker's open period ends
+            'retryable': rejected_by != 'circuit_breaker'
+        }
+    
+    def _store_result(self, cache_key: Optional[CacheKey], result: Any) -> Any:
+        """Memoize a freshly computed result when its call is cacheable."""
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result)
+        return result
+    
+    def _server_not_found(self, server_name: str, ability_name: str) -> Dict[str, Any]:
+        """Build the error result for an unknown server."""
+        error_msg = f"Server '{server_name}' not found. Available servers: {list(self.servers.keys())}"
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg,
+            'server': server_name,
+            'ability': ability_name
+        }
+    
+    @staticmethod
+    def _attach_metadata(server_name: str, ability_name: str, result: Any) -> Any:
+        """Add routing metadata to a successful server result."""
+        # Add metadata to the result
+        if isinstance(result, dict):
+            result['_metadata'] = {
                 'server': server_name,
                 'ability': ability_name,
-                'exception_type': type(e).__name__
+                'client': 'MCPClient'
             }
+        
+        logger.debug("Successfully executed %s.%s", server_name, ability_name)
+        return result
+    
+    @staticmethod
+    def _execution_error(server_name: str, ability_name: str, error: Exception) -> Dict[str, Any]:
+        """Build the error result for an ability that raised."""
+        error_msg = f"Error executing {server_name}.{ability_name}: {str(error)}"
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg,
+            'server': server_name,
+            'ability': ability_name,
+            'exception_type': type(error).__name__
+        }
     
     def call_common(self, ability_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Convenience method to call Common server abilities"""
@@ -141,16 +554,30 @@ class MCPClient:
     
     def get_server_abilities(self, server_name: str) -> Optional[list]:
         """Get list of abilities for a specific server"""
-        if server_name in self.servers:
+        server = self.servers.get(server_name)
+        if server is not None:
             try:
-                return self.servers[server_name].get_abilities()
+                return server.get_abilities()
             except Exception as e:
-                logger.error(f"Error getting abilities for {server_name}: {e}")
+                logger.error("Error getting abilities for %s: %s", server_name, e)
                 return None
         else:
-            logger.warning(f"Server '{server_name}' not found")
+            logger.warning("Server '%s' not found", server_name)
             return None
     
+    def warm_up(self):
+        """Load every server and let it build what it would otherwise build on first use"""
+        for server_name, server in self.servers.items():
+            if hasattr(server, 'warm_up'):
+                server.warm_up()
+                logger.info("Warmed up %s server", server_name)
+    
+    def get_ability_dataflow(self, server_name: str, ability_name: str) -> AbilityDataflow:
+        """Get the declared state reads/writes of an ability (undeclared = reads/writes everything)"""
+        server = self.servers.get(server_name)
+        declarations = getattr(server, 'ABILITY_DATAFLOW', {})
+        return AbilityDataflow.from_declaration(declarations.get(ability_name))
+    
     def get_all_abilities(self) -> Dict[str, list]:
         """Get all abilities from all servers"""
         all_abilities = {}
@@ -173,16 +600,33 @@ class MCPClient:
             try:
                 # Try to get abilities as a health check
                 abilities = server.get_abilities()
-                health_status['servers'][server_name] = {
+                server_status = {
                     'status': 'healthy',
                     'abilities_count': len(abilities)
                 }
-                health_status['healthy_servers'] += 1
             except Exception as e:
-                health_status['servers'][server_name] = {
+                server_status = {
                     'status': 'unhealthy',
                     'error': str(e)
                 }
+            
+            breaker = self.circuit_breakers.get(server_name)
+            if breaker is not None:
+                server_status['circuit_breaker'] = breaker.get_state()
+                # An open circuit means calls are being refused, a half-open one is probing
+                circuit_state = server_status['circuit_breaker']['state']
+                if server_status['status'] == 'healthy' and circuit_state != 'closed':
+                    server_status['status'] = 'unhealthy' if circuit_state == 'open' else 'degraded'
+            bulkhead = self.bulkheads.get(server_name)
+            if bulkhead is not None:
+                server_status['bulkhead'] = bulkhead.get_state()
+            
+            health_status['servers'][server_name] = server_status
+            if server_status['status'] == 'healthy':
+                health_status['healthy_servers'] += 1
+        
+        if health_status['healthy_servers'] < health_status['total_servers']:
+            health_status['client_status'] = 'degraded'
         
         return health_status
     
@@ -193,17 +637,17 @@ class MCPClient:
         This method searches all servers for the requested ability and routes accordingly.
         Useful when you don't know which server contains a specific ability.
         """
-        logger.info(f"Auto-routing ability: {ability_name}")
+        logger.info("Auto-routing ability: %s", ability_name)
         
         # Search for the ability across all servers
         for server_name, server in self.servers.items():
             try:
                 abilities = server.get_abilities()
                 if ability_name in abilities:
-                    logger.info(f"Found {ability_name} in {server_name} server")
+                    logger.info("Found %s in %s server", ability_name, server_name)
                     return self.call(server_name, ability_name, context)
             except Exception as e:
-                logger.error(f"Error checking abilities for {server_name}: {e}")
+                logger.error("Error checking abilities for %s: %s", server_name, e)
                 continue
         
         # Ability not found in any server
@@ -0,0 +1,257 @@
+"""
+Latency percentiles for abilities, stages and servers (**LatencyHistogram**).
+
+Every call is recorded in a DDSketch-style histogram: buckets grow
+geometrically, so any quantile is reported within 1% of the true value
+(`relative_accuracy`) and 1µs..100s fits in under a thousand buckets,
+however many calls are recorded. Histograms with the same accuracy merge
+exactly by adding bucket counts, which is how the per-server figures are
+built from the per-ability ones.
+
+Recorded families (one process-wide registry, see `get_metrics_registry()`):
+- `ability_latency_seconds{server, ability}`: one server call, recorded by
+  MCPClient (cache hits and isolation rejections are not server calls)
+- `stage_latency_seconds{stage}`: one node execution, recorded by Node
+- `server_latency_seconds{server}`: the ability histograms of a server,
+  merged when reported
+- `queue_wait_seconds{lane}`: time a batch ticket waited for a worker,
+  recorded by the batch scheduler (see core/scheduler.py)
+
+`MetricsRegistry.render_openmetrics()` renders all of them as OpenMetrics
+summaries (p50/p95/p99 quantiles, `_sum`, `_count`), which Prometheus can
+scrape from a file or an HTTP handler.
+
+How to extend:
+- New latency families: `get_metrics_registry().histogram(family, **labels)`,
+  keep the returned histogram and call `record(seconds)` on it
+- Further aggregations: `MetricsRegistry.merged(family, label)`
+"""
+
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Quantiles reported in summaries and in the OpenMetrics exposition
+REPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+# Durations at or below this are counted in the zero bucket
+_MIN_TRACKED_SECONDS = 1e-9
+
+# OpenMetrics HELP text per family
+_FAMILY_HELP = {
+    'ability_latency_seconds': "Latency of one ability call on its MCP server",
+    'stage_latency_seconds': "Latency of one workflow stage execution",
+    'server_latency_seconds': "Latency of ability calls per MCP server",
+    'queue_wait_seconds': "Time a batch ticket waited for a worker, per scheduling lane",
+}
+
+
+class LatencyHistogram:
+    """Mergeable log-bucketed latency histogram with bounded relative error."""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """Add one observed duration."""
+        if seconds > _MIN_TRACKED_SECONDS:
+            index = math.ceil(math.log(seconds) / self._log_gamma)
+        else:
+            index = None
+        with self._lock:
+            if index is None:
+                self._zero_count += 1
+            else:
+                self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            if seconds < self.min:
+                self.min = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the observations of another histogram with the same accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge histograms with different relative_accuracy")
+        with other._lock:
+            buckets = dict(other._buckets)
+            zero_count, count, total = other._zero_count, other.count, other.sum
+            low, high = other.min, other.max
+        with self._lock:
+            for index, bucket_count in buckets.items():
+                self._buckets[index] = self._buckets.get(index, 0) + bucket_count
+            self._zero_count += zero_count
+            self.count += count
+            self.sum += total
+            self.min = min(self.min, low)
+            self.max = max(self.max, high)
+
+    def quantile(self, q: float) -> float:
+        """Estimated duration at quantile ``q`` (0.0 with no observations)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * (self.count - 1)
+            seen = self._zero_count
+            if seen > rank:
+                return 0.0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen > rank:
+                    # Midpoint of the bucket in relative terms
+                    value = 2 * self._gamma ** index / (self._gamma + 1)
+                    return min(max(value, self.min), self.max)
+            return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count and p50/p95/p99/max latency, in seconds."""
+        summary = {'count': self.count}
+        for q in REPORTED_QUANTILES:
+            summary[f"p{round(q * 100):d}"] = self.quantile(q)
+        summary['max'] = self.max
+        return summary
+
+    def reset(self):
+        """Forget all observations."""
+        with self._lock:
+            self._buckets = {}
+            self._zero_count = 0
+            self.count = 0
+            self.sum = 0.0
+            self.min = math.inf
+            self.max = 0.0
+
+    def __repr__(self) -> str:
+        return f"LatencyHistogram(count={self.count}, p50={self.quantile(0.5):.6f}, max={self.max:.6f})"
+
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Latency histograms by family and labels."""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._lock = threading.Lock()
+        self._families: Dict[str, Dict[LabelSet, LatencyHistogram]] = {}
+
+    def histogram(self, family: str, **labels: str) -> LatencyHistogram:
+        """The histogram of a family and label set, created on first use."""
+        key = tuple(labels.items())
+        histograms = self._families.get(family)
+        if histograms is not None:
+            histogram = histograms.get(key)
+            if histogram is not None:
+                return histogram
+        with self._lock:
+            histograms = self._families.setdefault(family, {})
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = LatencyHistogram(self.relative_accuracy)
+            return histogram
+
+    def series(self, family: str) -> List[Tuple[Dict[str, str], LatencyHistogram]]:
+        """(labels, histogram) of every series of a family."""
+        with self._lock:
+            histograms = list(self._families.get(family, {}).items())
+        return [(dict(key), histogram) for key, histogram in histograms]
+
+    def merged(self, family: str, label: str) -> Dict[str, LatencyHistogram]:
+        """The series of a family merged by the value of one label."""
+        merged: Dict[str, LatencyHistogram] = {}
+        for labels, histogram in self.series(family):
+            value = labels.get(label, '')
+            if value not in merged:
+                merged[value] = LatencyHistogram(self.relative_accuracy)
+            merged[value].merge(histogram)
+        return merged
+
+    def summaries(self, family: str) -> Dict[str, Dict[str, float]]:
+        """Percentile summaries of a family, keyed by their label values joined with '.'."""
+        return {'.'.join(labels.values()): histogram.summary() for labels, histogram in self.series(family)}
+
+    def render_openmetrics(self) -> str:
+        """All families (and the per-server merge) in the OpenMetrics text format."""
+        with self._lock:
+            families = sorted(self._families)
+        lines: List[str] = []
+        for family in families:
+            _render_family(lines, family, self.series(family))
+        if 'ability_latency_seconds' in families:
+            servers = self.merged('ability_latency_seconds', 'server')
+            _render_family(lines, 'server_latency_seconds',
+                           [({'server': server}, histogram) for server, histogram in sorted(servers.items())])
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str) -> str:
+        """Dump the OpenMetrics exposition to a file (replaced atomically) and return it."""
+        text = self.render_openmetrics()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+        return text
+
+    def reset(self):
+        """Drop every histogram."""
+        with self._lock:
+            self._families = {}
+
+
+def _render_family(lines: List[str], family: str,
+                   series: Iterable[Tuple[Dict[str, str], LatencyHistogram]]):
+    """Append one family as an OpenMetrics summary."""
+    lines.append(f"# TYPE {family} summary")
+    lines.append(f"# UNIT {family} seconds")
+    lines.append(f"# HELP {family} {_FAMILY_HELP.get(family, family)}")
+    for labels, histogram in series:
+        for q in REPORTED_QUANTILES:
+            lines.append(f"{family}{_label_text(labels, quantile=q)} {histogram.quantile(q):.9g}")
+        lines.append(f"{family}_sum{_label_text(labels)} {histogram.sum:.9g}")
+        lines.append(f"{family}_count{_label_text(labels)} {histogram.count}")
+
+
+def _label_text(labels: Dict[str, str], quantile: Optional[float] = None) -> str:
+    """Render a label set, escaping values as OpenMetrics requires."""
+    items = [(name, str(value)) for name, value in labels.items()]
+    if quantile is not None:
+        items.append(('quantile', f"{quantile:g}"))
+    if not items:
+        return ""
+    escaped = (f'{name}="{_escape(value)}"' for name, value in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value (backslash, double quote, newline)."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide registry shared by MCPClient and the nodes
+_metrics_registry: Optional[MetricsRegistry] = None
+_metrics_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    global _metrics_registry
+    if _metrics_registry is None:
+        with _metrics_registry_lock:
+            if _metrics_registry is None:
+                _metrics_registry = MetricsRegistry()
+    return _metrics_registry
@@ -6,18 +6,78 @@ Cursor Prompt: This file defines the Node class that executes workflow stages. E
 - Deterministic mode: Predictable, repeatable execution for critical stages
 - Non-deterministic mode: Flexible execution allowing variability for creative tasks
 
+Within a stage, abilities are grouped into dataflow levels from their declared
+state reads/writes (see core/dataflow.py); the abilities of one level are
+independent and run concurrently, and their results are merged in order.
+
+Abilities receive a read-only view of the node state instead of a copy of it:
+the state is copied once per execution, not once per ability attempt. Calls
+on the ability pool get a view of a snapshot taken once per level, since a
+call abandoned at its deadline can outlive the merge of the level's results.
+
+Each execution runs against a stage deadline (`timeout`, within the workflow
+deadline passed in) and each ability against its own (`ability_timeout`),
+see core/deadline.py. Calls to external servers run on the ability pool and
+are waited for with a bound (sync path) or cancelled (async path); in-process
+abilities cannot block on I/O and are checked between calls. An ability that
+runs out of its own budget is recorded as failed; a stage out of its budget
+raises DeadlineExceeded to the agent.
+
+Execution latency is recorded in a per-stage histogram (see core/metrics.py),
+so `get_performance_summary()` reports p50/p95/p99/max next to the mean.
+Each ability attempt and retry backoff is a trace span (see core/tracing.py).
+
 Extend by adding new execution modes, validation rules, or performance optimizations.
 """
 
+import os
 import time
 import random
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Callable
+import contextvars
+import threading
+from collections import deque
+from types import MappingProxyType
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Any, Mapping, Optional, Callable, Tuple
 from enum import Enum
 from core.mcp_client import MCPClient
+from core.dataflow import build_execution_levels
+from core.deadline import Deadline, DeadlineExceeded
+from core.retry import RetryBudget, RetryEngine, RetryPolicy
+from core.metrics import get_metrics_registry
+from core.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
+# Threads used to run independent abilities of a level in parallel (sync path)
+ABILITY_POOL_SIZE = 32
+_ability_executor: Optional[ThreadPoolExecutor] = None
+_ability_executor_lock = threading.Lock()
+
+
+def _get_ability_executor() -> ThreadPoolExecutor:
+    """Get the process-wide pool for parallel ability execution."""
+    global _ability_executor
+    if _ability_executor is None:
+        with _ability_executor_lock:
+            if _ability_executor is None:
+                _ability_executor = ThreadPoolExecutor(max_workers=ABILITY_POOL_SIZE,
+                                                       thread_name_prefix="node-ability")
+    return _ability_executor
+
+
+def _reset_ability_executor():
+    """Drop the pool inherited by a forked child (its threads do not survive the fork)."""
+    global _ability_executor, _ability_executor_lock
+    _ability_executor = None
+    _ability_executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_ability_executor)
+
 
 class ExecutionMode(Enum):
     """Execution modes for node processing."""
@@ -36,7 +96,16 @@ class NodeStatus(Enum):
 
 
 class Node:
-    """Represents a single node in the workflow graph."""
+    """
+    Represents a single node in the workflow graph.
+    
+    A Node is shared by every run of its agent, so `execute()` keeps all
+    per-run data in the returned state and only touches the aggregate
+    metrics below, which are guarded by a lock.
+    """
+    
+    # Bound on the quality scores and execution history kept per node
+    HISTORY_SIZE = 100
     
     def __init__(self, 
                  name: str, 
@@ -44,106 +113,210 @@ class Node:
                  mcp_client: MCPClient,
                  execution_mode: ExecutionMode = ExecutionMode.DETERMINISTIC,
                  server_type: str = 'common',  # Add server_type parameter
-                 timeout: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 ability_timeout: Optional[float] = None,
                  retry_count: int = 3,
                  quality_threshold: float = 0.8,
-                 validation_rules: Optional[List[Callable]] = None):
-        """Initialize a workflow node."""
+                 validation_rules: Optional[List[Callable]] = None,
+                 parallel_abilities: bool = False,
+                 params: Optional[Dict[str, Any]] = None,
+                 retry_engine: Optional[RetryEngine] = None):
+        """
+        Initialize a workflow node.
+        
+        ``parallel_abilities`` marks a server doing blocking I/O (Atlas): the
+        sync path runs its calls on a thread pool, independent abilities in
+        parallel, and waits for them with a bound. The async path always
+        awaits independent abilities concurrently.
+        
+        ``timeout`` bounds a whole execution and ``ability_timeout`` all the
+        attempts of one ability, both in seconds.
+        
+        ``params`` are the stage's own settings from graph_config.yaml (e.g.
+        `max_results` on `retrieve`); abilities read them from
+        `_execution_context["params"]`.
+        
+        ``retry_engine`` provides retry policies and budgets (see
+        core/retry.py); without one, abilities get ``retry_count`` attempts.
+        """
         self.name = name
         self.abilities = abilities
         self.mcp_client = mcp_client
         self.execution_mode = execution_mode
         self.server_type = server_type  # Store server type
         self.timeout = timeout or 30
+        self.ability_timeout = min(ability_timeout or self.timeout, self.timeout)
         self.retry_count = retry_count
+        self.retry_engine = retry_engine or RetryEngine(RetryPolicy(max_retries=max(0, retry_count - 1)))
         self.quality_threshold = quality_threshold
         self.validation_rules = validation_rules or []
+        self.parallel_abilities = parallel_abilities
+        self.params = dict(params or {})
+        
+        # Resolve every ability once; unknown abilities fail here, not mid-workflow
+        self._bound_abilities = {ability: mcp_client.resolve(server_type, ability) for ability in abilities}
+        self._sorted_abilities = sorted(abilities)
         
-        # Initialize execution state
+        # Dataflow levels per ability order (the deterministic order is
+        # precomputed, shuffled orders are added as they are seen)
+        self._levels_cache: Dict[Tuple[str, ...], List[List[str]]] = {}
+        self._execution_levels(self._sorted_abilities)
+        
+        # Initialize execution state (shared across runs, guarded by the lock)
+        self._metrics_lock = threading.Lock()
         self.status = NodeStatus.PENDING
-        self.execution_history = []
-        self.performance_metrics = {
-            'total_executions': 0,
-            'successful_executions': 0,
-            'average_duration': 0.0,
-            'quality_scores': []
-        }
+        self.execution_history = deque(maxlen=self.HISTORY_SIZE)
+        self.performance_metrics = self._new_performance_metrics()
+        self.latency = get_metrics_registry().histogram('stage_latency_seconds', stage=name)
+        self.tracer = get_tracer()
+        
+        logger.info("🔧 Node '%s' initialized with %d abilities in %s mode", name, len(abilities), execution_mode.value)
+    
+    def execute(self, input_data: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Execute the node's abilities with advanced error handling and monitoring.
+        
+        Raises:
+            DeadlineExceeded: the stage (or the enclosing ``deadline``) ran out of time
+        """
+        start_time = time.time()
+        execution_context = self._new_execution_context(start_time, deadline)
+        stage_deadline = execution_context["deadline"]
+        result = input_data.copy()
+        
+        try:
+            abilities, mode = self._select_abilities(result, execution_context)
+            # Visible to the abilities through their view of the state while the node runs
+            result["_execution_context"] = execution_context
+            for level in self._execution_levels(abilities):
+                stage_deadline.check()
+                result = self._execute_level(level, result, execution_context)
+            status = self._score_and_validate(result, mode)
+        except DeadlineExceeded as e:
+            self._handle_timeout(result, e, start_time, execution_context)
+            raise
+        except Exception as e:
+            status = self._handle_execution_error(result, e)
         
-        logger.info(f"🔧 Node '{name}' initialized with {len(abilities)} abilities in {execution_mode.value} mode")
+        return self._finish_execution(result, status, start_time, execution_context)
     
-    def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the node's abilities with advanced error handling and monitoring."""
+    async def aexecute(self, input_data: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Async counterpart of execute(); ability calls and retry backoff await."""
         start_time = time.time()
-        self.status = NodeStatus.IN_PROGRESS
+        execution_context = self._new_execution_context(start_time, deadline)
+        stage_deadline = execution_context["deadline"]
+        result = input_data.copy()
+        
+        try:
+            abilities, mode = self._select_abilities(result, execution_context)
+            # Visible to the abilities through their view of the state while the node runs
+            result["_execution_context"] = execution_context
+            for level in self._execution_levels(abilities):
+                stage_deadline.check()
+                result = await self._aexecute_level(level, result, execution_context)
+            status = self._score_and_validate(result, mode)
+        except DeadlineExceeded as e:
+            self._handle_timeout(result, e, start_time, execution_context)
+            raise
+        except Exception as e:
+            status = self._handle_execution_error(result, e)
         
-        execution_context = {
+        return self._finish_execution(result, status, start_time, execution_context)
+    
+    def _new_execution_context(self, start_time: float, deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """Create the per-execution context passed to every ability."""
+        return {
             "node_name": self.name,
             "execution_mode": self.execution_mode.value,
             "start_time": start_time,
-            "attempt": 1
+            "attempt": 1,
+            "params": self.params,
+            "deadline": Deadline("stage", self.name, self.timeout, parent=deadline)
         }
+    
+    def _score_and_validate(self, result: Dict[str, Any], mode: ExecutionMode) -> NodeStatus:
+        """Attach the quality score for the mode that ran and validate the results."""
+        if mode == ExecutionMode.DETERMINISTIC:
+            # Add deterministic quality score
+            result["_quality_score"] = self._calculate_deterministic_quality(result)
+        else:
+            # Add non-deterministic quality score with variance
+            base_quality = self._calculate_deterministic_quality(result)
+            variance = random.uniform(-0.1, 0.1)
+            result["_quality_score"] = max(0.0, min(1.0, base_quality + variance))
         
-        result = input_data.copy()
+        # Validate results
+        if self._validate_results(result):
+            return NodeStatus.COMPLETED
         
-        try:
-            # Execute based on mode
-            if self.execution_mode == ExecutionMode.DETERMINISTIC:
-                result = self._execute_deterministic(result, execution_context)
-            elif self.execution_mode == ExecutionMode.NON_DETERMINISTIC:
-                result = self._execute_non_deterministic(result, execution_context)
-            else:  # ADAPTIVE
-                result = self._execute_adaptive(result, execution_context)
-            
-            # Validate results
-            if self._validate_results(result):
-                self.status = NodeStatus.COMPLETED
-                self.performance_metrics["successful_executions"] += 1
-            else:
-                self.status = NodeStatus.FAILED
-                result["_validation_errors"] = "Results failed validation checks"
-                
-        except Exception as e:
-            self.status = NodeStatus.FAILED
-            result["_execution_error"] = str(e)
-            print(f"Node '{self.name}' execution failed: {str(e)}")
+        result["_validation_errors"] = "Results failed validation checks"
+        return NodeStatus.FAILED
+    
+    def _handle_execution_error(self, result: Dict[str, Any], error: Exception) -> NodeStatus:
+        """Record an unexpected execution error on the result."""
+        result["_execution_error"] = str(error)
+        logger.error("Node '%s' execution failed: %s", self.name, error)
+        return NodeStatus.FAILED
+    
+    def _handle_timeout(self, result: Dict[str, Any], error: DeadlineExceeded,
+                        start_time: float, execution_context: Dict[str, Any]):
+        """Record a stage stopped by its deadline (the caller re-raises)."""
+        result["_timeout_error"] = str(error)
+        logger.warning("Node '%s' timed out: %s", self.name, error)
+        self._finish_execution(result, NodeStatus.FAILED, start_time, execution_context)
+    
+    def _finish_execution(self, result: Dict[str, Any], status: NodeStatus,
+                          start_time: float, execution_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Update metrics and attach node metadata to the result."""
+        result.pop("_execution_context", None)
         
         # Update performance metrics
         duration = time.time() - start_time
-        self._update_performance_metrics(duration, result)
+        self._update_performance_metrics(duration, result, status, execution_context)
         
         # Add comprehensive metadata
         result["_node_metadata"] = {
             "node_name": self.name,
             "execution_mode": self.execution_mode.value,
-            "status": self.status.value,
+            "status": status.value,
             "duration": duration,
             "executed_abilities": self.abilities,
             "quality_score": result.get("_quality_score", 0.0),
             "timestamp": time.time()
         }
         
-        self.performance_metrics["total_executions"] += 1
-        self.execution_history.append(execution_context)
-        
         return result
     
-    def _execute_deterministic(self, data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute abilities in deterministic mode with consistent ordering and behavior."""
-        print(f"  [DETERMINISTIC] Executing node: {self.name}")
+    def _select_abilities(self, data: Dict[str, Any], context: Dict[str, Any]):
+        """
+        Decide which abilities run, and in what order, for this execution.
+        
+        Returns the ordered ability list and the effective mode (ADAPTIVE
+        resolves to DETERMINISTIC or NON_DETERMINISTIC).
+        """
+        mode = self.execution_mode
         
-        # Sort abilities for consistent execution order
-        sorted_abilities = sorted(self.abilities)
+        if mode == ExecutionMode.ADAPTIVE:
+            logger.debug("[ADAPTIVE] Executing node: %s", self.name)
+            
+            # Determine execution strategy based on data characteristics
+            is_critical = data.get("priority", "medium") == "high"
+            has_errors = any(key.endswith("_error") for key in data.keys())
+            
+            if is_critical or has_errors:
+                logger.debug("Switching to deterministic mode (critical: %s, errors: %s)", is_critical, has_errors)
+                mode = ExecutionMode.DETERMINISTIC
+            else:
+                logger.debug("Using non-deterministic mode for creative flexibility")
+                mode = ExecutionMode.NON_DETERMINISTIC
         
-        for ability in sorted_abilities:
-            data = self._execute_ability_with_retry(ability, data, context)
+        if mode == ExecutionMode.DETERMINISTIC:
+            logger.debug("[DETERMINISTIC] Executing node: %s", self.name)
+            
+            # Abilities are pre-sorted for consistent execution order
+            return self._sorted_abilities, mode
         
-        # Add deterministic quality score
-        data["_quality_score"] = self._calculate_deterministic_quality(data)
-        return data
-    
-    def _execute_non_deterministic(self, data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute abilities in non-deterministic mode with randomization and creativity."""
-        print(f"  [NON-DETERMINISTIC] Executing node: {self.name}")
+        logger.debug("[NON-DETERMINISTIC] Executing node: %s", self.name)
         
         # Randomize ability execution order
         shuffled_abilities = self.abilities.copy()
@@ -153,67 +326,208 @@ class Node:
         context["creativity_factor"] = random.uniform(0.7, 1.3)
         context["exploration_mode"] = True
         
+        selected = []
         for ability in shuffled_abilities:
             # Randomly skip some abilities based on context
             if random.random() > 0.9 and len(shuffled_abilities) > 1:
-                print(f"    Skipping ability: {ability} (non-deterministic choice)")
+                logger.debug("Skipping ability: %s (non-deterministic choice)", ability)
                 continue
-                
-            data = self._execute_ability_with_retry(ability, data, context)
+            selected.append(ability)
+        
+        return selected, mode
+    
+    def _execution_levels(self, abilities: List[str]) -> List[List[str]]:
+        """Group an ordered ability list into dataflow levels."""
+        key = tuple(abilities)
+        levels = self._levels_cache.get(key)
+        if levels is None:
+            levels = build_execution_levels(abilities, lambda ability: self._bound_abilities[ability].dataflow)
+            self._levels_cache[key] = levels
+        return levels
+    
+    def _execute_level(self, level: List[str], data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one dataflow level; external calls run on the ability pool with bounded waits."""
+        stage_deadline = context["deadline"]
+        if not self.parallel_abilities:
+            # In-process abilities: nothing to wait for, the deadline is checked between calls
+            for ability in level:
+                stage_deadline.check()
+                ability_deadline = stage_deadline.child("ability", ability, self.ability_timeout)
+                data = self._merge_ability_result(
+                    ability, data, self._call_ability_with_retry(ability, data, context, ability_deadline))
+            return data
+        
+        # Every ability reads a snapshot of the state taken for the level, not the
+        # live dict: a call abandoned at its deadline may still be running while
+        # the results are merged. The calling thread only waits, so a hung
+        # external call cannot hold it past the deadlines
+        executor = _get_ability_executor()
+        snapshot = MappingProxyType(dict(data))
+        calls = []
+        for ability in level:
+            ability_deadline = stage_deadline.child("ability", ability, self.ability_timeout)
+            # In the caller's context, so trace spans on the pool keep their parent
+            future = executor.submit(contextvars.copy_context().run, self._call_ability_with_retry,
+                                     ability, snapshot, context, ability_deadline)
+            calls.append((ability, future, ability_deadline))
+        results = [self._bounded_result(ability, future, ability_deadline)
+                   for ability, future, ability_deadline in calls]
         
-        # Add non-deterministic quality score with variance
-        base_quality = self._calculate_deterministic_quality(data)
-        variance = random.uniform(-0.1, 0.1)
-        data["_quality_score"] = max(0.0, min(1.0, base_quality + variance))
+        # Merge in declaration order so the outcome matches sequential execution
+        for ability, ability_result in zip(level, results):
+            self._merge_ability_result(ability, data, ability_result)
+        return data
+    
+    def _bounded_result(self, ability: str, future: Future, deadline: Deadline) -> Any:
+        """Wait for an ability call until its deadline; a call still running is abandoned."""
+        try:
+            return future.result(timeout=deadline.timeout())
+        except FutureTimeoutError:
+            future.cancel()
+            return self._timeout_result(ability, deadline)
+    
+    async def _aexecute_level(self, level: List[str], data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Async counterpart of _execute_level; independent abilities are awaited concurrently."""
+        if len(level) == 1:
+            return self._merge_ability_result(level[0], data, await self._acall_bounded(level[0], data, context))
         
+        results = await asyncio.gather(*(self._acall_bounded(ability, data, context) for ability in level))
+        for ability, ability_result in zip(level, results):
+            self._merge_ability_result(ability, data, ability_result)
         return data
     
-    def _execute_adaptive(self, data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute abilities in adaptive mode, switching between deterministic and non-deterministic based on context."""
-        print(f"  [ADAPTIVE] Executing node: {self.name}")
+    async def _acall_bounded(self, ability: str, data: Dict[str, Any], context: Dict[str, Any]) -> Any:
+        """Call an ability with retries; an external call is cancelled at its deadline."""
+        stage_deadline = context["deadline"]
+        stage_deadline.check()
+        ability_deadline = stage_deadline.child("ability", ability, self.ability_timeout)
+        call = self._acall_ability_with_retry(ability, data, context, ability_deadline)
+        if not self.parallel_abilities:
+            return await call
         
-        # Determine execution strategy based on data characteristics
-        is_critical = data.get("priority", "medium") == "high"
-        has_errors = any(key.endswith("_error") for key in data.keys())
+        try:
+            return await asyncio.wait_for(call, ability_deadline.timeout())
+        except asyncio.TimeoutError:
+            return self._timeout_result(ability, ability_deadline)
+    
+    def _call_ability_with_retry(self, ability: str, data: Mapping[str, Any], context: Dict[str, Any],
+                                 deadline: Deadline) -> Any:
+        """Call a single ability with retry logic; returns its result without touching ``data``."""
+        bound = self._bound_abilities[ability]
+        policy = self.retry_engine.policy_for(ability, bound.server_name)
+        budget = self.retry_engine.budget_for(bound.server_name)
+        budget.record_request()
         
-        if is_critical or has_errors:
-            print(f"    Switching to deterministic mode (critical: {is_critical}, errors: {has_errors})")
-            return self._execute_deterministic(data, context)
-        else:
-            print(f"    Using non-deterministic mode for creative flexibility")
-            return self._execute_non_deterministic(data, context)
+        attempts, delay = 0, None
+        while True:
+            attempts += 1
+            logger.debug("Executing ability: %s (attempt %d)", ability, attempts)
+            with self.tracer.span(ability, "ability", stage=self.name, attempt=attempts):
+                try:
+                    result, error = self.mcp_client.invoke(bound, self._ability_input(data), deadline), None
+                    if not policy.retries_result(result):
+                        return result
+                except Exception as e:
+                    if not policy.retries_error(e):
+                        return self._failure_result(ability, e, attempts)
+                    result, error = None, e
+            
+            delay = self._next_retry_delay(ability, attempts, policy, budget, delay, deadline, error or result)
+            if delay is None:
+                return self._failure_result(ability, error, attempts) if error is not None else result
+            with self.tracer.span("retry_backoff", "backoff", ability=ability, delay=delay):
+                time.sleep(delay)
     
-    def _execute_ability_with_retry(self, ability: str, data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a single ability with retry logic."""
-        for attempt in range(self.retry_count):
-            try:
-                print(f"    Executing ability: {ability} (attempt {attempt + 1})")
-                
-                # Add execution context to the ability call
-                enhanced_data = data.copy()
-                enhanced_data["_execution_context"] = context
-                
-                # Use the correct MCPClient method: call(server_name, ability_name, context)
-                ability_result = self.mcp_client.call(self.server_type, ability, enhanced_data)
-                
-                # Merge results intelligently
-                if isinstance(ability_result, dict):
-                    data.update(ability_result)
-                else:
-                    data[f"{ability}_result"] = ability_result
-                
-                return data
-                
-            except Exception as e:
-                print(f"    Attempt {attempt + 1} failed for ability '{ability}': {str(e)}")
-                if attempt == self.retry_count - 1:
-                    data[f"{ability}_error"] = str(e)
-                    data[f"{ability}_failed_attempts"] = self.retry_count
-                else:
-                    time.sleep(0.5 * (attempt + 1))  # Exponential backoff
+    async def _acall_ability_with_retry(self, ability: str, data: Dict[str, Any], context: Dict[str, Any],
+                                        deadline: Deadline) -> Any:
+        """Async counterpart of _call_ability_with_retry; backoff does not block the loop."""
+        bound = self._bound_abilities[ability]
+        policy = self.retry_engine.policy_for(ability, bound.server_name)
+        budget = self.retry_engine.budget_for(bound.server_name)
+        budget.record_request()
+        
+        attempts, delay = 0, None
+        while True:
+            attempts += 1
+            logger.debug("Executing ability: %s (attempt %d)", ability, attempts)
+            with self.tracer.span(ability, "ability", stage=self.name, attempt=attempts):
+                try:
+                    result, error = await self.mcp_client.ainvoke(bound, self._ability_input(data), deadline), None
+                    if not policy.retries_result(result):
+                        return result
+                except Exception as e:
+                    if not policy.retries_error(e):
+                        return self._failure_result(ability, e, attempts)
+                    result, error = None, e
+            
+            delay = self._next_retry_delay(ability, attempts, policy, budget, delay, deadline, error or result)
+            if delay is None:
+                return self._failure_result(ability, error, attempts) if error is not None else result
+            with self.tracer.span("retry_backoff", "backoff", ability=ability, delay=delay):
+                await asyncio.sleep(delay)
+    
+    def _next_retry_delay(self, ability: str, attempts: int, policy: RetryPolicy, budget: RetryBudget,
+                          previous_delay: Optional[float], deadline: Deadline, failure: Any) -> Optional[float]:
+        """Report a failed attempt; returns the backoff before the next one, or None to give up."""
+        reason = failure.get('error', 'success: False') if isinstance(failure, dict) else str(failure)
+        logger.warning("Attempt %d failed for ability '%s': %s", attempts, ability, reason)
+        if attempts > policy.max_retries:
+            return None
+        
+        delay = policy.next_delay(previous_delay, self.retry_engine.rng)
+        if deadline.remaining() <= delay:
+            # The next attempt could not start before the deadline
+            return None
+        if not budget.try_acquire():
+            logger.warning("Retry budget exhausted, not retrying '%s'", ability)
+            return None
+        return delay
+    
+    def _timeout_result(self, ability: str, deadline: Deadline) -> Dict[str, Any]:
+        """
+        Result of an ability stopped at its deadline.
+        
+        Raises:
+            DeadlineExceeded: when the stage or workflow deadline stopped it
+        """
+        error = DeadlineExceeded(deadline.bound)
+        if deadline.bound is not deadline:
+            raise error
+        logger.warning("Ability '%s' timed out: %s", ability, error)
+        return {
+            f"{ability}_error": str(error),
+            f"{ability}_timed_out": True
+        }
+    
+    @staticmethod
+    def _ability_input(data: Mapping[str, Any]) -> Mapping[str, Any]:
+        """Build the context passed to an ability call."""
+        # Read-only view instead of a copy: abilities return their changes, which
+        # are merged only after the call. A view is live, so calls on the pool get
+        # a snapshot of the level's state instead (see _execute_level)
+        if isinstance(data, MappingProxyType):
+            return data
+        return MappingProxyType(data)
+    
+    @staticmethod
+    def _merge_ability_result(ability: str, data: Dict[str, Any], ability_result: Any) -> Dict[str, Any]:
+        """Merge an ability result into the node state."""
+        # Merge results intelligently
+        if isinstance(ability_result, dict):
+            data.update(ability_result)
+        else:
+            data[f"{ability}_result"] = ability_result
         
         return data
     
+    @staticmethod
+    def _failure_result(ability: str, error: Optional[Exception], attempts: int) -> Dict[str, Any]:
+        """Result recorded for an ability whose attempts were all exhausted."""
+        return {
+            f"{ability}_error": str(error),
+            f"{ability}_failed_attempts": attempts
+        }
+    
     def _validate_results(self, data: Dict[str, Any]) -> bool:
         """Validate execution results using quality threshold and custom rules."""
         # Check quality threshold
@@ -227,7 +541,7 @@ class Node:
                 if not rule(data):
                     return False
             except Exception as e:
-                print(f"Validation rule failed: {str(e)}")
+                logger.warning("Validation rule failed: %s", e)
                 return False
         
         return True
@@ -249,46 +563,64 @@ class Node:
         
         return min(1.0, base_score + field_bonus)
     
-    def _update_performance_metrics(self, duration: float, result: Dict[str, Any]):
+    @staticmethod
+    def _new_performance_metrics() -> Dict[str, Any]:
+        """Create an empty performance metrics record."""
+        return {
+            "total_executions": 0,
+            "successful_executions": 0,
+            "average_duration": 0.0,
+            "quality_scores": deque(maxlen=Node.HISTORY_SIZE)
+        }
+    
+    def _update_performance_metrics(self, duration: float, result: Dict[str, Any],
+                                    status: NodeStatus, execution_context: Dict[str, Any]):
         """Update node performance metrics."""
-        # Update average duration
-        total_execs = self.performance_metrics["total_executions"]
-        current_avg = self.performance_metrics["average_duration"]
-        new_avg = (current_avg * total_execs + duration) / (total_execs + 1)
-        self.performance_metrics["average_duration"] = new_avg
-        
-        # Track quality scores
         quality_score = result.get("_quality_score", 0.0)
-        self.performance_metrics["quality_scores"].append(quality_score)
+        self.latency.record(duration)
         
-        # Keep only last 100 quality scores
-        if len(self.performance_metrics["quality_scores"]) > 100:
-            self.performance_metrics["quality_scores"] = self.performance_metrics["quality_scores"][-100:]
+        with self._metrics_lock:
+            # Update average duration
+            total_execs = self.performance_metrics["total_executions"]
+            current_avg = self.performance_metrics["average_duration"]
+            new_avg = (current_avg * total_execs + duration) / (total_execs + 1)
+            self.performance_metrics["average_duration"] = new_avg
+            self.performance_metrics["total_executions"] = total_execs + 1
+            if status == NodeStatus.COMPLETED:
+                self.performance_metrics["successful_executions"] += 1
+            
+            # Track the last HISTORY_SIZE quality scores and executions
+            self.performance_metrics["quality_scores"].append(quality_score)
+            self.execution_history.append(execution_context)
+            self.status = status
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get a summary of node performance metrics."""
-        quality_scores = self.performance_metrics["quality_scores"]
+        with self._metrics_lock:
+            quality_scores = list(self.performance_metrics["quality_scores"])
+            total_executions = self.performance_metrics["total_executions"]
+            successful_executions = self.performance_metrics["successful_executions"]
+            average_duration = self.performance_metrics["average_duration"]
+            status = self.status
+        
         return {
             "node_name": self.name,
             "execution_mode": self.execution_mode.value,
-            "total_executions": self.performance_metrics["total_executions"],
-            "success_rate": (self.performance_metrics["successful_executions"] / 
-                           max(1, self.performance_metrics["total_executions"])),
-            "average_duration": self.performance_metrics["average_duration"],
+            "total_executions": total_executions,
+            "success_rate": successful_executions / max(1, total_executions),
+            "average_duration": average_duration,
+            "latency": self.latency.summary(),
             "average_quality": sum(quality_scores) / len(quality_scores) if quality_scores else 0.0,
-            "current_status": self.status.value
+            "current_status": status.value
         }
     
     def reset_performance_metrics(self):
         """Reset performance tracking metrics."""
-        self.performance_metrics = {
-            "total_executions": 0,
-            "successful_executions": 0,
-            "average_duration": 0.0,
-            "quality_scores": []
-        }
-        self.execution_history = []
-        self.status = NodeStatus.PENDING
+        with self._metrics_lock:
+            self.performance_metrics = self._new_performance_metrics()
+            self.latency.reset()
+            self.execution_history = deque(maxlen=self.HISTORY_SIZE)
+            self.status = NodeStatus.PENDING
     
     def __repr__(self) -> str:
         """String representation of the node."""
@@ -0,0 +1,376 @@
+"""
+Compiles `graph_config.yaml` into a validated **ExecutionPlan**.
+
+The plan is built once when the agent starts:
+- every stage is checked (name, mode, server) and turned into a StagePlan
+- every ability is checked against the `servers:` section of the config and
+  resolved on the connected MCP server, so a typo fails at startup instead
+  of in the middle of a workflow
+- abilities listed under `settings.result_cache` are checked to exist and
+  to declare their reads
+- per-server `circuit_breaker` and `bulkhead` sections are checked
+- `settings.coalescing` is checked, and its abilities must exist and declare
+  their reads, like those of the result cache
+- the retry settings (`settings.max_retries`, `settings.retry`) are checked,
+  and their per-ability overrides must name declared abilities
+- `settings.log_level` must name a standard logging level
+- `settings.checkpoints` must describe a valid checkpoint store
+- `settings.scheduling` must describe valid lanes and SLA targets
+- a stage's `wait_for` (park until the customer replies) must name the
+  state field the reply arrives in, and needs checkpoints to park runs in
+- a stage's `run_if` and the `when` of its `next` edges are compiled into
+  Predicates (see core/predicates.py); an edge may only `goto` a later stage
+- stage and workflow time budgets are read and checked (see core/deadline.py)
+- the remaining stage keys (max_results, relevance_threshold, ...) are kept
+  as stage parameters
+
+Nodes are then built from the StagePlans and execute pre-resolved abilities
+(see `MCPClient.resolve()`), with no name lookups on the hot path.
+
+How to extend:
+- New stage keys with a fixed meaning: add them to StagePlan and to
+  `_STAGE_KEYS` so they are not passed through as parameters
+- New validation rules: append to `errors` in `compile_plan()`
+"""
+
+from typing import Dict, Any, List, Optional
+
+from core.checkpoint_store import CheckpointStore
+from core.coalescing import CallCoalescer, WorkflowCoalescer
+from core.dataflow import ANY_FIELD
+from core.isolation import Bulkhead, CircuitBreaker
+from core.logging_config import log_level_from_settings
+from core.mcp_client import MCPClient
+from core.node import ExecutionMode
+from core.predicates import Predicate, PredicateError
+from core.retry import RetryEngine
+from core.scheduler import DeadlineScheduler
+
+
+class PlanError(ValueError):
+    """Raised when graph_config.yaml does not describe a runnable workflow."""
+
+
+# Stage keys interpreted by the compiler; anything else becomes a stage parameter
+_STAGE_KEYS = frozenset({"name", "description", "mode", "server", "abilities", "timeout_seconds",
+                         "ability_timeout_seconds", "quality_threshold", "wait_for", "run_if", "next"})
+
+# Stage timeout when a stage sets none
+DEFAULT_STAGE_TIMEOUT = 30
+
+
+class WaitCondition:
+    """When a run parks before a stage: ``field`` not delivered yet while ``when`` is truthy."""
+
+    __slots__ = ("field", "when")
+
+    def __init__(self, field: str, when: Optional[str] = None):
+        self.field = field
+        self.when = when
+
+    def should_park(self, state: Dict[str, Any]) -> bool:
+        """Whether a run in ``state`` has to wait before the stage."""
+        return state.get(self.field) is None and (self.when is None or bool(state.get(self.when)))
+
+    def __repr__(self) -> str:
+        return f"WaitCondition(field='{self.field}', when={self.when!r})"
+
+
+class Edge:
+    """A conditional jump after a stage: straight to stage ``goto`` when ``when`` holds."""
+
+    __slots__ = ("when", "goto")
+
+    def __init__(self, when: Predicate, goto: str):
+        self.when = when
+        self.goto = goto
+
+    def __repr__(self) -> str:
+        return f"Edge(when={self.when.source!r}, goto='{self.goto}')"
+
+
+class StagePlan:
+    """A validated, pre-resolved stage of the workflow."""
+
+    def __init__(self,
+                 name: str,
+                 position: int,
+                 mode: ExecutionMode,
+                 server: str,
+                 abilities: List[str],
+                 timeout: Optional[float],
+                 ability_timeout: Optional[float],
+                 quality_threshold: float,
+                 parallel_abilities: bool,
+                 params: Dict[str, Any],
+                 wait_for: Optional[WaitCondition] = None,
+                 run_if: Optional[Predicate] = None,
+                 edges: Optional[List[Edge]] = None):
+        self.name = name
+        self.position = position
+        self.mode = mode
+        self.server = server
+        self.abilities = abilities
+        self.timeout = timeout
+        self.ability_timeout = ability_timeout
+        self.quality_threshold = quality_threshold
+        self.parallel_abilities = parallel_abilities
+        self.params = params
+        self.wait_for = wait_for
+        # Skip the stage unless this holds when it is reached
+        self.run_if = run_if
+        # Checked in order once the stage completes; the first that holds skips ahead
+        self.edges = edges or []
+
+    def __repr__(self) -> str:
+        return f"StagePlan(name='{self.name}', server='{self.server}', abilities={self.abilities})"
+
+
+class ExecutionPlan:
+    """Ordered, validated stages of a workflow."""
+
+    def __init__(self,
+                 stages: List[StagePlan],
+                 max_workflow_time: Optional[float] = None,
+                 fallback_responses: Optional[Dict[str, str]] = None):
+        self.stages = stages
+        self.max_workflow_time = max_workflow_time
+        self.fallback_responses = fallback_responses or {}
+        self._by_name = {stage.name: stage for stage in stages}
+
+    def stage(self, name: str) -> StagePlan:
+        """Get a stage by name."""
+        return self._by_name[name]
+
+    def __iter__(self):
+        return iter(self.stages)
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+
+def compile_plan(config: Dict[str, Any], mcp_client: MCPClient) -> ExecutionPlan:
+    """
+    Validate the workflow configuration and resolve every stage and ability.
+
+    Raises:
+        PlanError: listing every problem found in the configuration
+    """
+    errors: List[str] = []
+    servers_config = config.get('servers') or {}
+    stages_config = config.get('stages') or []
+
+    if not stages_config:
+        errors.append("no stages defined")
+
+    # Every ability a server section declares must exist on that server
+    for server_name, server_config in servers_config.items():
+        if server_name not in mcp_client.servers:
+            errors.append(f"servers.{server_name}: server is not connected")
+            continue
+        for ability in (server_config or {}).get('abilities', []):
+            try:
+                mcp_client.resolve(server_name, ability)
+            except LookupError as e:
+                errors.append(f"servers.{server_name}: {e}")
+        try:
+            CircuitBreaker.from_config(server_name, (server_config or {}).get('circuit_breaker'))
+            Bulkhead.from_config(server_name, (server_config or {}).get('bulkhead'))
+        except (TypeError, ValueError) as e:
+            errors.append(f"servers.{server_name}: {e}")
+
+    settings = config.get('settings') or {}
+
+    # Memoized abilities must exist and declare what they read (their cache key)
+    cache_config = settings.get('result_cache') or {}
+    for ability in (cache_config.get('abilities') or {}):
+        servers = [name for name, server_config in servers_config.items()
+                   if ability in (server_config or {}).get('abilities', [])]
+        if not servers:
+            errors.append(f"settings.result_cache: ability '{ability}' is not declared on any server")
+        for server_name in servers:
+            if ANY_FIELD in mcp_client.get_ability_dataflow(server_name, ability).reads:
+                errors.append(f"settings.result_cache: {server_name}.{ability} does not declare its reads, so it cannot be cached")
+
+    # Coalesced abilities, like memoized ones, must exist and declare their reads (their flight key)
+    coalescing_config = settings.get('coalescing') or {}
+    try:
+        CallCoalescer.from_config(coalescing_config)
+        WorkflowCoalescer.from_config(coalescing_config)
+    except (TypeError, ValueError) as e:
+        errors.append(f"settings.coalescing: {e}")
+    coalesced = coalescing_config.get('abilities') if coalescing_config.get('enabled', False) else None
+    for ability in (coalesced if isinstance(coalesced, list) else []):
+        servers = [name for name, server_config in servers_config.items()
+                   if ability in (server_config or {}).get('abilities', [])]
+        if not servers:
+            errors.append(f"settings.coalescing: ability '{ability}' is not declared on any server")
+        for server_name in servers:
+            if ANY_FIELD in mcp_client.get_ability_dataflow(server_name, ability).reads:
+                errors.append(f"settings.coalescing: {server_name}.{ability} does not declare its reads, so it cannot be coalesced")
+
+    # Retry settings must build a valid engine; overrides must name real abilities
+    try:
+        RetryEngine.from_config(settings, servers_config)
+    except (TypeError, ValueError) as e:
+        errors.append(f"settings.retry: {e}")
+    declared_abilities = {ability for server_config in servers_config.values()
+                          for ability in (server_config or {}).get('abilities', [])}
+    for ability in ((settings.get('retry') or {}).get('abilities') or {}):
+        if ability not in declared_abilities:
+            errors.append(f"settings.retry: ability '{ability}' is not declared on any server")
+
+    try:
+        log_level_from_settings(settings)
+    except ValueError as e:
+        errors.append(f"settings.log_level: {e}")
+
+    checkpoints_enabled = False
+    try:
+        checkpoints_enabled = CheckpointStore.from_config(settings.get('checkpoints')) is not None
+    except (TypeError, ValueError) as e:
+        errors.append(f"settings.checkpoints: {e}")
+
+    try:
+        DeadlineScheduler.from_config(settings.get('scheduling'))
+    except (TypeError, ValueError) as e:
+        errors.append(f"settings.scheduling: {e}")
+
+    performance = settings.get('performance') or {}
+    max_workflow_time = _positive_seconds(performance, 'max_total_workflow_time_seconds',
+                                          "settings.performance", errors)
+    timeout_buffer = _positive_seconds(performance, 'stage_timeout_buffer_seconds',
+                                       "settings.performance", errors) or 0
+
+    stages: List[StagePlan] = []
+    seen_names = set()
+    for position, stage_config in enumerate(stages_config, 1):
+        name = stage_config.get('name')
+        where = f"stages[{position}] ({name or 'unnamed'})"
+        if not name:
+            errors.append(f"{where}: missing 'name'")
+            continue
+        if name in seen_names:
+            errors.append(f"{where}: duplicate stage name")
+        seen_names.add(name)
+
+        mode_str = stage_config.get('mode', 'deterministic')
+        try:
+            mode = ExecutionMode(mode_str)
+        except ValueError:
+            errors.append(f"{where}: unknown mode '{mode_str}'")
+            mode = ExecutionMode.DETERMINISTIC
+
+        server = stage_config.get('server', 'common')
+        server_config = servers_config.get(server)
+        if server_config is None:
+            errors.append(f"{where}: server '{server}' is not defined under 'servers'")
+            server_config = {}
+
+        abilities = stage_config.get('abilities') or []
+        if not abilities:
+            errors.append(f"{where}: no abilities")
+        # Declared abilities were resolved above, so this also covers the server side
+        declared = set(server_config.get('abilities', []))
+        for ability in abilities:
+            if ability not in declared:
+                errors.append(f"{where}: ability '{ability}' is not declared under servers.{server}.abilities")
+
+        timeout = _positive_seconds(stage_config, 'timeout_seconds', where, errors) or DEFAULT_STAGE_TIMEOUT
+        ability_timeout = _positive_seconds(stage_config, 'ability_timeout_seconds', where, errors)
+        if ability_timeout is None:
+            # Leave the buffer for the rest of the stage when one ability overruns
+            ability_timeout = timeout - timeout_buffer if timeout > timeout_buffer else timeout
+
+        wait_for = _wait_condition(stage_config.get('wait_for'), where, errors)
+        if wait_for is not None and not checkpoints_enabled:
+            errors.append(f"{where}: 'wait_for' parks runs in the checkpoint store, enable settings.checkpoints")
+
+        run_if = None
+        if stage_config.get('run_if') is not None:
+            try:
+                run_if = Predicate(stage_config['run_if'])
+            except PredicateError as e:
+                errors.append(f"{where}: 'run_if': {e}")
+
+        stages.append(StagePlan(
+            name=name,
+            position=position,
+            mode=mode,
+            server=server,
+            abilities=list(abilities),
+            timeout=timeout,
+            ability_timeout=min(ability_timeout, timeout),
+            quality_threshold=stage_config.get('quality_threshold', 0.8),
+            # External servers block on I/O, so their independent abilities run in parallel
+            parallel_abilities=server_config.get('type') == 'external',
+            params={key: value for key, value in stage_config.items() if key not in _STAGE_KEYS},
+            wait_for=wait_for,
+            run_if=run_if,
+            edges=_edges(stage_config.get('next'), where, errors)
+        ))
+
+    # Edges only skip ahead, so every workflow still ends
+    positions = {stage.name: stage.position for stage in stages}
+    for stage in stages:
+        for edge in stage.edges:
+            if positions.get(edge.goto, 0) <= stage.position:
+                errors.append(f"stages[{stage.position}] ({stage.name}): 'next' can only go to a later stage, "
+                              f"got '{edge.goto}'")
+
+    if errors:
+        raise PlanError("Invalid workflow configuration:\n  - " + "\n  - ".join(errors))
+
+    return ExecutionPlan(stages,
+                         max_workflow_time=max_workflow_time,
+                         fallback_responses=(settings.get('error_handling') or {}).get('fallback_responses'))
+
+
+def _wait_condition(value: Any, where: str, errors: List[str]) -> Optional[WaitCondition]:
+    """Read a stage's optional `wait_for: {field, when}`."""
+    if value is None:
+        return None
+    if not isinstance(value, dict) or not isinstance(value.get('field'), str) or not value['field']:
+        errors.append(f"{where}: 'wait_for' must be a mapping with the state 'field' to wait for, got {value!r}")
+        return None
+    when = value.get('when')
+    if when is not None and not isinstance(when, str):
+        errors.append(f"{where}: 'wait_for.when' must name a state field, got {when!r}")
+        return None
+    unknown = set(value) - {'field', 'when'}
+    if unknown:
+        errors.append(f"{where}: unknown 'wait_for' keys {sorted(unknown)}")
+    return WaitCondition(value['field'], when)
+
+
+def _edges(value: Any, where: str, errors: List[str]) -> List[Edge]:
+    """Read a stage's optional `next: [{when, goto}, ...]`."""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        errors.append(f"{where}: 'next' must be a list of {{when, goto}} edges, got {value!r}")
+        return []
+    edges = []
+    for index, edge in enumerate(value):
+        if not isinstance(edge, dict) or not isinstance(edge.get('goto'), str) or 'when' not in edge:
+            errors.append(f"{where}: 'next[{index}]' must be a mapping with 'when' and 'goto', got {edge!r}")
+            continue
+        unknown = set(edge) - {'when', 'goto'}
+        if unknown:
+            errors.append(f"{where}: unknown 'next[{index}]' keys {sorted(unknown)}")
+        try:
+            edges.append(Edge(Predicate(edge['when']), edge['goto']))
+        except PredicateError as e:
+            errors.append(f"{where}: 'next[{index}].when': {e}")
+    return edges
+
+
+def _positive_seconds(section: Dict[str, Any], key: str, where: str, errors: List[str]) -> Optional[float]:
+    """Read an optional duration in seconds; a non-positive or non-numeric value is an error."""
+    value = section.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        errors.append(f"{where}: '{key}' must be a positive number of seconds, got {value!r}")
+        return None
+    return float(value)
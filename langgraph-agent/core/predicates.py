@@ -0,0 +1,198 @@
+"""
+Conditions on the workflow state, for `run_if` and `next` in graph_config.yaml (**Predicate**).
+
+A predicate is a Python expression over state fields, parsed and compiled
+into nested closures once when the plan is compiled; evaluating one is a
+few dictionary lookups, with no `eval()`:
+
+    run_if: "clarification_needed"
+    run_if: "not escalation_required"
+    next:
+      - when: "request_category == 'billing' and priority != 'critical'"
+        goto: "create"
+
+Supported:
+- state fields by name, nested fields with `.`, items with `[0]` / `['key']`
+- literals: numbers, strings, True/False/None, lists and tuples of literals
+- `and`, `or`, `not`, `==`, `!=`, `<`, `<=`, `>`, `>=`, `in`, `not in`,
+  `is`, `is not`, and `len()`
+
+A missing field (or item) is None rather than an error, and an ordering
+comparison with None or a value of another type is false, so a predicate
+never fails a workflow; anything else is rejected when the config loads.
+
+How to extend:
+- More functions: add them to `_FUNCTIONS` (they get the evaluated arguments)
+"""
+
+import ast
+import operator
+from typing import Any, Callable, Dict, Mapping
+
+# Compiled expression: state -> value
+Evaluator = Callable[[Mapping[str, Any]], Any]
+
+_COMPARISONS: Dict[type, Callable[[Any, Any], bool]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: right is not None and left in right,
+    ast.NotIn: lambda left, right: right is None or left not in right,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+# Subscript wrapper of Python 3.8 (the index itself from 3.9 on)
+_INDEX = getattr(ast, 'Index', ())
+
+_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    'len': lambda value: 0 if value is None else len(value),
+}
+
+
+class PredicateError(ValueError):
+    """Raised for an expression that is not a valid predicate."""
+
+
+class Predicate:
+    """A compiled condition on the workflow state."""
+
+    __slots__ = ("source", "_evaluate")
+
+    def __init__(self, source: str):
+        """
+        Parse and compile ``source``.
+
+        Raises:
+            PredicateError: ``source`` is not a supported expression
+        """
+        if not isinstance(source, str) or not source.strip():
+            raise PredicateError(f"a predicate must be a non-empty expression, got {source!r}")
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as e:
+            raise PredicateError(f"invalid predicate {source!r}: {e.msg}") from None
+        self.source = source
+        self._evaluate = _compile(tree.body, source.strip())
+
+    def __call__(self, state: Mapping[str, Any]) -> bool:
+        """Whether the condition holds for ``state``."""
+        return bool(self._evaluate(state))
+
+    def __repr__(self) -> str:
+        return f"Predicate({self.source!r})"
+
+
+def _compile(node: ast.AST, source: str) -> Evaluator:
+    """Compile one expression node into a closure over the state."""
+    if isinstance(node, ast.Name):
+        if node.id in ('True', 'False', 'None'):
+            value = {'True': True, 'False': False, 'None': None}[node.id]
+            return lambda state: value
+        name = node.id
+        return lambda state: state.get(name)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda state: value
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        items = tuple(_literal(element, source) for element in node.elts)
+        return lambda state: items
+
+    if isinstance(node, ast.Attribute):
+        get_parent, attribute = _compile(node.value, source), node.attr
+        return lambda state: _item(get_parent(state), attribute)
+
+    if isinstance(node, ast.Subscript):
+        get_parent, key = _compile(node.value, source), _literal(node.slice, source)
+        return lambda state: _item(get_parent(state), key)
+
+    if isinstance(node, ast.BoolOp):
+        # Nested pairs short-circuit like Python's own `and` / `or`
+        combined = _compile(node.values[0], source)
+        for value in node.values[1:]:
+            combined = _combine(isinstance(node.op, ast.And), combined, _compile(value, source))
+        return combined
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        operand = _compile(node.operand, source)
+        if isinstance(node.op, ast.Not):
+            return lambda state: not operand(state)
+        return lambda state: _negate(operand(state))
+
+    if isinstance(node, ast.Compare):
+        operands = [_compile(node.left, source)] + [_compile(right, source) for right in node.comparators]
+        comparisons = []
+        for op in node.ops:
+            if type(op) not in _COMPARISONS:
+                raise PredicateError(f"unsupported comparison in predicate {source!r}")
+            comparisons.append(_COMPARISONS[type(op)])
+
+        def compare(state: Mapping[str, Any]) -> bool:
+            left = operands[0](state)
+            for compare_values, get_right in zip(comparisons, operands[1:]):
+                right = get_right(state)
+                try:
+                    if not compare_values(left, right):
+                        return False
+                except TypeError:
+                    # None or mismatched types: the condition does not hold
+                    return False
+                left = right
+            return True
+        return compare
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS \
+            and not node.keywords:
+        function = _FUNCTIONS[node.func.id]
+        arguments = [_compile(argument, source) for argument in node.args]
+
+        def call(state: Mapping[str, Any]) -> Any:
+            try:
+                return function(*(argument(state) for argument in arguments))
+            except TypeError:
+                return None
+        return call
+
+    raise PredicateError(f"unsupported expression '{_text(node, source)}' in predicate {source!r}")
+
+
+def _combine(conjunction: bool, left: Evaluator, right: Evaluator) -> Evaluator:
+    if conjunction:
+        return lambda state: left(state) and right(state)
+    return lambda state: left(state) or right(state)
+
+
+def _literal(node: ast.AST, source: str) -> Any:
+    """The value of a literal (an index, a list item)."""
+    if isinstance(node, _INDEX):
+        # Python 3.8 wraps subscripts in ast.Index
+        node = node.value
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise PredicateError(f"'{_text(node, source)}' in predicate {source!r} must be a literal") from None
+
+
+def _text(node: ast.AST, source: str) -> str:
+    """The source text of ``node`` (``ast.unparse()`` needs Python 3.9)."""
+    return ast.get_source_segment(source, node) or ast.dump(node)
+
+
+def _item(container: Any, key: Any) -> Any:
+    """``container[key]``, or None when there is no such item."""
+    try:
+        return container[key]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _negate(value: Any) -> Any:
+    try:
+        return -value
+    except TypeError:
+        return None
@@ -0,0 +1,451 @@
+"""
+Pre-fork worker pool (**PreforkExecutor**), behind `run_batch(executor="prefork")`.
+
+    python agent.py --input tickets.jsonl --output results.jsonl --executor prefork --workers 8
+
+The master process builds everything that is read-only during a run
+before forking: the parsed config and compiled plan (the agent), the
+servers, the knowledge base index and the keyword matchers (see
+`LangGraphAgent.warm_up()`). It then calls `gc.freeze()` (once), which
+moves all of it out of the collector's reach, so the cyclic GC in a worker
+never writes to those objects' headers and their pages stay shared
+copy-on-write. Finally it forks a single-threaded **template** process,
+before starting any thread of its own, and every worker (the first ones
+and their replacements) is forked from the template. A replacement is
+thus never forked from the master while its threads (the dispatcher, the
+log writer, the caller's) may hold a lock of the tracer, metrics, caches
+or bulkheads, and it starts from the warmed-up state of the first
+workers rather than from whatever the master has allocated since.
+
+Each worker has its own local queue: a pipe to the master, which hands it
+the next ticket as soon as it has returned the previous one. The master
+knows what every worker holds, so:
+- a worker that dies (segfault, OOM kill, `os._exit`) is replaced by a
+  fresh fork of the template, and its ticket goes to another worker; a
+  ticket that has crashed `max_task_attempts` workers fails with
+  WorkerCrashedError instead of taking down the pool
+- SIGTERM drains: no new tickets are taken (`draining` is set and
+  `run_batch()` stops reading its input), the tickets already handed out
+  (with `settings.scheduling`, already read into its window) finish, and
+  the workers exit. With `run_jsonl()` the checkpoint then
+  covers every written result, so `--resume` carries on from there.
+
+Workers and the template ignore SIGINT and SIGTERM, so the signals sent
+to a whole process group reach the master's drain logic only. Requires
+the fork start method and passing file descriptors over Unix sockets
+(Linux, macOS).
+
+How to extend:
+- Other workloads: `submit()` any picklable function; forked workers see
+  the master's module state as it was when the executor was created
+"""
+
+import atexit
+import gc
+import itertools
+import logging
+import os
+import signal
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A ticket running when its worker died is retried until it has crashed this many workers
+DEFAULT_MAX_TASK_ATTEMPTS = 2
+
+# Executors not shut down yet, stopped at interpreter exit
+_live_executors: "weakref.WeakSet[PreforkExecutor]" = weakref.WeakSet()
+_exit_hook_registered = False
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised for a task whose workers kept dying while running it."""
+
+
+class _Task:
+    """A submitted call and the future of its result."""
+
+    __slots__ = ("task_id", "future", "fn", "args", "kwargs", "attempts")
+
+    def __init__(self, task_id: int, future: Future, fn: Callable, args: tuple, kwargs: dict):
+        self.task_id = task_id
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = 0
+
+
+class _Worker:
+    """Master-side handle of one forked worker."""
+
+    __slots__ = ("pid", "conn", "task")
+
+    def __init__(self, pid: int, conn: Any):
+        self.pid = pid
+        self.conn = conn
+        self.task: Optional[_Task] = None
+
+
+def _template_main(control: Any):
+    """
+    Template loop: fork a worker for each pipe the master sends, report worker exit codes.
+
+    Requests on ``control``: ``("spawn",)`` followed by the worker's end of
+    its pipe (answered with the worker's pid), ``("reap", pid)`` (answered
+    with its exit code), and None to stop once every worker has exited.
+    """
+    from multiprocessing.connection import Connection
+    from multiprocessing.reduction import recv_handle
+
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            request = control.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        if request[0] == "spawn":
+            fd = recv_handle(control)
+            pid = os.fork()
+            if pid == 0:
+                code = 1
+                try:
+                    control.close()
+                    _worker_main(Connection(fd))
+                    code = 0
+                finally:
+                    os._exit(code)
+            os.close(fd)
+            control.send(pid)
+        elif request[0] == "reap":
+            try:
+                _, status = os.waitpid(request[1], 0)
+                control.send(_decode_wait_status(status))
+            except ChildProcessError:
+                control.send(None)
+    while True:
+        try:
+            os.wait()
+        except ChildProcessError:
+            break
+
+
+def _decode_wait_status(status: int) -> int:
+    """Exit code of a wait() status, minus the signal number if killed (``os.waitstatus_to_exitcode()`` of Python 3.9)."""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _worker_main(conn: Any):
+    """Worker loop: run each task received from the master and send back its outcome."""
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        task_id, fn, args, kwargs = task
+        try:
+            outcome = (task_id, True, fn(*args, **kwargs))
+        except Exception as e:
+            outcome = (task_id, False, e)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # The result (or exception) could not be pickled
+            conn.send((task_id, False, RuntimeError(f"unpicklable task outcome: {e}")))
+
+
+class PreforkExecutor(Executor):
+    """Executor whose workers are forked from this process once it is warmed up."""
+
+    def __init__(self,
+                 workers: int,
+                 max_task_attempts: int = DEFAULT_MAX_TASK_ATTEMPTS,
+                 handle_sigterm: bool = True):
+        """
+        Fork ``workers`` processes from the current state of this process.
+
+        Warm up everything the workers should share before creating the
+        executor (see `LangGraphAgent.warm_up()`).
+
+        Args:
+            workers: Number of worker processes
+            max_task_attempts: Crashed workers a task may cost before it fails
+            handle_sigterm: Drain on SIGTERM (only possible from the main thread)
+
+        Raises:
+            RuntimeError: the platform cannot fork
+        """
+        import multiprocessing
+        import multiprocessing.connection
+        import multiprocessing.reduction
+        if "fork" not in multiprocessing.get_all_start_methods() or not multiprocessing.reduction.HAVE_SEND_HANDLE:
+            raise RuntimeError("the prefork executor needs the fork start method")
+        self._context = multiprocessing.get_context("fork")
+        self._wait = multiprocessing.connection.wait
+        self._send_handle = multiprocessing.reduction.send_handle
+
+        self.max_task_attempts = max_task_attempts
+        self.draining = False
+        self._shutdown = False
+        self._lock = threading.Lock()
+        self._queue: Deque[_Task] = deque()
+        self._task_ids = itertools.count(1)
+        # By the master's end of each worker's pipe
+        self._workers: Dict[Any, _Worker] = {}
+        self._stats = {'workers': workers, 'completed': 0, 'failed': 0, 'restarts': 0, 'crashed_tasks': 0}
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+
+        # Everything allocated so far is shared with the workers: keep the GC off it.
+        # The template is forked before this executor starts a thread of its own
+        gc.freeze()
+        self._template_conn, template_conn = self._context.Pipe()
+        self._template = self._context.Process(target=_template_main, args=(template_conn,),
+                                               name="prefork-template", daemon=True)
+        self._template.start()
+        template_conn.close()
+        for _ in range(workers):
+            self._spawn()
+
+        self._handles_sigterm = handle_sigterm and threading.current_thread() is threading.main_thread()
+        if self._handles_sigterm:
+            self._previous_sigterm = signal.signal(signal.SIGTERM, self._on_sigterm)
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="prefork-dispatcher", daemon=True)
+        self._dispatcher.start()
+        _register_executor(self)
+        logger.info("Forked %d prefork workers", workers)
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        """Queue ``fn(*args, **kwargs)`` for the next idle worker."""
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            future = Future()
+            self._queue.append(_Task(next(self._task_ids), future, fn, args, kwargs))
+            self._wake()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """Let the workers finish the queued tasks (or cancel them), then stop them."""
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    self._queue.popleft().future.cancel()
+            self._wake()
+        _live_executors.discard(self)
+        if wait:
+            self._dispatcher.join()
+        if self._handles_sigterm and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._previous_sigterm)
+            self._handles_sigterm = False
+
+    def get_stats(self) -> Dict[str, int]:
+        """Worker count, completed and failed tasks, worker restarts and tasks lost to crashes."""
+        with self._lock:
+            return dict(self._stats)
+
+    def worker_pids(self) -> List[int]:
+        """PIDs of the live workers."""
+        with self._lock:
+            return [worker.pid for worker in self._workers.values()]
+
+    def _on_sigterm(self, signum, frame):
+        if not self.draining:
+            logger.warning("SIGTERM received, draining: finishing tickets in progress, taking no new ones")
+        self.draining = True
+
+    def _wake(self):
+        """Interrupt the dispatcher's wait (lock held)."""
+        if self._wakeup_write is None:
+            return
+        try:
+            os.write(self._wakeup_write, b"\0")
+        except BlockingIOError:
+            pass
+
+    def _spawn(self) -> bool:
+        """Have the template fork one worker; False when the template is gone."""
+        parent_conn, child_conn = self._context.Pipe()
+        try:
+            self._template_conn.send(("spawn",))
+            self._send_handle(self._template_conn, child_conn.fileno(), self._template.pid)
+            pid = self._template_conn.recv()
+        except (EOFError, OSError) as e:
+            logger.error("Prefork template process is gone, cannot fork a worker: %s", e)
+            parent_conn.close()
+            return False
+        finally:
+            child_conn.close()
+        self._workers[parent_conn] = _Worker(pid, parent_conn)
+        return True
+
+    def _exit_code(self, pid: int) -> Optional[int]:
+        """Exit code of a worker that exited, from the template (its parent)."""
+        try:
+            self._template_conn.send(("reap", pid))
+            return self._template_conn.recv()
+        except (EOFError, OSError):
+            return None
+
+    def _dispatch(self):
+        """Hand queued tasks to idle workers, collect results and replace dead workers."""
+        try:
+            while True:
+                with self._lock:
+                    if not self._workers:
+                        self._fail_queued(WorkerCrashedError("no prefork workers left"))
+                    self._assign()
+                    if self._shutdown and not self._queue and all(w.task is None for w in self._workers.values()):
+                        break
+                    handles = [self._wakeup_read, *self._workers]
+                for ready in self._wait(handles):
+                    if ready == self._wakeup_read:
+                        try:
+                            os.read(self._wakeup_read, 4096)
+                        except BlockingIOError:
+                            pass
+                    else:
+                        self._receive(ready)
+        finally:
+            self._stop_workers()
+
+    def _assign(self):
+        """Send the next queued tasks to idle workers (lock held)."""
+        for worker in self._workers.values():
+            if worker.task is not None:
+                continue
+            task = self._next_task()
+            if task is None:
+                return
+            task.attempts += 1
+            worker.task = task
+            try:
+                worker.conn.send((task.task_id, task.fn, task.args, task.kwargs))
+            except (OSError, ValueError):
+                # The worker died since the last wait; _reap() requeues the task
+                pass
+            except Exception as e:
+                # The task itself cannot be pickled
+                worker.task = None
+                self._stats['failed'] += 1
+                task.future.set_exception(e)
+
+    def _next_task(self) -> Optional[_Task]:
+        """The next queued task that was not cancelled (lock held)."""
+        while self._queue:
+            task = self._queue.popleft()
+            # Requeued tasks are running already
+            if task.attempts or task.future.set_running_or_notify_cancel():
+                return task
+        return None
+
+    def _receive(self, conn: Any):
+        """Resolve the future of a task a worker has finished, or reap the worker if it is gone."""
+        try:
+            outcome = conn.recv()
+        except (EOFError, OSError):
+            # Only the worker held the other end: it exited
+            self._reap(conn)
+            return
+        with self._lock:
+            worker = self._workers.get(conn)
+            if worker is not None:
+                self._complete(worker, outcome)
+
+    def _fail_queued(self, error: Exception):
+        """Fail every queued task (lock held)."""
+        while self._queue:
+            task = self._queue.popleft()
+            if task.attempts or task.future.set_running_or_notify_cancel():
+                self._stats['failed'] += 1
+                task.future.set_exception(error)
+
+    def _complete(self, worker: _Worker, outcome: Tuple[int, bool, Any]):
+        """Resolve the future of the task a worker sent the outcome of (lock held)."""
+        task_id, ok, value = outcome
+        task, worker.task = worker.task, None
+        if task is None or task.task_id != task_id:
+            return
+        self._stats['completed' if ok else 'failed'] += 1
+        if ok:
+            task.future.set_result(value)
+        else:
+            task.future.set_exception(value)
+
+    def _reap(self, conn: Any):
+        """Replace a dead worker and requeue (or fail) the task it was running."""
+        with self._lock:
+            worker = self._workers.pop(conn, None)
+            if worker is None:
+                return
+            # Outcomes sent before it died were received before the EOF
+            conn.close()
+            exitcode = self._exit_code(worker.pid)
+            task = worker.task
+            logger.warning("Prefork worker %s exited with code %s%s", worker.pid, exitcode,
+                           f" while running task {task.task_id}" if task is not None else "")
+            if task is not None:
+                self._stats['crashed_tasks'] += 1
+                if task.attempts < self.max_task_attempts:
+                    self._queue.appendleft(task)
+                else:
+                    self._stats['failed'] += 1
+                    task.future.set_exception(WorkerCrashedError(
+                        f"task {task.task_id} crashed {task.attempts} workers "
+                        f"(last exit code {exitcode})"))
+            if (not self._shutdown or self._queue) and self._spawn():
+                self._stats['restarts'] += 1
+
+    def _stop_workers(self):
+        """Ask every worker to exit, and wait for them."""
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+            os.close(self._wakeup_read)
+            os.close(self._wakeup_write)
+            self._wakeup_write = None
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.conn.close()
+        # The template exits once every worker has
+        try:
+            self._template_conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self._template.join()
+        self._template_conn.close()
+
+
+def _register_executor(executor: PreforkExecutor):
+    """Have ``executor`` shut down at interpreter exit if nobody else does."""
+    global _exit_hook_registered
+    _live_executors.add(executor)
+    if not _exit_hook_registered:
+        # Registered after multiprocessing's own exit hook, so it runs first:
+        # that one SIGTERMs and joins daemon children, and workers ignore SIGTERM
+        atexit.register(_shutdown_at_exit)
+        _exit_hook_registered = True
+
+
+def _shutdown_at_exit():
+    for executor in list(_live_executors):
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,161 @@
+"""
+Opt-in memoization of ability results (**AbilityResultCache**).
+
+Many abilities are pure functions of a few state fields. For the abilities
+listed in `settings.result_cache.abilities` of graph_config.yaml, MCPClient
+keeps their results keyed on a fingerprint of the fields each ability
+declares it reads (`ABILITY_DATAFLOW`), so a repeat ticket about the same
+incident reuses the earlier result instead of recomputing it.
+
+- Fingerprint: BLAKE2b of the canonical JSON of the declared read fields
+  present in the context (a missing field and a None field differ)
+- Bounded LRU over all abilities, plus a TTL per ability
+- Only successful dict results are stored; every hit returns a deep copy, so
+  callers can never mutate a cached result
+- Hit/miss/eviction/expiration counters, in total and per ability, are
+  exposed through `MCPClient.get_cache_stats()`
+
+MCPClient re-stamps the `*_timestamp` fields of a hit with the time of the
+call, so a cached result never reports when another ticket computed it.
+
+How to extend:
+- Only list abilities whose result depends on nothing but their declared
+  reads (no clock, randomness or external state they are expected to see)
+- Abilities that read `*` cannot be cached; declare their reads first
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+from core.dataflow import ANY_FIELD
+
+# (server, ability, fingerprint of the declared reads)
+CacheKey = Tuple[str, str, str]
+
+
+class AbilityResultCache:
+    """Size-bounded LRU of ability results with per-ability TTLs."""
+
+    def __init__(self,
+                 abilities: Mapping[str, Optional[float]],
+                 max_entries: int = 1024,
+                 default_ttl: Optional[float] = 300.0):
+        """
+        Args:
+            abilities: Cached ability names -> TTL in seconds (None = default_ttl)
+            max_entries: Entries kept over all abilities before LRU eviction
+            default_ttl: TTL for abilities without their own (None = no expiry)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._ttls: Dict[str, Optional[float]] = {
+            ability: default_ttl if ttl is None else ttl for ability, ttl in abilities.items()
+        }
+        self._entries: "OrderedDict[CacheKey, Tuple[Optional[float], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_config(cls, cache_config: Optional[Dict[str, Any]]) -> Optional["AbilityResultCache"]:
+        """Build the cache from `settings.result_cache`; None when disabled."""
+        if not cache_config or not cache_config.get('enabled', False):
+            return None
+        abilities = {
+            name: (options or {}).get('ttl_seconds')
+            for name, options in (cache_config.get('abilities') or {}).items()
+        }
+        return cls(abilities,
+                   max_entries=cache_config.get('max_entries', 1024),
+                   default_ttl=cache_config.get('default_ttl_seconds', 300.0))
+
+    def caches(self, ability_name: str) -> bool:
+        """Whether results of this ability are cached."""
+        return ability_name in self._ttls
+
+    @staticmethod
+    def fingerprint(reads: FrozenSet[str], context: Mapping[str, Any]) -> Optional[str]:
+        """Hash of the declared read fields of ``context``; None if the reads are undeclared."""
+        if ANY_FIELD in reads:
+            return None
+        fields = {field: context[field] for field in sorted(reads) if field in context}
+        encoded = json.dumps(fields, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+    def key_for(self, server_name: str, ability_name: str,
+                reads: FrozenSet[str], context: Mapping[str, Any]) -> Optional[CacheKey]:
+        """Cache key for a call, or None if the call is not cacheable."""
+        if ability_name not in self._ttls:
+            return None
+        fingerprint = self.fingerprint(reads, context)
+        if fingerprint is None:
+            return None
+        return (server_name, ability_name, fingerprint)
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss."""
+        ability_name = key[1]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at is not None and time.monotonic() >= expires_at:
+                    del self._entries[key]
+                    self._count(ability_name, 'expirations')
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+            self._count(ability_name, 'hits' if entry is not None else 'misses')
+        return copy.deepcopy(result) if entry is not None else None
+
+    def put(self, key: CacheKey, result: Any):
+        """Store a successful dict result; failures and non-dict results are skipped."""
+        if not isinstance(result, dict) or result.get('success') is False:
+            return
+        ability_name = key[1]
+        ttl = self._ttls[ability_name]
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        stored = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = (expires_at, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                (_, evicted_ability, _), _ = self._entries.popitem(last=False)
+                self._count(evicted_ability, 'evictions')
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _count(self, ability_name: str, counter: str):
+        """Increment a per-ability counter (caller holds the lock)."""
+        stats = self._stats.get(ability_name)
+        if stats is None:
+            stats = self._stats[ability_name] = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        stats[counter] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction/expiration counters, in total and per ability."""
+        with self._lock:
+            per_ability = {name: dict(stats) for name, stats in self._stats.items()}
+            entries = len(self._entries)
+
+        totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        for stats in per_ability.values():
+            for counter, value in stats.items():
+                totals[counter] += value
+        lookups = totals['hits'] + totals['misses']
+
+        return {
+            **totals,
+            'hit_rate': totals['hits'] / lookups if lookups else 0.0,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'abilities': per_ability
+        }
@@ -0,0 +1,249 @@
+"""
+Config-driven retries for ability calls (**RetryEngine**).
+
+Driven by graph_config.yaml:
+
+    settings:
+      max_retries: 3              # retries after the first attempt
+      retry_delay_seconds: 5      # base backoff delay
+      retry:
+        max_delay_seconds: 30
+        retry_on_failure_result: true
+        budget: {ratio: 0.2, burst: 10}
+        in_process: {retry_delay_seconds: 0.05, max_delay_seconds: 0.5}
+        abilities:                # per-ability overrides of the keys above
+          knowledge_base_search: {max_retries: 2, retry_delay_seconds: 1}
+
+- Only transient failures are retried. A call to a server of type
+  "external" (Atlas) is retried when it raises, and (unless disabled) when
+  it returns a result with `success: False`, which is how MCPClient reports
+  errors. An in-process server (Common) fails the same way every time, so
+  its calls are only retried for results marked `retryable: True` (a full
+  bulkhead), with the sub-second delays of `in_process`. Results marked
+  `retryable: False` are never retried.
+- Backoff uses decorrelated jitter: each delay is drawn uniformly between the
+  base delay and three times the previous one, capped at the max delay, so
+  clients failing together do not retry in lockstep.
+- A **RetryBudget** per server caps the extra load retries can add during an
+  outage: every first attempt earns `ratio` of a retry token (up to `burst`
+  tokens), every retry spends one. Once a server keeps failing, retries stop
+  at about `ratio` of its traffic instead of multiplying it.
+
+Node asks the engine for the policy of an ability and the budget of its
+server; the stage/ability deadlines (core/deadline.py) still apply on top.
+
+How to extend:
+- New per-ability knobs: add them to RetryPolicy and to `_POLICY_KEYS`
+- Other retry conditions: override `RetryPolicy.retries_result()`
+"""
+
+import random
+import threading
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+# Delays of in-process servers, under settings.retry.in_process
+IN_PROCESS_DEFAULTS = {'retry_delay_seconds': 0.05, 'max_delay_seconds': 0.5}
+
+# settings keys of a policy -> RetryPolicy argument
+_POLICY_KEYS = {
+    'max_retries': 'max_retries',
+    'retry_delay_seconds': 'base_delay',
+    'max_delay_seconds': 'max_delay',
+    'retry_on_failure_result': 'retry_on_failure_result',
+}
+
+
+class RetryPolicy:
+    """How often and how fast to retry one ability."""
+
+    __slots__ = ("max_retries", "base_delay", "max_delay", "retry_on_failure_result", "transient_failures")
+
+    def __init__(self,
+                 max_retries: int = 2,
+                 base_delay: float = 0.5,
+                 max_delay: float = 30.0,
+                 retry_on_failure_result: bool = True,
+                 transient_failures: bool = True):
+        """
+        Args:
+            transient_failures: Whether failures not marked `retryable` may
+                go away on retry (external servers); False retries only
+                results marked `retryable: True`
+        """
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError("retry delays must satisfy 0 <= retry_delay_seconds <= max_delay_seconds")
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on_failure_result = retry_on_failure_result
+        self.transient_failures = transient_failures
+
+    def with_overrides(self, overrides: Mapping[str, Any]) -> "RetryPolicy":
+        """A copy of this policy with settings keys (see `_POLICY_KEYS`) replaced."""
+        unknown = set(overrides) - set(_POLICY_KEYS)
+        if unknown:
+            raise ValueError(f"unknown retry settings: {', '.join(sorted(unknown))}")
+        values = {argument: getattr(self, argument) for argument in _POLICY_KEYS.values()}
+        values.update({_POLICY_KEYS[key]: value for key, value in overrides.items()})
+        return RetryPolicy(transient_failures=self.transient_failures, **values)
+
+    def for_transient_failures(self, transient_failures: bool) -> "RetryPolicy":
+        """A copy of this policy for a server whose unmarked failures are (not) transient."""
+        values = {argument: getattr(self, argument) for argument in _POLICY_KEYS.values()}
+        return RetryPolicy(transient_failures=transient_failures, **values)
+
+    def retries_result(self, result: Any) -> bool:
+        """Whether a returned result counts as a failed attempt worth retrying."""
+        if not (self.retry_on_failure_result and isinstance(result, dict) and result.get('success') is False):
+            return False
+        retryable = result.get('retryable')
+        return retryable is True or (retryable is None and self.transient_failures)
+
+    def retries_error(self, error: BaseException) -> bool:
+        """Whether an exception raised by a call is worth retrying."""
+        return self.transient_failures
+
+    def next_delay(self, previous: Optional[float], rng: random.Random) -> float:
+        """Decorrelated jitter backoff: uniform in [base, 3 x previous delay], capped."""
+        previous = self.base_delay if previous is None else previous
+        return min(self.max_delay, rng.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    def __repr__(self) -> str:
+        return (f"RetryPolicy(max_retries={self.max_retries}, base_delay={self.base_delay}, "
+                f"max_delay={self.max_delay}, retry_on_failure_result={self.retry_on_failure_result}, "
+                f"transient_failures={self.transient_failures})")
+
+
+class RetryBudget:
+    """Token bucket allowing retries up to a fraction of first attempts."""
+
+    def __init__(self, ratio: float = 0.2, burst: float = 10.0):
+        """
+        Args:
+            ratio: Retry tokens earned per first attempt
+            burst: Bucket size, i.e. retries allowed with no traffic history
+        """
+        if ratio < 0 or burst < 1:
+            raise ValueError("retry budget needs ratio >= 0 and burst >= 1")
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'rejected': 0}
+
+    def record_request(self):
+        """Credit the budget for a first attempt."""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend a token for one retry; False when the budget is exhausted."""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._stats['retries'] += 1
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request/retry/rejection counters and the tokens left."""
+        with self._lock:
+            return {**self._stats, 'tokens': round(self._tokens, 3)}
+
+
+class RetryEngine:
+    """Retry policies per ability and retry budgets per server."""
+
+    def __init__(self,
+                 default_policy: Optional[RetryPolicy] = None,
+                 ability_overrides: Optional[Mapping[str, Mapping[str, Any]]] = None,
+                 budget_ratio: float = 0.2,
+                 budget_burst: float = 10.0,
+                 seed: Optional[int] = None,
+                 in_process_policy: Optional[RetryPolicy] = None,
+                 external_servers: Iterable[str] = ()):
+        """
+        Args:
+            default_policy: Policy of external servers' abilities
+            ability_overrides: Ability name -> settings keys replaced in its
+                server's policy
+            in_process_policy: Policy of the other servers' abilities
+                (defaults to `default_policy` with `IN_PROCESS_DEFAULTS`)
+            external_servers: Names of the servers of type "external"
+        """
+        self.default_policy = (default_policy or RetryPolicy()).for_transient_failures(True)
+        self.in_process_policy = (in_process_policy or self.default_policy.with_overrides(IN_PROCESS_DEFAULTS)
+                                  ).for_transient_failures(False)
+        self.ability_overrides = {ability: dict(overrides or {})
+                                  for ability, overrides in (ability_overrides or {}).items()}
+        self.external_servers = frozenset(external_servers)
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+        self.rng = random.Random(seed)
+        self._policies: Dict[Tuple[Optional[str], str], RetryPolicy] = {}
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._budgets_lock = threading.Lock()
+        # Invalid overrides fail here rather than on the first call
+        for ability in self.ability_overrides:
+            self.policy_for(ability, None)
+
+    @classmethod
+    def from_config(cls, settings: Optional[Dict[str, Any]],
+                    servers_config: Optional[Dict[str, Any]] = None) -> "RetryEngine":
+        """
+        Build the engine from the `settings` and `servers` sections of graph_config.yaml.
+
+        Raises:
+            ValueError: for invalid retry settings
+        """
+        settings = settings or {}
+        retry_config = settings.get('retry') or {}
+        base = {key: retry_config[key] for key in ('max_delay_seconds', 'retry_on_failure_result')
+                if key in retry_config}
+        for key in ('max_retries', 'retry_delay_seconds'):
+            if key in settings:
+                base[key] = settings[key]
+        default_policy = RetryPolicy().with_overrides(base)
+        in_process_policy = default_policy.with_overrides({**IN_PROCESS_DEFAULTS,
+                                                           **(retry_config.get('in_process') or {})})
+
+        external_servers = [name for name, server_config in (servers_config or {}).items()
+                            if (server_config or {}).get('type') == 'external']
+        budget = retry_config.get('budget') or {}
+        return cls(default_policy, retry_config.get('abilities'),
+                   budget_ratio=budget.get('ratio', 0.2),
+                   budget_burst=budget.get('burst', 10.0),
+                   in_process_policy=in_process_policy,
+                   external_servers=external_servers)
+
+    def policy_for(self, ability_name: str, server_name: Optional[str]) -> RetryPolicy:
+        """The retry policy of an ability on a server (external, or in-process)."""
+        key = (server_name, ability_name)
+        policy = self._policies.get(key)
+        if policy is None:
+            policy = self.default_policy if server_name in self.external_servers else self.in_process_policy
+            overrides = self.ability_overrides.get(ability_name)
+            if overrides:
+                policy = policy.with_overrides(overrides)
+            self._policies[key] = policy
+        return policy
+
+    def budget_for(self, server_name: str) -> RetryBudget:
+        """The retry budget shared by every ability of a server."""
+        budget = self._budgets.get(server_name)
+        if budget is None:
+            with self._budgets_lock:
+                budget = self._budgets.get(server_name)
+                if budget is None:
+                    budget = self._budgets[server_name] = RetryBudget(self.budget_ratio, self.budget_burst)
+        return budget
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retry budget counters per server."""
+        with self._budgets_lock:
+            budgets = dict(self._budgets)
+        return {server: budget.get_stats() for server, budget in budgets.items()}
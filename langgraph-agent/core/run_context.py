@@ -0,0 +1,106 @@
+"""
+Per-run context for a single workflow execution.
+
+A **RunContext** owns everything that belongs to one ticket going through the
+pipeline: the workflow state, its id and the status of each stage. The agent
+creates a fresh context for every `run()` call and returns it, so a single
+LangGraphAgent (and its shared Node objects) can serve many concurrent runs.
+
+How to extend:
+- Add per-run bookkeeping (timings, traces, checkpoints) here rather than on
+  the agent or on Node instances, which are shared between runs
+"""
+
+import copy
+from typing import Dict, Any, Optional
+
+from core.deadline import Deadline
+
+
+class RunContext:
+    """State and bookkeeping for one workflow execution."""
+
+    def __init__(self, workflow_id: str, state: Dict[str, Any]):
+        """Create a context around an initial workflow state."""
+        self.workflow_id = workflow_id
+        self.state = state
+        self.stage_statuses: Dict[str, str] = {}
+        # Time budget of the whole run (set by the agent when the run starts)
+        self.deadline: Optional[Deadline] = None
+        # Plan index of the next stage to run (past 0 for a resumed run)
+        self.next_stage = 0
+        # Shallow copy of the state at the last checkpoint and the sequence
+        # number of that checkpoint (see core/checkpoint_store.py); None when
+        # the run is not checkpointed
+        self.checkpointed: Optional[Dict[str, Any]] = None
+        self.checkpoint_seq = 0
+        # Whether this is a duplicate ticket attached to the run of the
+        # original (see core/coalescing.py) rather than a run of its own
+        self.attached = False
+
+    @property
+    def status(self) -> Optional[str]:
+        """Current workflow status ('running', 'completed', 'failed', ...)."""
+        return self.state.get('workflow_status')
+
+    @property
+    def parked(self) -> bool:
+        """Whether the workflow is parked, waiting for an event (see LangGraphAgent.resume)."""
+        return self.status == 'waiting'
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the workflow completed without errors."""
+        return self.status == 'completed'
+
+    def attach(self) -> "RunContext":
+        """Copy of this run for a duplicate ticket attached to it: same workflow id, own copy of the state."""
+        attached = RunContext(self.workflow_id, copy.deepcopy(self.state))
+        attached.stage_statuses = dict(self.stage_statuses)
+        attached.next_stage = self.next_stage
+        attached.attached = True
+        return attached
+
+    def record_stage(self, stage_name: str, status: str):
+        """Record the node status reported for a stage."""
+        self.stage_statuses[stage_name] = status
+
+    def summary(self) -> Dict[str, Any]:
+        """Get a summary of the workflow execution."""
+        state = self.state
+        customer = state.get('customer', {})
+
+        summary = {
+            'workflow_id': state.get('workflow_id'),
+            'status': state.get('workflow_status'),
+            'total_stages': state.get('total_stages'),
+            'completed_stages': len([r for r in state.get('stage_results', {}).values() if r.get('status') == 'completed']),
+            'skipped_stages': len([r for r in state.get('stage_results', {}).values() if r.get('status') == 'skipped']),
+            'total_duration_ms': state.get('total_duration_ms'),
+            'customer_info': {
+                'name': customer.get('name'),
+                'email': customer.get('email'),
+                'tier': customer.get('tier')
+            },
+            'case_info': {
+                'case_id': state.get('case_id'),
+                'priority': state.get('priority'),
+                'category': state.get('category')
+            }
+        }
+
+        if self.attached:
+            summary['attached'] = True
+
+        if self.parked:
+            summary['waiting_for'] = state.get('waiting_for')
+
+        if state.get('error'):
+            summary['error'] = state['error']
+            summary['failed_stage'] = state.get('failed_stage')
+
+        return summary
+
+    def __repr__(self) -> str:
+        """String representation of the run context."""
+        return f"RunContext(workflow_id='{self.workflow_id}', status={self.status})"
@@ -0,0 +1,296 @@
+"""
+Deadline-aware ticket scheduling for batches (**DeadlineScheduler**).
+
+    settings:
+      scheduling:
+        enabled: true
+        policy: "edf"            # or "fifo": arrival order, same SLA report
+        window: 1000             # tickets read ahead of the pool to choose from
+        promote_at_risk: 0.1     # share of its SLA left when a ticket overtakes every lane
+        lanes:                   # first match wins; earlier lanes are served first
+          - {name: "critical", when: "request.urgency == 'critical' and customer_context.subscription_tier in ['enterprise', 'premium']"}
+          - {name: "bulk"}
+        sla_targets: {critical: "1_hour", high: "4_hours", medium: "24_hours", low: "72_hours"}
+
+With scheduling enabled, `run_batch()` (and so `agent.py --input`) no
+longer hands tickets to the pool in input order. It reads up to `window`
+tickets ahead into a ScheduleQueue and keeps two tickets per worker in
+the pool, so the pool's own FIFO queue stays short (a worker that
+finishes finds its next ticket waiting) and the scheduler picks nearly
+every ticket when a worker is about to need it:
+- each ticket gets an SLA deadline when it is read: its arrival plus the
+  response time of its contract (`customer_context.contract_details.
+  sla_response_time`, e.g. "15_minutes"), or else the `sla_targets` entry
+  for its `request.urgency`
+- each ticket goes to the first lane whose `when` (a Predicate on the
+  payload, see core/predicates.py) holds; a lane without `when` takes the
+  rest
+- the first non-empty lane is served, earliest deadline first (EDF).
+  A ticket with less than `promote_at_risk` of its SLA left, and not yet
+  late, is served before any lane, so bulk work cannot be starved into
+  missing its own SLA by a steady stream of priority tickets
+
+Every batch reports (`LangGraphAgent.get_schedule_stats()`), per lane,
+the tickets, their queue waits, the SLA misses and the misses **caused by
+queueing**: tickets whose processing alone fitted their SLA, but not
+after the time they spent waiting for a worker. Queue waits are also
+recorded as `queue_wait_seconds{lane}` (see core/metrics.py).
+
+How to extend:
+- Other deadlines: override `DeadlineScheduler.sla_seconds()`
+- Other orderings: add a policy to `ScheduleQueue.pop()`
+"""
+
+import heapq
+import itertools
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core.metrics import LatencyHistogram, get_metrics_registry
+from core.predicates import Predicate
+
+POLICIES = ("edf", "fifo")
+
+DEFAULT_WINDOW = 1000
+DEFAULT_PROMOTE_AT_RISK = 0.1
+
+# Response targets by request urgency, for tickets whose contract sets none
+DEFAULT_SLA_TARGETS = {'critical': "1_hour", 'high': "4_hours", 'medium': "24_hours", 'low': "72_hours"}
+
+_UNIT_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400, 'week': 604800}
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)[\s_]*(second|minute|hour|day|week)s?\s*$", re.IGNORECASE)
+
+
+def parse_duration(value: Any) -> Optional[float]:
+    """Seconds in a duration like "15_minutes", "4 hours" or a number of seconds; None if not one."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    match = _DURATION.match(value) if isinstance(value, str) else None
+    if match is None:
+        return None
+    return float(match.group(1)) * _UNIT_SECONDS[match.group(2).lower()]
+
+
+class Lane:
+    """A priority lane: the tickets ``when`` holds for (every ticket without a condition)."""
+
+    __slots__ = ("name", "when")
+
+    def __init__(self, name: str, when: Optional[Predicate] = None):
+        self.name = name
+        self.when = when
+
+    def __repr__(self) -> str:
+        return f"Lane(name='{self.name}', when={self.when.source if self.when else None!r})"
+
+
+class Ticket:
+    """A payload waiting in (or taken from) a ScheduleQueue."""
+
+    __slots__ = ("index", "payload", "lane", "arrived", "deadline", "promote_at", "sla", "started")
+
+    def __init__(self, index: int, payload: Dict[str, Any], lane: int, arrived: float, sla: float,
+                 promote_at_risk: float):
+        self.index = index
+        self.payload = payload
+        self.lane = lane
+        self.arrived = arrived
+        self.sla = sla
+        self.deadline = arrived + sla
+        # From here on the ticket may miss its SLA unless it runs next
+        self.promote_at = self.deadline - sla * promote_at_risk
+        self.started: Optional[float] = None
+
+
+class DeadlineScheduler:
+    """Lanes, SLA targets and policy of batch scheduling; builds one ScheduleQueue per batch."""
+
+    def __init__(self,
+                 lanes: Optional[List[Lane]] = None,
+                 sla_targets: Optional[Dict[str, Any]] = None,
+                 policy: str = "edf",
+                 window: int = DEFAULT_WINDOW,
+                 promote_at_risk: float = DEFAULT_PROMOTE_AT_RISK):
+        """
+        Create a scheduler; a lane for the tickets no lane takes is added last if needed.
+
+        Raises:
+            ValueError: unknown policy, a window below 1, ``promote_at_risk``
+                outside [0, 1) or an SLA target that is not a duration
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(POLICIES)}, got {policy!r}")
+        if isinstance(window, bool) or not isinstance(window, int) or window < 1:
+            raise ValueError(f"window must be a positive number of tickets, got {window!r}")
+        if isinstance(promote_at_risk, bool) or not isinstance(promote_at_risk, (int, float)) \
+                or not 0 <= promote_at_risk < 1:
+            raise ValueError(f"promote_at_risk must be a share of the SLA in [0, 1), got {promote_at_risk!r}")
+        targets = dict(DEFAULT_SLA_TARGETS, **(sla_targets or {}))
+        self.sla_targets: Dict[str, float] = {}
+        for urgency, target in targets.items():
+            seconds = parse_duration(target)
+            if seconds is None:
+                raise ValueError(f"sla_targets.{urgency} must be a duration like '4_hours', got {target!r}")
+            self.sla_targets[urgency] = seconds
+        self.lanes = list(lanes or [])
+        # Tickets no lane takes go to a lane of their own, served last
+        if not self.lanes or self.lanes[-1].when is not None:
+            self.lanes.append(Lane("default"))
+        self.policy = policy
+        self.window = window
+        self.promote_at_risk = float(promote_at_risk)
+
+    @classmethod
+    def from_config(cls, scheduling_config: Optional[Dict[str, Any]]) -> Optional["DeadlineScheduler"]:
+        """
+        Build the scheduler from `settings.scheduling`; None when disabled.
+
+        Raises:
+            ValueError: invalid settings (including an invalid lane condition)
+        """
+        if not scheduling_config or not scheduling_config.get('enabled', False):
+            return None
+        lanes_config = scheduling_config.get('lanes') or []
+        if not isinstance(lanes_config, list):
+            raise ValueError(f"lanes must be a list of {{name, when}} mappings, got {lanes_config!r}")
+        lanes = []
+        for position, lane in enumerate(lanes_config):
+            if not isinstance(lane, dict) or not isinstance(lane.get('name'), str) or not lane['name']:
+                raise ValueError(f"lanes[{position}] must be a mapping with a 'name', got {lane!r}")
+            if lane['name'] in {existing.name for existing in lanes}:
+                raise ValueError(f"lanes[{position}]: duplicate lane '{lane['name']}'")
+            # PredicateError is a ValueError
+            lanes.append(Lane(lane['name'], Predicate(lane['when']) if lane.get('when') is not None else None))
+        unconditional = [lane.name for lane in lanes[:-1] if lane.when is None]
+        if unconditional:
+            raise ValueError(f"lane '{unconditional[0]}' has no 'when', so the lanes after it get no tickets")
+        sla_targets = scheduling_config.get('sla_targets') or {}
+        if not isinstance(sla_targets, dict):
+            raise ValueError(f"sla_targets must map request urgency to a duration, got {sla_targets!r}")
+        return cls(lanes,
+                   sla_targets=sla_targets,
+                   policy=scheduling_config.get('policy', 'edf'),
+                   window=scheduling_config.get('window', DEFAULT_WINDOW),
+                   promote_at_risk=scheduling_config.get('promote_at_risk', DEFAULT_PROMOTE_AT_RISK))
+
+    def lane_of(self, payload: Dict[str, Any]) -> int:
+        """Index of the first lane that takes ``payload``."""
+        for index, lane in enumerate(self.lanes):
+            if lane.when is None or lane.when(payload):
+                return index
+        return len(self.lanes) - 1
+
+    def sla_seconds(self, payload: Dict[str, Any]) -> float:
+        """Response time ``payload`` is due within: its contract's, else its urgency's target."""
+        context = payload.get('customer_context')
+        contract = context.get('contract_details') if isinstance(context, dict) else None
+        if isinstance(contract, dict):
+            seconds = parse_duration(contract.get('sla_response_time'))
+            if seconds is not None:
+                return seconds
+        request = payload.get('request')
+        urgency = request.get('urgency') if isinstance(request, dict) else None
+        return self.sla_targets.get(urgency, self.sla_targets['medium'])
+
+    def queue(self) -> "ScheduleQueue":
+        """A new, empty queue for one batch."""
+        return ScheduleQueue(self)
+
+
+class ScheduleQueue:
+    """Tickets of one batch waiting for a worker, and the SLA outcome of those taken."""
+
+    def __init__(self, scheduler: DeadlineScheduler):
+        self.scheduler = scheduler
+        self._sequence = itertools.count()
+        # Per lane: (deadline, sequence, ticket) heaps for EDF
+        self._lanes: List[List[Tuple[float, int, Ticket]]] = [[] for _ in scheduler.lanes]
+        self._arrivals: Deque[Ticket] = deque()
+        self._size = 0
+        self._waits = [LatencyHistogram() for _ in scheduler.lanes]
+        registry = get_metrics_registry()
+        self._wait_metrics = [registry.histogram('queue_wait_seconds', lane=lane.name) for lane in scheduler.lanes]
+        self._counts = [{'tickets': 0, 'sla_missed': 0, 'missed_by_queueing': 0, 'promoted': 0}
+                        for _ in scheduler.lanes]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, index: int, payload: Dict[str, Any]):
+        """Add a ticket that just arrived."""
+        scheduler = self.scheduler
+        ticket = Ticket(index, payload, scheduler.lane_of(payload), time.monotonic(),
+                        scheduler.sla_seconds(payload), scheduler.promote_at_risk)
+        if scheduler.policy == "fifo":
+            self._arrivals.append(ticket)
+        else:
+            heapq.heappush(self._lanes[ticket.lane], (ticket.deadline, next(self._sequence), ticket))
+        self._size += 1
+
+    def pop(self) -> Ticket:
+        """
+        Take the ticket to run next, and start its clock.
+
+        Raises:
+            IndexError: the queue is empty
+        """
+        if not self._size:
+            raise IndexError("pop from an empty schedule queue")
+        now = time.monotonic()
+        if self.scheduler.policy == "fifo":
+            ticket = self._arrivals.popleft()
+        else:
+            ticket = self._pop_edf(now)
+        self._size -= 1
+        ticket.started = now
+        wait = now - ticket.arrived
+        self._waits[ticket.lane].record(wait)
+        self._wait_metrics[ticket.lane].record(wait)
+        return ticket
+
+    def _pop_edf(self, now: float) -> Ticket:
+        """The head of the first non-empty lane, unless a lane head is at risk of missing its SLA."""
+        first = at_risk = None
+        for lane in self._lanes:
+            if not lane:
+                continue
+            if first is None:
+                first = lane
+            # A lane's head has its earliest deadline
+            head = lane[0][2]
+            if head.promote_at <= now < head.deadline and (at_risk is None or head.deadline < at_risk[0][2].deadline):
+                at_risk = lane
+        if at_risk is None or at_risk is first:
+            return heapq.heappop(first)[2]
+        ticket = heapq.heappop(at_risk)[2]
+        self._counts[ticket.lane]['promoted'] += 1
+        return ticket
+
+    def finish(self, ticket: Ticket):
+        """Record that ``ticket`` finished, and whether it met its SLA."""
+        finished = time.monotonic()
+        counts = self._counts[ticket.lane]
+        counts['tickets'] += 1
+        if finished > ticket.deadline:
+            counts['sla_missed'] += 1
+            # It would have made it had a worker taken it when it arrived
+            if finished - ticket.started <= ticket.sla:
+                counts['missed_by_queueing'] += 1
+
+    def report(self) -> Dict[str, Any]:
+        """Tickets, SLA misses (all, and caused by queueing) and queue waits in seconds, per lane and in total."""
+        lanes = {}
+        for lane, counts, waits in zip(self.scheduler.lanes, self._counts, self._waits):
+            summary = waits.summary()
+            lanes[lane.name] = dict(counts, wait_p50=summary['p50'], wait_p95=summary['p95'], wait_max=summary['max'])
+        return {
+            'policy': self.scheduler.policy,
+            'tickets': sum(counts['tickets'] for counts in self._counts),
+            'sla_missed': sum(counts['sla_missed'] for counts in self._counts),
+            'missed_by_queueing': sum(counts['missed_by_queueing'] for counts in self._counts),
+            'lanes': lanes,
+        }
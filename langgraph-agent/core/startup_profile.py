@@ -0,0 +1,107 @@
+"""
+Startup profile of the agent (**profile_startup**), for `agent.py --startup-profile`.
+
+Starts a fresh interpreter with `-X importtime` that imports `agent` and
+creates a LangGraphAgent, then reports:
+- the process total, split into interpreter start, `import agent` and
+  `LangGraphAgent()` (config load and its source, plan compilation with
+  the servers it loads, node setup; see `LangGraphAgent.startup_timings`)
+- the slowest imports by cumulative time, down to two levels below the
+  top-level imports (servers and their dependencies are imported lazily,
+  so they show up as top-level imports)
+
+A fresh process is the only way to see import costs: in the calling
+process everything is imported already.
+
+How to extend:
+- More phases: add them to `LangGraphAgent.startup_timings`
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+# Run in the child; prints the agent's own timings as JSON on stdout
+_CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import agent
+imported = time.perf_counter()
+instance = agent.LangGraphAgent(sys.argv[1])
+created = time.perf_counter()
+print(json.dumps({
+    'import_agent': imported - started,
+    'create_agent': created - imported,
+    'phases': instance.startup_timings,
+    'config_source': instance.config_source,
+    'servers': instance.mcp_client.servers.load_times,
+}))
+"""
+
+# Nesting levels of imports listed: agent -> core.node -> asyncio
+_MAX_DEPTH = 2
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, int, str]]:
+    """(depth, self us, cumulative us, module) of each `-X importtime` line."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        # One space after the separator, then two per nesting level
+        depth = (len(name) - len(stripped) - 1) // 2
+        entries.append((depth, int(self_us), int(cumulative_us), stripped))
+    return entries
+
+
+def profile_startup(config_path: str, top: int = 20) -> str:
+    """
+    Profile the startup of an agent for ``config_path`` in a fresh interpreter.
+
+    Returns:
+        The report, as text
+
+    Raises:
+        RuntimeError: the child process failed
+    """
+    config_path = os.path.abspath(config_path)
+    started = time.perf_counter()
+    child = subprocess.run([sys.executable, "-X", "importtime", "-c", _CHILD_SCRIPT, config_path],
+                           cwd=_PROJECT_ROOT, capture_output=True, text=True)
+    total = time.perf_counter() - started
+    if child.returncode != 0:
+        raise RuntimeError(f"startup profile run failed:\n{child.stderr[-2000:]}")
+    timings: Dict[str, Any] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    def ms(seconds: float) -> str:
+        return f"{seconds * 1000:9.1f} ms"
+
+    interpreter = total - timings['import_agent'] - timings['create_agent']
+    phases = timings['phases']
+    lines = [
+        f"Startup profile: {os.path.relpath(config_path)} (Python {sys.version.split()[0]})",
+        f"  process total          {ms(total)}",
+        f"    interpreter + exit   {ms(interpreter)}",
+        f"    import agent         {ms(timings['import_agent'])}",
+        f"    LangGraphAgent()     {ms(timings['create_agent'])}",
+        f"      load_config        {ms(phases['load_config'])}  ({timings['config_source']})",
+        f"      compile_plan       {ms(phases['compile_plan'])}",
+    ]
+    for server, seconds in timings['servers'].items():
+        lines.append(f"        load {server:<11} {ms(seconds)}")
+    lines.append(f"      initialize         {ms(phases['initialize'])}")
+
+    imports = [entry for entry in parse_importtime(child.stderr) if entry[0] <= _MAX_DEPTH]
+    imports.sort(key=lambda entry: entry[2], reverse=True)
+    lines.append("\nSlowest imports (cumulative, two levels deep):")
+    lines.append(f"  {'cumulative':>12} {'self':>9}  module")
+    for depth, self_us, cumulative_us, name in imports[:top]:
+        lines.append(f"  {cumulative_us / 1000:9.1f} ms {self_us / 1000:6.1f} ms  {'  ' * depth}{name}")
+    return "\n".join(lines)
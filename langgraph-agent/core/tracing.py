@@ -0,0 +1,239 @@
+"""
+In-process tracing of workflows (**Tracer**), exported as Chrome trace events.
+
+Enabled by `settings.enable_tracing` in graph_config.yaml. Spans nest as
+workflow -> stage -> ability attempt (and retry backoff) -> MCP server
+call, and are timed with `time.perf_counter_ns()`:
+
+    with get_tracer().span("knowledge_base_search", "ability", attempt=1) as span:
+        ...
+        span.set("success", True)
+
+Each span records its parent (the span active in the same context, which
+follows asyncio tasks and the ability pool), so the hierarchy survives
+concurrent abilities. `export_chrome_trace()` writes the finished spans as
+trace-event JSON ("X" complete events, one lane per thread or asyncio task)
+that chrome://tracing or https://ui.perfetto.dev can open. The lane of a
+thread or task that has finished is reused by the next one, so there are
+only as many lanes as threads and tasks ever traced at the same time.
+
+Finished spans are kept in a bounded buffer (`max_spans`, oldest dropped),
+so tracing can stay on in a long-running process. When tracing is disabled
+`span()` returns a shared no-op span. Spans of `run_batch(executor="process")`
+workers stay in the worker processes.
+
+How to extend:
+- Trace more work: wrap it in `get_tracer().span(name, category, **args)`
+- Other exporters: read `Tracer.spans()`
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+# Finished spans kept for export
+DEFAULT_MAX_SPANS = 100_000
+
+# Id of the innermost open span in the current context
+_current_span: "contextvars.ContextVar[Optional[int]]" = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed unit of work; use as a context manager."""
+
+    __slots__ = ("tracer", "name", "category", "args", "span_id", "parent_id", "start_ns", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.span_id = 0
+        self.parent_id = None
+        self.start_ns = 0
+        self._token = None
+
+    def set(self, key: str, value: Any):
+        """Attach an argument shown with the span."""
+        self.args[key] = value
+
+    def __enter__(self) -> "Span":
+        self.span_id = next(self.tracer._ids)
+        self.parent_id = _current_span.get()
+        self._token = _current_span.set(self.span_id)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self, end_ns)
+        return False
+
+
+class _NullSpan:
+    """Span returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _LaneLease:
+    """A thread's lane, kept in its thread-local storage: given back when the thread exits."""
+
+    __slots__ = ("number", "free_lanes")
+
+    def __init__(self, number: int, free_lanes: Deque[int]):
+        self.number = number
+        self.free_lanes = free_lanes
+
+    def __del__(self):
+        # No lock: this can run whenever the thread's locals are dropped
+        self.free_lanes.append(self.number)
+
+
+class Tracer:
+    """Collects finished spans for export."""
+
+    def __init__(self, enabled: bool = False, max_spans: int = DEFAULT_MAX_SPANS):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: deque = deque(maxlen=max_spans)
+        self._ids = itertools.count(1)
+        # Lane number -> name of its latest thread or task, and the lanes given back
+        self._lane_names: Dict[int, str] = {}
+        self._free_lanes: Deque[int] = deque()
+        # Lanes of the running threads (a _LaneLease each) and asyncio tasks (by task id)
+        self._thread_lanes = threading.local()
+        self._task_lanes: Dict[int, int] = {}
+        self._epoch_ns = time.perf_counter_ns()
+
+    def configure(self, enabled: bool, max_spans: Optional[int] = None):
+        """Turn tracing on or off; resizing the buffer drops the spans kept so far."""
+        with self._lock:
+            self.enabled = bool(enabled)
+            if max_spans is not None and max_spans != self._spans.maxlen:
+                self._spans = deque(maxlen=max_spans)
+
+    def span(self, name: str, category: str, **args: Any):
+        """A span for ``name``, or a no-op span when tracing is disabled."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def _finish(self, span: Span, end_ns: int):
+        """Store a finished span with the lane it ran on."""
+        lane = self._lane()
+        if span.parent_id is not None:
+            span.args["parent_id"] = span.parent_id
+        span.args["span_id"] = span.span_id
+        with self._lock:
+            self._spans.append((span.name, span.category, span.start_ns, end_ns - span.start_ns, lane, span.args))
+
+    def _lane(self) -> int:
+        """Lane of the current thread, or of the current asyncio task on an event loop."""
+        # _get_running_loop() returns None off the loop instead of raising like current_task()
+        loop = asyncio._get_running_loop()
+        task = asyncio.current_task(loop) if loop is not None else None
+        if task is None:
+            lease = getattr(self._thread_lanes, 'lease', None)
+            if lease is None:
+                number = self._acquire_lane(threading.current_thread().name)
+                lease = self._thread_lanes.lease = _LaneLease(number, self._free_lanes)
+            return lease.number
+        key = id(task)
+        number = self._task_lanes.get(key)
+        if number is None:
+            number = self._acquire_lane(f"{threading.current_thread().name} / task")
+            self._task_lanes[key] = number
+            task.add_done_callback(lambda _: self._release_task_lane(key))
+        return number
+
+    def _acquire_lane(self, name: str) -> int:
+        """A lane given back by a finished thread or task, or a new one."""
+        with self._lock:
+            try:
+                number = self._free_lanes.popleft()
+            except IndexError:
+                number = len(self._lane_names) + 1
+            self._lane_names[number] = name
+        return number
+
+    def _release_task_lane(self, key: int):
+        """Give back the lane of a finished task (its id may be reused by the next task)."""
+        number = self._task_lanes.pop(key, None)
+        if number is not None:
+            self._free_lanes.append(number)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Finished spans, oldest first (times in nanoseconds since the tracer was created)."""
+        with self._lock:
+            spans = list(self._spans)
+        return [{'name': name, 'category': category, 'start_ns': start_ns - self._epoch_ns,
+                 'duration_ns': duration_ns, 'lane': lane, 'args': args}
+                for name, category, start_ns, duration_ns, lane, args in spans]
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Finished spans in the Chrome trace-event format."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+            lanes = list(self._lane_names.items())
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': lane, 'args': {'name': name}}
+                  for lane, name in lanes]
+        for name, category, start_ns, duration_ns, lane, args in spans:
+            events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': (start_ns - self._epoch_ns) / 1000,
+                'dur': duration_ns / 1000,
+                'pid': pid,
+                'tid': lane,
+                'args': args
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path: str):
+        """Write the Chrome trace JSON to ``path``."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+    def clear(self):
+        """Drop the finished spans."""
+        with self._lock:
+            self._spans.clear()
+
+
+# Process-wide tracer shared by the agent, the nodes and MCPClient
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer (disabled until configured)."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
@@ -15,23 +15,85 @@ Responsibilities:
 How to extend:
 - Add more "external integration" abilities here
 - For now, mock them with static/dummy values
-- In a real system, replace mocks with API/database calls
+- In a real system, replace mocks with API/database calls; the round trip in
+  `aexecute_ability()` is where an async HTTP/database client is awaited
 """
 
+import os
 import json
+import time
+import asyncio
+import functools
 import logging
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any, List, Callable, Awaitable, Optional
 from datetime import datetime
 
+from servers.keyword_matcher import keyword_matches
+from servers.knowledge_base import KnowledgeBase
+
 logger = logging.getLogger(__name__)
 
+# Knowledge base corpus searched by knowledge_base_search/search_knowledge_base
+DEFAULT_KNOWLEDGE_BASE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                           "data", "knowledge_base.jsonl")
+
 class AtlasServer:
     """ATLAS MCP Server - External system integrations"""
     
-    def __init__(self):
+    # Top-level state fields each ability reads and writes. Node uses these to
+    # run independent abilities of a stage in parallel (see core/dataflow.py);
+    # "*" means any field. Keep them in sync when changing an ability.
+    ABILITY_DATAFLOW = {
+        "enrich_records": {"reads": ["customer_id"], "writes": ["enrichment_success", "enriched_data", "data_sources", "enrichment_timestamp"]},
+        "clarify_question": {"reads": ["query", "request_category"], "writes": ["clarification_needed", "suggested_questions", "question_category", "clarification_timestamp"]},
+        "extract_answer": {"reads": ["customer_response"], "writes": ["extraction_success", "extracted_answer", "extraction_confidence", "extraction_timestamp"]},
+        "store_answer": {"reads": ["extracted_answer", "case_id"], "writes": ["storage_result", "answer_stored", "storage_timestamp"]},
+        "knowledge_base_search": {"reads": ["query", "request", "request_category"], "writes": ["search_success", "knowledge_base_results", "total_results", "search_timestamp"]},
+        "store_data": {"reads": ["processed_data"], "writes": ["storage_operations", "all_successful", "storage_timestamp"]},
+        "escalation_decision": {"reads": ["priority", "complexity", "customer_tier", "previous_escalations"], "writes": ["escalation_decision", "escalation_score", "escalation_reason", "recommended_tier"]},
+        "solution_evaluation": {"reads": ["solutions", "customer_context", "issue_type"], "writes": ["solution_evaluation", "evaluation_timestamp"]},
+        "update_payload": {"reads": ["payload_updates"], "writes": ["payload_updated", "updated_fields", "update_count", "update_timestamp"]},
+        "update_ticket": {"reads": ["ticket_id", "ticket_updates"], "writes": ["ticket_update_success", "ticket_id", "updated_fields", "update_timestamp"]},
+        "close_ticket": {"reads": ["ticket_id", "resolution"], "writes": ["ticket_closed", "ticket_id", "resolution", "closure_timestamp"]},
+        "execute_api_calls": {"reads": ["api_calls"], "writes": ["api_execution_results", "all_successful", "total_calls", "execution_timestamp"]},
+        "trigger_notifications": {"reads": ["notification_types", "customer"], "writes": ["notifications_triggered", "notifications_sent", "total_notifications", "trigger_timestamp"]},
+        "extract_entities": {"reads": ["customer_message", "keyword_matches"], "writes": ["success", "entities", "confidence_score"]},
+        "enrich_customer_record": {"reads": ["customer_id"], "writes": ["success", "customer_data", "data_source"]},
+        "search_knowledge_base": {"reads": ["search_query", "max_results"], "writes": ["success", "articles", "total_results"]},
+        "update_ticket_system": {"reads": ["ticket_data"], "writes": ["success", "ticket_id", "status", "priority"]},
+        "call_external_api": {"reads": ["endpoint"], "writes": ["success", "api_response", "endpoint", "response_time_ms"]},
+        "send_notification": {"reads": ["type", "recipient"], "writes": ["success", "notification_id", "type", "recipient", "status"]},
+        "escalate_to_human": {"reads": ["reason"], "writes": ["success", "escalation_id", "assigned_agent", "queue_position", "estimated_wait_time"]},
+        "update_crm_system": {"reads": ["customer_id"], "writes": ["success", "crm_record_id", "updated_fields", "sync_status"]},
+        "check_service_status": {"reads": ["service"], "writes": ["success", "service", "status", "uptime", "last_incident"]},
+        "log_interaction": {"reads": ["interaction"], "writes": ["success", "log_id", "logged_at", "analytics_system"]},
+        "generate_case_id": {"reads": ["customer_id"], "writes": ["success", "case_id", "created_at", "expires_at"]},
+        "analyze_sentiment": {"reads": ["message", "keyword_matches"], "writes": ["success", "sentiment", "confidence", "timestamp"]},
+        "detect_language": {"reads": ["message", "keyword_matches"], "writes": ["success", "language", "confidence", "timestamp"]},
+        "fetch_interaction_history": {"reads": ["customer_id"], "writes": ["success", "customer_id", "interactions", "total_count", "timestamp"]},
+        "get_account_details": {"reads": ["customer_id"], "writes": ["success", "account_details", "timestamp"]},
+        "rank_solutions": {"reads": ["solutions", "query"], "writes": ["success", "ranked_solutions", "total_solutions", "timestamp"]},
+        "filter_by_relevance": {"reads": ["items", "threshold"], "writes": ["success", "filtered_items", "original_count", "filtered_count", "threshold", "timestamp"]},
+        "format_final_response": {"reads": ["response_data", "language"], "writes": ["success", "formatted_response", "language", "timestamp"]},
+        "schedule_followup": {"reads": ["customer_id", "type", "delay_hours"], "writes": ["success", "followup_id", "customer_id", "type", "scheduled_time", "status", "timestamp"]},
+    }
+    
+    def __init__(self, knowledge_base_path: str = DEFAULT_KNOWLEDGE_BASE_PATH):
         self.name = "atlas"
         self.description = "External system integrations and API calls"
-        logger.info(f"Initialized {self.name} server")
+        # Simulated external round-trip time in seconds (0 = mocks answer immediately)
+        self.simulated_latency = 0.0
+        # Indexed on the first search
+        self.knowledge_base_path = knowledge_base_path
+        self._knowledge_base: Optional[KnowledgeBase] = None
+        self._knowledge_base_lock = threading.Lock()
+        self._ability_map = self._build_ability_map()
+        logger.info("Initialized %s server", self.name)
+    
+    def warm_up(self):
+        """Build the knowledge base index now instead of on the first search"""
+        self._get_knowledge_base()
     
     def get_abilities(self) -> List[str]:
         """Return list of available external abilities"""
@@ -63,9 +125,59 @@ class AtlasServer:
     
     def execute_ability(self, ability_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute an external ability with given context"""
-        logger.info(f"Executing external ability: {ability_name}")
-        
-        ability_map = {
+        ability = self.resolve_ability(ability_name)
+        if ability is None:
+            return self._unknown_ability(ability_name)
+        return ability(context)
+    
+    async def aexecute_ability(self, ability_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Async version of execute_ability; the external round trip is awaited, not blocked on"""
+        ability = self.resolve_async_ability(ability_name)
+        if ability is None:
+            return self._unknown_ability(ability_name)
+        return await ability(context)
+    
+    def resolve_ability(self, ability_name: str) -> Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+        """Resolve an ability name to a callable taking the context (None if unknown)"""
+        implementation = self._ability_map.get(ability_name)
+        if implementation is None:
+            return None
+        return functools.partial(self._run_external, ability_name, implementation)
+    
+    def resolve_async_ability(self, ability_name: str) -> Optional[Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]]:
+        """Async counterpart of resolve_ability"""
+        implementation = self._ability_map.get(ability_name)
+        if implementation is None:
+            return None
+        return functools.partial(self._arun_external, ability_name, implementation)
+    
+    def _run_external(self, ability_name: str, implementation: Callable, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run an external ability, including its (simulated) round trip"""
+        logger.debug("Executing external ability: %s", ability_name)
+        if self.simulated_latency:
+            time.sleep(self.simulated_latency)
+        result = implementation(context)
+        logger.debug("External ability %s completed successfully", ability_name)
+        return result
+    
+    async def _arun_external(self, ability_name: str, implementation: Callable, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Async counterpart of _run_external"""
+        logger.debug("Executing external ability (async): %s", ability_name)
+        if self.simulated_latency:
+            await asyncio.sleep(self.simulated_latency)
+        result = implementation(context)
+        logger.debug("External ability %s completed successfully", ability_name)
+        return result
+    
+    def _unknown_ability(self, ability_name: str) -> Dict[str, Any]:
+        """Build the error result for an ability this server does not provide"""
+        error_msg = f"Unknown external ability: {ability_name}"
+        logger.error(error_msg)
+        return {"success": False, "error": error_msg}
+    
+    def _build_ability_map(self) -> Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]:
+        """Map ability names to their implementations (built once per server)"""
+        return {
             # New LangGraph spec abilities
             "enrich_records": self._enrich_records,
             "clarify_question": self._clarify_question,
@@ -101,15 +213,6 @@ class AtlasServer:
             "format_final_response": self._format_final_response,
             "schedule_followup": self._schedule_followup
         }
-        
-        if ability_name in ability_map:
-            result = ability_map[ability_name](context)
-            logger.info(f"External ability {ability_name} completed successfully")
-            return result
-        else:
-            error_msg = f"Unknown external ability: {ability_name}"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg}
     
     # New LangGraph spec abilities
     def _enrich_records(self, context: Dict[str, Any]) -> Dict[str, Any]:
@@ -207,36 +310,45 @@ class AtlasServer:
             "storage_timestamp": datetime.now().isoformat()
         }
     
+    def _get_knowledge_base(self) -> KnowledgeBase:
+        """Index the knowledge base corpus on first use."""
+        if self._knowledge_base is None:
+            with self._knowledge_base_lock:
+                if self._knowledge_base is None:
+                    self._knowledge_base = KnowledgeBase.from_file(self.knowledge_base_path)
+        return self._knowledge_base
+    
     def _knowledge_base_search(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Search knowledge base for relevant solutions."""
-        query = context.get("query", "")
-        category = context.get("request_category", "general_inquiry")
-        
-        # Mock knowledge base results
-        kb_results = [
-            {
-                "id": "kb_001",
-                "title": "How to reset your password",
-                "relevance": 0.95,
-                "category": "account_access",
-                "solution_steps": ["Click forgot password", "Check email", "Follow link"]
-            },
+        request = context.get("request", {})
+        query = context.get("query") or f"{request.get('subject', '')} {request.get('description', '')}"
+        category = context.get("request_category", request.get("category"))
+        # max_results/relevance_threshold come from the stage in graph_config.yaml
+        params = context.get("_execution_context", {}).get("params", {})
+        
+        articles = self._get_knowledge_base().search(
+            query,
+            max_results=params.get("max_results", 3),
+            relevance_threshold=params.get("relevance_threshold", 0.0),
+            category=category
+        )
+        results = [
             {
-                "id": "kb_002", 
-                "title": "Billing inquiry resolution",
-                "relevance": 0.87,
-                "category": "billing",
-                "solution_steps": ["Review invoice", "Contact billing team", "Request adjustment"]
+                "id": article["id"],
+                "title": article["title"],
+                "relevance": article["relevance"],
+                "score": article["score"],
+                "category": article.get("category"),
+                "solution_steps": article.get("solution_steps", []),
+                "url": article.get("url")
             }
+            for article in articles
         ]
         
-        # Filter by category
-        filtered_results = [r for r in kb_results if r["category"] == category][:3]
-        
         return {
             "search_success": True,
-            "knowledge_base_results": filtered_results,
-            "total_results": len(filtered_results),
+            "knowledge_base_results": results,
+            "total_results": len(results),
             "search_timestamp": datetime.now().isoformat()
         }
     
@@ -259,7 +371,7 @@ class AtlasServer:
     
     def _escalation_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Make escalation decision based on context analysis."""
-        logger.info("        🔺 Making escalation decision")
+        logger.debug("        🔺 Making escalation decision")
         
         # Analyze escalation factors
         priority = context.get('priority', 'medium')
@@ -295,7 +407,7 @@ class AtlasServer:
     
     def _solution_evaluation(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Evaluate potential solutions and rank them by effectiveness."""
-        logger.info("        🎯 Evaluating solutions")
+        logger.debug("        🎯 Evaluating solutions")
         
         solutions = context.get('solutions', [])
         customer_context = context.get('customer_context', {})
@@ -454,15 +566,15 @@ class AtlasServer:
 
     def _extract_entities(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Extract entities from customer message (mock implementation)"""
-        message = context.get("customer_message", "")
+        matches = keyword_matches(context, "customer_message")
         
         # Mock entity extraction - in real system, use NLP service
         entities = {
             "customer_id": "CUST_12345",
-            "product_mentioned": "Premium Plan" if "premium" in message.lower() else "Basic Plan",
-            "issue_type": "billing" if any(word in message.lower() for word in ["bill", "charge", "payment"]) else "technical",
-            "urgency": "high" if any(word in message.lower() for word in ["urgent", "asap", "emergency"]) else "medium",
-            "sentiment": "negative" if any(word in message.lower() for word in ["angry", "frustrated", "disappointed"]) else "neutral"
+            "product_mentioned": "Premium Plan" if matches.any("atlas_entities.premium") else "Basic Plan",
+            "issue_type": "billing" if matches.any("atlas_entities.billing") else "technical",
+            "urgency": "high" if matches.any("atlas_entities.urgency") else "medium",
+            "sentiment": "negative" if matches.any("atlas_entities.negative") else "neutral"
         }
         
         return {
@@ -494,23 +606,17 @@ class AtlasServer:
         }
     
     def _search_knowledge_base(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Search knowledge base for relevant articles (mock implementation)"""
+        """Search knowledge base for relevant articles"""
         query = context.get("search_query", "")
         
-        # Mock KB search - in real system, use search API
         articles = [
             {
-                "id": "KB_001",
-                "title": "How to Reset Your Password",
-                "relevance_score": 0.92,
-                "url": "https://help.company.com/password-reset"
-            },
-            {
-                "id": "KB_002", 
-                "title": "Billing FAQ",
-                "relevance_score": 0.78,
-                "url": "https://help.company.com/billing-faq"
+                "id": article["id"],
+                "title": article["title"],
+                "relevance_score": article["relevance"],
+                "url": article.get("url")
             }
+            for article in self._get_knowledge_base().search(query, max_results=context.get("max_results", 5))
         ]
         
         return {
@@ -625,15 +731,11 @@ class AtlasServer:
 
     def _analyze_sentiment(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze sentiment of customer message (mock implementation)"""
-        message = context.get("message", "")
+        matches = keyword_matches(context, "message")
         
         # Mock sentiment analysis - in real system, use NLP service
-        negative_words = ["angry", "frustrated", "disappointed", "terrible", "awful", "hate"]
-        positive_words = ["great", "excellent", "love", "amazing", "wonderful", "perfect"]
-        
-        message_lower = message.lower()
-        negative_count = sum(1 for word in negative_words if word in message_lower)
-        positive_count = sum(1 for word in positive_words if word in message_lower)
+        negative_count = matches.count("sentiment.negative")
+        positive_count = matches.count("sentiment.positive")
         
         if negative_count > positive_count:
             sentiment = "negative"
@@ -654,16 +756,12 @@ class AtlasServer:
 
     def _detect_language(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Detect language of customer message (mock implementation)"""
-        message = context.get("message", "")
+        matches = keyword_matches(context, "message")
         
         # Mock language detection - in real system, use language detection service
         # Simple heuristic based on common words
-        spanish_words = ["hola", "gracias", "por favor", "ayuda", "problema"]
-        french_words = ["bonjour", "merci", "s'il vous plaît", "aide", "problème"]
-        
-        message_lower = message.lower()
-        spanish_count = sum(1 for word in spanish_words if word in message_lower)
-        french_count = sum(1 for word in french_words if word in message_lower)
+        spanish_count = matches.count("language.spanish")
+        french_count = matches.count("language.french")
         
         if spanish_count > 0:
             language = "es"
@@ -831,12 +929,24 @@ class AtlasServer:
             "timestamp": datetime.now().isoformat()
         }
 
-# Create server instance
-atlas_server = AtlasServer()
+# Server instance, created on first use
+_server: Optional[AtlasServer] = None
+_server_lock = threading.Lock()
 
 def get_server():
     """Get the ATLAS server instance"""
-    return atlas_server
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = AtlasServer()
+    return _server
+
+def __getattr__(name: str):
+    # Keep `from servers.atlas import atlas_server` working
+    if name == "atlas_server":
+        return get_server()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     # Test the server
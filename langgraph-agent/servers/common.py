@@ -4,35 +4,64 @@ Handles internal logic that doesn't require external systems.
 
 from typing import Dict, Any
 import logging
+import threading
 from datetime import datetime, timedelta
 import re
 from enum import Enum
-from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Callable
+from servers.keyword_matcher import MATCHER, keyword_matches, match_text_sources
 
 class ResolutionStatus(str, Enum):
     PENDING = "pending"
     RESOLVED = "resolved"
     ESCALATED = "escalated"
 
-class SLACompliance(BaseModel):
-    met: bool
-    response_time_minutes: float
-    target_time_minutes: float
+# Output payload models, built on first use: importing pydantic takes longer
+# than the rest of the agent's startup, and only output_payload needs it
+_PAYLOAD_MODEL_NAMES = ("SLACompliance", "NextAction", "CustomerSupportPayload")
+_payload_models: Optional[Dict[str, type]] = None
+_payload_models_lock = threading.Lock()
 
-class NextAction(BaseModel):
-    action: str
-    priority: str
-    due_date: str
 
-class CustomerSupportPayload(BaseModel):
-    case_id: str
-    customer_id: str
-    resolution_status: ResolutionStatus
-    response_text: str
-    escalation_required: bool
-    sla_compliance: SLACompliance
-    next_actions: List[NextAction]
+def get_payload_models() -> Dict[str, type]:
+    """The pydantic models of the structured output payload, by name."""
+    global _payload_models
+    if _payload_models is None:
+        with _payload_models_lock:
+            if _payload_models is None:
+                from pydantic import BaseModel
+
+                class SLACompliance(BaseModel):
+                    met: bool
+                    response_time_minutes: float
+                    target_time_minutes: float
+
+                class NextAction(BaseModel):
+                    action: str
+                    priority: str
+                    due_date: str
+
+                class CustomerSupportPayload(BaseModel):
+                    case_id: str
+                    customer_id: str
+                    resolution_status: ResolutionStatus
+                    response_text: str
+                    escalation_required: bool
+                    sla_compliance: SLACompliance
+                    next_actions: List[NextAction]
+
+                _payload_models = {'SLACompliance': SLACompliance, 'NextAction': NextAction,
+                                   'CustomerSupportPayload': CustomerSupportPayload}
+    return _payload_models
+
+
+def __getattr__(name: str):
+    # Keep `from servers.common import CustomerSupportPayload` (and `common_server`) working
+    if name in _PAYLOAD_MODEL_NAMES:
+        return get_payload_models()[name]
+    if name == "common_server":
+        return get_server()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +69,55 @@ logger = logging.getLogger(__name__)
 class CommonServerAbilities:
     """COMMON MCP server abilities for customer support workflow."""
     
+    # Top-level state fields each ability reads and writes. Node uses these to
+    # run independent abilities of a stage in parallel (see core/dataflow.py);
+    # "*" means any field. Keep them in sync when changing an ability.
+    ABILITY_DATAFLOW = {
+        "accept_payload": {"reads": ["*"], "writes": ["payload_accepted", "payload_timestamp", "payload_size"]},
+        "validate_input": {"reads": ["customer", "query", "ticket_id"], "writes": ["input_validation", "validation_passed", "validation_timestamp"]},
+        "normalize_fields": {"reads": ["customer", "query", "ticket_id"], "writes": ["normalization", "normalization_timestamp"]},
+        "match_keywords": {"reads": ["query", "query_normalized", "request", "customer_message", "message"], "writes": ["keyword_matches"]},
+        "categorize_request": {"reads": ["query_normalized", "query", "keyword_matches"], "writes": ["request_category", "category_confidence", "categorization_timestamp"]},
+        "calculate_sla_risk": {"reads": ["priority", "request_category"], "writes": ["sla_target_hours", "sla_risk_score", "sla_deadline", "sla_calculation_timestamp"]},
+        "assess_priority": {"reads": ["priority", "request_category", "customer"], "writes": ["original_priority", "final_priority", "priority_score", "priority_adjusted", "priority_assessment_timestamp"]},
+        "draft_response": {"reads": ["customer_name_normalized", "request_category"], "writes": ["draft_response", "response_template", "response_length", "draft_timestamp"]},
+        "check_required_fields": {"reads": ["customer_id", "request", "contact_info"], "writes": ["required_fields_check", "check_timestamp"]},
+        "sanitize_data": {"reads": ["customer_id", "request", "contact_info"], "writes": ["sanitized_data", "sanitization_timestamp"]},
+        "authenticate_customer": {"reads": ["customer_id", "contact_info"], "writes": ["authentication", "auth_timestamp"]},
+        "check_permissions": {"reads": ["customer_context"], "writes": ["permissions", "account_type", "subscription_tier", "permissions_timestamp"]},
+        "verify_account_status": {"reads": ["customer_context"], "writes": ["account_status", "overall_status", "status_timestamp"]},
+        "classify_intent": {"reads": ["request", "keyword_matches"], "writes": ["intent_classification", "classification_timestamp"]},
+        "determine_category": {"reads": ["intent_classification"], "writes": ["support_category", "category_timestamp"]},
+        "personalize_response": {"reads": ["customer_context", "contact_info"], "writes": ["personalization", "personalization_timestamp"]},
+        "check_compliance": {"reads": ["business_impact", "customer_context"], "writes": ["compliance_check", "compliance_timestamp"]},
+        "validate_response": {"reads": ["draft_response", "personalization"], "writes": ["response_validation", "validation_timestamp"]},
+        "verify_accuracy": {"reads": ["support_category", "suggested_actions"], "writes": ["accuracy_verification", "verification_timestamp"]},
+        "assess_escalation_need": {"reads": ["business_impact", "customer_context", "support_category", "sla_risk_score"], "writes": ["escalation_assessment", "assessment_timestamp"]},
+        "determine_priority": {"reads": ["escalation_assessment", "business_impact", "customer_context"], "writes": ["priority_determination", "priority_timestamp"]},
+        "route_to_agent": {"reads": ["escalation_need", "priority_level", "support_category"], "writes": ["agent_routing", "routing_timestamp"]},
+        "assess_complexity": {"reads": ["request", "customer_context", "business_impact"], "writes": ["complexity_assessment", "complexity_timestamp"]},
+        "rank_recommendations": {"reads": ["generated_solutions", "customer_context", "complexity_assessment"], "writes": ["ranked_recommendations", "ranking_timestamp"]},
+        "generate_solution": {"reads": ["request", "customer_context", "support_category", "complexity_assessment"], "writes": ["generated_solutions", "solution_metadata", "generation_timestamp"]},
+        "parse_request_text": {"reads": ["query", "request", "keyword_matches"], "writes": ["parsed_request", "parsing_timestamp"]},
+        "add_flags_calculations": {"reads": ["query", "parsed_request", "priority", "keyword_matches"], "writes": ["flags", "calculations", "flags_timestamp"]},
+        "response_generation": {"reads": ["customer", "request_category", "flags", "solution"], "writes": ["response_text", "response_metadata", "generation_timestamp"]},
+        "output_payload": {"reads": ["case_id", "customer", "customer_id", "escalation_required", "workflow_status", "final_response", "response_text", "start_time", "priority", "follow_up_required"], "writes": ["structured_payload", "payload_generated", "generation_timestamp", "error"]},
+        "extract_entities": {"reads": ["request", "keyword_matches"], "writes": ["extracted_entities", "extraction_timestamp"]},
+        "enrich_records": {"reads": ["customer_id"], "writes": ["enriched_data", "enrichment_timestamp"]},
+        "escalation_decision": {"reads": ["request", "customer_context"], "writes": ["escalation_required", "escalation_reason", "escalation_timestamp"]},
+        "solution_evaluation": {"reads": ["request"], "writes": ["recommended_solutions", "solution_confidence", "evaluation_timestamp"]},
+        "update_payload": {"reads": [], "writes": ["payload_updates", "update_timestamp"]},
+    }
+    
+    def warm_up(self):
+        """Build the output payload models now instead of in the first output_payload call"""
+        get_payload_models()
+    
     def get_abilities(self) -> List[str]:
         """Return list of available internal abilities"""
         return [
             "accept_payload",
+            "match_keywords",
             "validate_input", 
             "normalize_fields",
             "parse_request_text",
@@ -61,17 +135,25 @@ class CommonServerAbilities:
     
     def accept_payload(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Accept and log the incoming payload."""
-        logger.info("        📥 Accepting customer support payload")
+        logger.debug("        📥 Accepting customer support payload")
         
         return {
             'payload_accepted': True,
             'payload_timestamp': datetime.now().isoformat(),
-            'payload_size': len(str(state))
+            'payload_size': len(str(dict(state)))
+        }
+    
+    def match_keywords(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Match the request texts against all keyword tables once, for every text-classifying ability."""
+        logger.debug("        🔤 Matching request keywords")
+        
+        return {
+            'keyword_matches': match_text_sources(state)
         }
     
     def validate_input(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Validate required fields in the input."""
-        logger.info("        🔍 Validating input fields")
+        logger.debug("        🔍 Validating input fields")
         
         required_fields = ['customer', 'query', 'ticket_id']
         validation_results = {}
@@ -89,7 +171,7 @@ class CommonServerAbilities:
     
     def normalize_fields(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize and clean data fields."""
-        logger.info("        🧹 Normalizing data fields")
+        logger.debug("        🧹 Normalizing data fields")
         
         normalized = {}
         
@@ -113,18 +195,18 @@ class CommonServerAbilities:
     
     def categorize_request(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Categorize the support request based on query content."""
-        logger.info("        📂 Categorizing support request")
+        logger.debug("        📂 Categorizing support request")
         
-        query = state.get('query_normalized', state.get('query', '')).lower()
+        matches = keyword_matches(state, 'query_normalized')
         
         # Simple categorization logic
-        if any(word in query for word in ['password', 'login', 'access', 'account']):
+        if matches.any('category.account_access'):
             category = 'account_access'
-        elif any(word in query for word in ['billing', 'payment', 'invoice', 'charge']):
+        elif matches.any('category.billing'):
             category = 'billing'
-        elif any(word in query for word in ['bug', 'error', 'broken', 'not working']):
+        elif matches.any('category.technical_issue'):
             category = 'technical_issue'
-        elif any(word in query for word in ['feature', 'request', 'enhancement']):
+        elif matches.any('category.feature_request'):
             category = 'feature_request'
         else:
             category = 'general_inquiry'
@@ -137,7 +219,7 @@ class CommonServerAbilities:
     
     def calculate_sla_risk(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate SLA risk based on priority and timing."""
-        logger.info("        ⏰ Calculating SLA risk")
+        logger.debug("        ⏰ Calculating SLA risk")
         
         priority = state.get('priority', 'medium').lower()
         category = state.get('request_category', 'general_inquiry')
@@ -172,7 +254,7 @@ class CommonServerAbilities:
     
     def assess_priority(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Assess and potentially adjust request priority."""
-        logger.info("        🎯 Assessing request priority")
+        logger.debug("        🎯 Assessing request priority")
         
         original_priority = state.get('priority', 'medium')
         category = state.get('request_category', 'general_inquiry')
@@ -209,7 +291,7 @@ class CommonServerAbilities:
     
     def draft_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Draft an initial response based on the analysis."""
-        logger.info("        ✍️  Drafting response")
+        logger.debug("        ✍️  Drafting response")
         
         customer_name = state.get('customer_name_normalized', 'Valued Customer')
         category = state.get('request_category', 'general_inquiry')
@@ -232,18 +314,27 @@ class CommonServerAbilities:
             'draft_timestamp': datetime.now().isoformat()
         }
 
+    # Public methods that are server plumbing rather than abilities
+    _NON_ABILITY_METHODS = frozenset({"get_abilities", "execute_ability", "resolve_ability"})
+
     def execute_ability(self, ability_name, data):
         """Execute a specific ability by name"""
-        if hasattr(self, ability_name):
-            method = getattr(self, ability_name)
-            return method(data)
-        else:
+        method = self.resolve_ability(ability_name)
+        if method is None:
             raise AttributeError(f"Unknown ability: {ability_name}")
+        return method(data)
+
+    def resolve_ability(self, ability_name: str) -> Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+        """Resolve an ability name to its bound method (None if this server has no such ability)"""
+        if ability_name.startswith('_') or ability_name in self._NON_ABILITY_METHODS:
+            return None
+        method = getattr(self, ability_name, None)
+        return method if callable(method) else None
 
     # Missing abilities implementation
     def check_required_fields(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Check if all required fields are present and valid."""
-        logger.info("        ✅ Checking required fields")
+        logger.debug("        ✅ Checking required fields")
         
         required_fields = {
             'customer_id': str,
@@ -271,7 +362,7 @@ class CommonServerAbilities:
     
     def sanitize_data(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Sanitize input data to prevent security issues."""
-        logger.info("        🧼 Sanitizing input data")
+        logger.debug("        🧼 Sanitizing input data")
         
         sanitized_data = {}
         
@@ -301,7 +392,7 @@ class CommonServerAbilities:
     
     def authenticate_customer(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Authenticate customer identity."""
-        logger.info("        🔐 Authenticating customer")
+        logger.debug("        🔐 Authenticating customer")
         
         customer_id = state.get('customer_id')
         contact_info = state.get('contact_info', {})
@@ -337,7 +428,7 @@ class CommonServerAbilities:
     
     def check_permissions(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Check customer permissions and access levels."""
-        logger.info("        🔑 Checking permissions")
+        logger.debug("        🔑 Checking permissions")
         
         customer_context = state.get('customer_context', {})
         account_type = customer_context.get('account_type', 'standard')
@@ -360,7 +451,7 @@ class CommonServerAbilities:
     
     def verify_account_status(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Verify customer account status."""
-        logger.info("        ✔️ Verifying account status")
+        logger.debug("        ✔️ Verifying account status")
         
         customer_context = state.get('customer_context', {})
         contract_details = customer_context.get('contract_details', {})
@@ -384,30 +475,20 @@ class CommonServerAbilities:
     
     def classify_intent(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Classify customer intent from the request."""
-        logger.info("        🎯 Classifying customer intent")
+        logger.debug("        🎯 Classifying customer intent")
         
-        request = state.get('request', {})
-        description = request.get('description', '').lower()
-        subject = request.get('subject', '').lower()
-        
-        text_to_analyze = f"{subject} {description}"
-        
-        # Intent classification logic
-        intent_keywords = {
-            'get_help': ['help', 'support', 'assistance', 'problem', 'issue'],
-            'report_bug': ['bug', 'error', 'broken', 'not working', 'failure'],
-            'request_feature': ['feature', 'enhancement', 'improvement', 'add'],
-            'billing_inquiry': ['billing', 'payment', 'invoice', 'charge', 'refund'],
-            'account_access': ['login', 'password', 'access', 'locked', 'reset'],
-            'cancel_service': ['cancel', 'terminate', 'stop', 'end service'],
-            'upgrade_service': ['upgrade', 'premium', 'enterprise', 'more features']
-        }
+        matches = keyword_matches(state, 'request_subject_description')
+        
+        # Intent classification logic (keyword tables: intent.<intent>)
+        intents = ['get_help', 'report_bug', 'request_feature', 'billing_inquiry',
+                   'account_access', 'cancel_service', 'upgrade_service']
         
         intent_scores = {}
-        for intent, keywords in intent_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_to_analyze)
+        for intent in intents:
+            table = f'intent.{intent}'
+            score = matches.count(table)
             if score > 0:
-                intent_scores[intent] = score / len(keywords)
+                intent_scores[intent] = score / len(MATCHER.tables[table])
         
         primary_intent = max(intent_scores.items(), key=lambda x: x[1])[0] if intent_scores else 'general_inquiry'
         confidence = intent_scores.get(primary_intent, 0.1)
@@ -423,7 +504,7 @@ class CommonServerAbilities:
     
     def determine_category(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Determine support category based on intent and content."""
-        logger.info("        📋 Determining support category")
+        logger.debug("        📋 Determining support category")
         
         intent_data = state.get('intent_classification', {})
         primary_intent = intent_data.get('primary_intent', 'general_inquiry')
@@ -457,7 +538,7 @@ class CommonServerAbilities:
     
     def personalize_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Personalize response based on customer profile."""
-        logger.info("        👤 Personalizing response")
+        logger.debug("        👤 Personalizing response")
         
         customer_context = state.get('customer_context', {})
         contact_info = state.get('contact_info', {})
@@ -488,7 +569,7 @@ class CommonServerAbilities:
     
     def check_compliance(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Check compliance requirements for the request."""
-        logger.info("        📜 Checking compliance requirements")
+        logger.debug("        📜 Checking compliance requirements")
         
         business_impact = state.get('business_impact', {})
         customer_context = state.get('customer_context', {})
@@ -514,7 +595,7 @@ class CommonServerAbilities:
     
     def validate_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Validate the generated response for quality and accuracy."""
-        logger.info("        ✅ Validating response quality")
+        logger.debug("        ✅ Validating response quality")
         
         draft_response = state.get('draft_response', '')
         personalization = state.get('personalization', {})
@@ -540,7 +621,7 @@ class CommonServerAbilities:
     
     def verify_accuracy(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Verify accuracy of information and recommendations."""
-        logger.info("        🔍 Verifying information accuracy")
+        logger.debug("        🔍 Verifying information accuracy")
         
         support_category = state.get('support_category', {})
         suggested_actions = state.get('suggested_actions', [])
@@ -566,7 +647,7 @@ class CommonServerAbilities:
     
     def assess_escalation_need(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Assess if the request needs escalation."""
-        logger.info("        🔺 Assessing escalation need")
+        logger.debug("        🔺 Assessing escalation need")
         
         business_impact = state.get('business_impact', {})
         customer_context = state.get('customer_context', {})
@@ -597,7 +678,7 @@ class CommonServerAbilities:
     
     def determine_priority(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Determine final priority based on all factors."""
-        logger.info("        🎯 Determining final priority")
+        logger.debug("        🎯 Determining final priority")
         
         escalation_assessment = state.get('escalation_assessment', {})
         business_impact = state.get('business_impact', {})
@@ -652,7 +733,7 @@ class CommonServerAbilities:
     
     def route_to_agent(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Route request to appropriate human agent."""
-        logger.info("        🎯 Routing to agent")
+        logger.debug("        🎯 Routing to agent")
         
         escalation_need = state.get('escalation_need', {})
         priority_level = state.get('priority_level', {})
@@ -691,7 +772,7 @@ class CommonServerAbilities:
 
     def assess_complexity(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Assess the complexity of the customer request."""
-        logger.info("        🧠 Assessing request complexity")
+        logger.debug("        🧠 Assessing request complexity")
         
         request = state.get('request', {})
         customer_context = state.get('customer_context', {})
@@ -729,7 +810,7 @@ class CommonServerAbilities:
 
     def rank_recommendations(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Rank solution recommendations by relevance and effectiveness."""
-        logger.info("        📊 Ranking solution recommendations")
+        logger.debug("        📊 Ranking solution recommendations")
         
         solutions = state.get('generated_solutions', [])
         customer_context = state.get('customer_context', {})
@@ -784,7 +865,7 @@ class CommonServerAbilities:
 
     def generate_solution(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Generate tailored solutions based on customer request and context."""
-        logger.info("        💡 Generating tailored solutions")
+        logger.debug("        💡 Generating tailored solutions")
         
         request = state.get('request', {})
         customer_context = state.get('customer_context', {})
@@ -867,23 +948,17 @@ class CommonServerAbilities:
     
     def parse_request_text(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Parse and extract key information from request text."""
-        logger.info("        📝 Parsing request text")
+        logger.debug("        📝 Parsing request text")
         
         query = state.get('query', '')
         request_text = state.get('request', {}).get('text', query)
+        matches = keyword_matches(state, 'request_text')
         
         # Extract key phrases and entities
-        keywords = []
-        urgency_indicators = ['urgent', 'asap', 'immediately', 'critical', 'emergency']
-        
-        text_lower = request_text.lower()
-        for indicator in urgency_indicators:
-            if indicator in text_lower:
-                keywords.append(indicator)
+        keywords = matches.found('parse.urgency')
         
         # Extract potential product/service mentions
-        products = ['account', 'billing', 'payment', 'login', 'password', 'feature']
-        mentioned_products = [prod for prod in products if prod in text_lower]
+        mentioned_products = matches.found('parse.products')
         
         return {
             'parsed_request': {
@@ -898,7 +973,7 @@ class CommonServerAbilities:
     
     def add_flags_calculations(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Add flags and calculations based on request analysis."""
-        logger.info("        🚩 Adding flags and calculations")
+        logger.debug("        🚩 Adding flags and calculations")
         
         flags = {
             'high_priority': False,
@@ -909,7 +984,7 @@ class CommonServerAbilities:
         }
         
         # Analyze request content for flags
-        query = state.get('query', '').lower()
+        matches = keyword_matches(state, 'query')
         parsed_request = state.get('parsed_request', {})
         
         # High priority flag
@@ -917,18 +992,15 @@ class CommonServerAbilities:
             flags['high_priority'] = True
         
         # Technical issue flag
-        tech_keywords = ['error', 'bug', 'broken', 'not working', 'crash', 'issue']
-        if any(keyword in query for keyword in tech_keywords):
+        if matches.any('flags.technical_issue'):
             flags['technical_issue'] = True
         
         # Billing related flag
-        billing_keywords = ['billing', 'payment', 'charge', 'invoice', 'refund']
-        if any(keyword in query for keyword in billing_keywords):
+        if matches.any('flags.billing_related'):
             flags['billing_related'] = True
         
         # Escalation flag
-        escalation_keywords = ['manager', 'supervisor', 'complaint', 'unsatisfied']
-        if any(keyword in query for keyword in escalation_keywords):
+        if matches.any('flags.requires_escalation'):
             flags['requires_escalation'] = True
         
         # Calculate risk score
@@ -949,7 +1021,7 @@ class CommonServerAbilities:
     
     def response_generation(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Generate appropriate response based on request analysis."""
-        logger.info("        💬 Generating response")
+        logger.debug("        💬 Generating response")
         
         # Get context from state
         customer_name = state.get('customer', {}).get('name', 'Valued Customer')
@@ -998,7 +1070,7 @@ class CommonServerAbilities:
     
     def output_payload(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Generate structured JSON output payload according to LangGraph specification."""
-        logger.info("        📤 Generating structured output payload")
+        logger.debug("        📤 Generating structured output payload")
         
         # Extract or generate required fields from state
         case_id = state.get('case_id', f"case_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
@@ -1037,7 +1109,8 @@ class CommonServerAbilities:
         target_times = {'high': 60, 'medium': 240, 'low': 480}  # minutes
         target_time_minutes = target_times.get(priority, 240)
         
-        sla_compliance = SLACompliance(
+        models = get_payload_models()
+        sla_compliance = models['SLACompliance'](
             met=response_time_minutes <= target_time_minutes,
             response_time_minutes=response_time_minutes,
             target_time_minutes=target_time_minutes
@@ -1047,14 +1120,14 @@ class CommonServerAbilities:
         next_actions = []
         
         if escalation_required:
-            next_actions.append(NextAction(
+            next_actions.append(models['NextAction'](
                 action="escalate_to_specialist",
                 priority="high",
                 due_date=(current_time + timedelta(hours=2)).isoformat()
             ))
         
         if state.get('follow_up_required', True):
-            next_actions.append(NextAction(
+            next_actions.append(models['NextAction'](
                 action="follow_up_with_customer",
                 priority="medium",
                 due_date=(current_time + timedelta(days=1)).isoformat()
@@ -1062,7 +1135,7 @@ class CommonServerAbilities:
         
         # Create the structured payload
         try:
-            payload = CustomerSupportPayload(
+            payload = models['CustomerSupportPayload'](
                 case_id=case_id,
                 customer_id=customer_id,
                 resolution_status=resolution_status,
@@ -1079,7 +1152,7 @@ class CommonServerAbilities:
             }
             
         except Exception as e:
-            logger.error(f"Error creating structured payload: {e}")
+            logger.error("Error creating structured payload: %s", e)
             # Fallback to basic structure
             return {
                 'structured_payload': {
@@ -1102,15 +1175,15 @@ class CommonServerAbilities:
     
     def extract_entities(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Extract entities from customer request (delegated from Atlas)"""
-        logger.info("        🔍 Extracting entities")
+        logger.debug("        🔍 Extracting entities")
         
-        request_text = state.get('request', {}).get('description', '')
+        matches = keyword_matches(state, 'request_description')
         
         # Simple entity extraction
         entities = {
-            'urgency_level': 'high' if any(word in request_text.lower() for word in ['urgent', 'critical', 'emergency']) else 'medium',
-            'issue_type': 'technical' if any(word in request_text.lower() for word in ['api', 'error', 'timeout', 'integration']) else 'general',
-            'product_mentions': [word for word in ['api', 'authentication', 'billing', 'account'] if word in request_text.lower()]
+            'urgency_level': 'high' if matches.any('entities.urgency') else 'medium',
+            'issue_type': 'technical' if matches.any('entities.technical') else 'general',
+            'product_mentions': matches.found('entities.products')
         }
         
         return {
@@ -1120,7 +1193,7 @@ class CommonServerAbilities:
     
     def enrich_records(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Enrich customer records with additional data (delegated from Atlas)"""
-        logger.info("        📊 Enriching records")
+        logger.debug("        📊 Enriching records")
         
         customer_id = state.get('customer_id')
         
@@ -1140,7 +1213,7 @@ class CommonServerAbilities:
     
     def escalation_decision(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Make escalation decision based on analysis"""
-        logger.info("        ⬆️ Making escalation decision")
+        logger.debug("        ⬆️ Making escalation decision")
         
         urgency = state.get('request', {}).get('urgency', 'medium')
         customer_tier = state.get('customer_context', {}).get('subscription_tier', 'basic')
@@ -1155,7 +1228,7 @@ class CommonServerAbilities:
     
     def solution_evaluation(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Evaluate potential solutions"""
-        logger.info("        🎯 Evaluating solutions")
+        logger.debug("        🎯 Evaluating solutions")
         
         issue_type = state.get('request', {}).get('category', 'general')
         
@@ -1175,7 +1248,7 @@ class CommonServerAbilities:
     
     def update_payload(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Update the workflow payload with processed data"""
-        logger.info("        🔄 Updating payload")
+        logger.debug("        🔄 Updating payload")
         
         # Update state with processed information
         updates = {
@@ -1189,12 +1262,18 @@ class CommonServerAbilities:
             'update_timestamp': datetime.now().isoformat()
         }
 
-# Add the missing get_server function and server instance
-common_server = CommonServerAbilities()
+# Server instance, created on first use
+_server: Optional[CommonServerAbilities] = None
+_server_lock = threading.Lock()
 
 def get_server():
     """Get the Common MCP server instance."""
-    return common_server
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = CommonServerAbilities()
+    return _server
 
 if __name__ == "__main__":
     # Test the server
@@ -0,0 +1,186 @@
+"""Knowledge base search engine used by the Atlas knowledge base abilities.
+
+A **KnowledgeBase** is an in-process inverted index over the articles of a
+local corpus file (JSON Lines, one article per line):
+
+    {"id": "kb_001", "title": "...", "category": "billing",
+     "solution_steps": ["...", "..."], "url": "https://..."}
+
+Articles are ranked with BM25 over their title and solution steps (title
+terms count `TITLE_WEIGHT` times). The BM25 term weight of every posting is
+computed when the index is built (idf included), so a search adds up the
+postings of the query terms and selects the top k with a heap.
+
+Searches are pruned MaxScore-style: query terms are processed from the most
+to the least selective, and once the best possible contribution of the
+remaining (common, long-postings) terms cannot lift an article not seen yet
+into the results, those terms only update the articles already scored.
+
+Relevance: BM25 scores are unbounded, so results are reported with
+`relevance` = score / best score of the search. `relevance_threshold` (from
+the `retrieve` stage) therefore keeps the articles scoring at least that
+fraction of the best match.
+
+How to extend:
+- Point `AtlasServer(knowledge_base_path=...)` at a bigger corpus; the index
+  is built on the first search
+- Tune K1/B/TITLE_WEIGHT here; add fields by indexing them in `_article_terms()`
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Title terms count this many times their frequency
+TITLE_WEIGHT = 2
+# Matching articles in the request category get their score multiplied by this
+CATEGORY_BOOST = 1.5
+# Long queries (whole ticket descriptions) keep only their most selective terms
+MAX_QUERY_TERMS = 32
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have how i if in into is it
+its me my no not of on or our so than that the their them then there these they this to too us was
+we were what when where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of ``text`` without stopwords."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class KnowledgeBase:
+    """BM25-ranked inverted index over knowledge base articles."""
+
+    def __init__(self, articles: Iterable[Dict[str, Any]]):
+        """Index ``articles`` (dicts with at least an id and a title)."""
+        self.articles: List[Dict[str, Any]] = []
+        term_counts: List[Counter] = []
+        for article in articles:
+            self.articles.append(article)
+            term_counts.append(self._article_terms(article))
+
+        lengths = [sum(counts.values()) for counts in term_counts]
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+        # term -> {article index: BM25 term weight}
+        postings: Dict[str, Dict[int, float]] = {}
+        for index, (counts, length) in enumerate(zip(term_counts, lengths)):
+            norm = K1 * (1 - B + B * length / average_length) if average_length else K1
+            for term, tf in counts.items():
+                postings.setdefault(term, {})[index] = tf * (K1 + 1) / (tf + norm)
+
+        article_count = len(self.articles)
+        self._idf: Dict[str, float] = {}
+        for term, weights in postings.items():
+            idf = self._idf[term] = math.log(1 + (article_count - len(weights) + 0.5) / (len(weights) + 0.5))
+            for index in weights:
+                weights[index] *= idf
+        self._postings = postings
+        self._max_weight = {term: max(weights.values()) for term, weights in postings.items()}
+
+    @classmethod
+    def from_file(cls, path: str) -> "KnowledgeBase":
+        """Load and index a JSON Lines corpus."""
+        with open(path, 'r', encoding='utf-8') as f:
+            knowledge_base = cls(json.loads(line) for line in f if line.strip())
+        logger.info("Indexed %d knowledge base articles from %s", len(knowledge_base), path)
+        return knowledge_base
+
+    @staticmethod
+    def _article_terms(article: Dict[str, Any]) -> Counter:
+        """Weighted term frequencies of the indexed fields of an article."""
+        counts = Counter(tokenize(" ".join(article.get('solution_steps', []))))
+        for term in tokenize(article.get('title', '')):
+            counts[term] += TITLE_WEIGHT
+        return counts
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def search(self,
+               query: str,
+               max_results: int = 5,
+               relevance_threshold: float = 0.0,
+               category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rank articles for ``query``.
+
+        Args:
+            query: Free text (a query or a whole ticket description)
+            max_results: Number of articles returned at most
+            relevance_threshold: Minimum score as a fraction of the best score
+            category: Articles in this category are boosted
+
+        Returns:
+            Articles (copies) with `score` and `relevance`, best first
+        """
+        if max_results <= 0:
+            return []
+
+        terms = set(tokenize(query))
+        if len(terms) > MAX_QUERY_TERMS:
+            terms = heapq.nlargest(MAX_QUERY_TERMS, terms, key=lambda term: self._idf.get(term, 0.0))
+
+        # Most selective terms first; bounds[i] = best possible score from terms i..
+        terms = sorted((term for term in terms if term in self._postings),
+                       key=self._max_weight.__getitem__, reverse=True)
+        if not terms:
+            return []
+        boost_bound = CATEGORY_BOOST if category else 1.0
+        bounds = list(itertools.accumulate((self._max_weight[term] * boost_bound for term in reversed(terms))))[::-1]
+
+        scores: Dict[int, float] = {}
+        get = scores.get
+        for position, term in enumerate(terms):
+            weights = self._postings[term]
+            if len(scores) >= max_results and len(weights) > len(scores):
+                # Raw scores only grow and never exceed the boosted ones, so this
+                # is a lower bound of the score needed to be returned
+                values = heapq.nlargest(max_results, scores.values())
+                cutoff = max(values[-1], values[0] * relevance_threshold)
+                if bounds[position] < cutoff:
+                    # Unseen articles cannot make it: only update the candidates
+                    # that still can, for this and all remaining terms
+                    remaining = bounds[position]
+                    scores = {index: score for index, score in scores.items()
+                              if score * boost_bound + remaining >= cutoff}
+                    for later_term in terms[position:]:
+                        weights = self._postings[later_term]
+                        for index in scores:
+                            weight = weights.get(index)
+                            if weight is not None:
+                                scores[index] += weight
+                    break
+            for index, weight in weights.items():
+                scores[index] = get(index, 0.0) + weight
+
+        if category:
+            for index in scores:
+                if self.articles[index].get('category') == category:
+                    scores[index] *= CATEGORY_BOOST
+
+        top = heapq.nlargest(max_results, scores.items(), key=lambda item: item[1])
+        if not top:
+            return []
+
+        best = top[0][1]
+        results = []
+        for index, score in top:
+            relevance = score / best
+            if relevance < relevance_threshold:
+                break
+            results.append({**self.articles[index], 'score': round(score, 4), 'relevance': round(relevance, 4)})
+        return results
@@ -0,0 +1,39 @@
+"""Shared fixtures: the agent modules on sys.path, and agents built from a modified graph_config.yaml."""
+
+import contextlib
+import io
+import json
+import os
+import sys
+from typing import Any, Callable, Dict
+
+import pytest
+import yaml
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AGENT_DIR not in sys.path:
+    sys.path.insert(0, AGENT_DIR)
+
+
+@pytest.fixture
+def demo_input() -> Dict[str, Any]:
+    """The payload of demo_input.json."""
+    with open(os.path.join(AGENT_DIR, "demo_input.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def make_agent(tmp_path) -> Callable[..., Any]:
+    """Build a LangGraphAgent from graph_config.yaml after ``customize(config)`` changed it, in tmp_path."""
+    from agent import LangGraphAgent
+
+    def make(customize: Callable[[Dict[str, Any]], None]) -> LangGraphAgent:
+        with open(os.path.join(AGENT_DIR, "graph_config.yaml")) as f:
+            config = yaml.safe_load(f)
+        customize(config)
+        config_path = tmp_path / "graph_config.yaml"
+        config_path.write_text(yaml.safe_dump(config))
+        with contextlib.redirect_stdout(io.StringIO()):
+            return LangGraphAgent(str(config_path))
+
+    return make
@@ -0,0 +1,54 @@
+"""Checkpointed runs: a failed workflow resumes from the stage that failed."""
+
+import pytest
+
+
+def enable_checkpoints(config):
+    config['settings']['checkpoints'] = {'enabled': True, 'path': "checkpoints.sqlite3", 'keep_completed': False}
+
+
+def count_executions(node):
+    """Wrap ``node.execute`` to count its calls."""
+    execute, calls = node.execute, []
+
+    def counted(state, *args, **kwargs):
+        calls.append(state['workflow_id'])
+        return execute(state, *args, **kwargs)
+
+    node.execute = counted
+    return calls
+
+
+def test_resume_continues_from_the_failed_stage(make_agent, demo_input):
+    agent = make_agent(enable_checkpoints)
+    intake_calls = count_executions(agent.nodes['intake'])
+    retrieve = agent.nodes['retrieve']
+    execute = retrieve.execute
+
+    def fail_once(state, *args, **kwargs):
+        retrieve.execute = execute
+        raise RuntimeError("knowledge base unavailable")
+
+    retrieve.execute = fail_once
+    failed = agent.run(demo_input)
+    assert failed.status == 'failed'
+    assert failed.state['failed_stage'] == 'retrieve'
+    assert agent.checkpoints.load(failed.workflow_id).status == 'failed'
+
+    resumed = agent.resume(failed.workflow_id)
+    assert resumed.workflow_id == failed.workflow_id
+    assert resumed.status == 'completed'
+    assert resumed.state['resumed_from_stage'] == 'retrieve'
+    assert resumed.state['stage_results']['retrieve']['status'] == 'completed'
+    assert resumed.state['stage_results']['complete']['status'] == 'completed'
+    # The stages before the failure ran once
+    assert intake_calls == [failed.workflow_id]
+    # Completed runs are not kept (keep_completed: false)
+    with pytest.raises(LookupError):
+        agent.checkpoints.load(failed.workflow_id)
+
+
+def test_resume_without_checkpoints_is_an_error(make_agent):
+    agent = make_agent(lambda config: None)
+    with pytest.raises(RuntimeError):
+        agent.resume("cs_unknown")
@@ -0,0 +1,104 @@
+"""Single-flight coalescing: failing or cancelled leaders, and duplicate tickets attaching to running workflows."""
+
+import asyncio
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.coalescing import SingleFlight
+
+
+def test_leader_exception_reaches_followers_and_is_not_kept():
+    flights = SingleFlight(linger=60.0)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def failing_lookup():
+        calls.append("leader")
+        started.set()
+        release.wait(5)
+        raise ConnectionError("atlas unavailable")
+
+    errors = []
+
+    def follower():
+        try:
+            flights.do("lookup", "cust_1", lambda: calls.append("follower"))
+        except ConnectionError as e:
+            errors.append(e)
+
+    def leader():
+        with pytest.raises(ConnectionError):
+            flights.do("lookup", "cust_1", failing_lookup)
+
+    leading = threading.Thread(target=leader)
+    leading.start()
+    assert started.wait(5)
+    following = threading.Thread(target=follower)
+    following.start()
+    while flights.get_stats()['coalesced'] < 1:
+        threading.Event().wait(0.001)
+    release.set()
+    leading.join(5)
+    following.join(5)
+
+    assert calls == ["leader"]
+    assert len(errors) == 1 and str(errors[0]) == "atlas unavailable"
+    # A failure does not linger: the next call runs again
+    assert flights.do("lookup", "cust_1", lambda: "found") == "found"
+    assert flights.get_stats()['calls']['lookup'] == {'executions': 2, 'coalesced': 1}
+
+
+def test_cancelled_async_leader_hands_the_call_to_a_follower():
+    flights = SingleFlight()
+    calls = []
+
+    async def lookup(caller):
+        calls.append(caller)
+        await asyncio.sleep(0.05)
+        return {'customer': "cust_1", 'looked_up_by': caller}
+
+    async def scenario():
+        leader = asyncio.create_task(flights.ado("lookup", "cust_1", lookup, "leader"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flights.ado("lookup", "cust_1", lookup, "follower"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    result = asyncio.run(scenario())
+
+    assert result == {'customer': "cust_1", 'looked_up_by': "follower"}
+    assert calls == ["leader", "follower"]
+    stats = flights.get_stats()
+    assert stats['executions'] == 2
+    assert stats['in_flight'] == 0
+
+
+
+def test_duplicate_tickets_attach_to_running_workflows_only_when_asked(make_agent, demo_input, monkeypatch):
+    def attach_duplicates(config):
+        config['settings']['coalescing'] = {'enabled': True, 'abilities': [],
+                                            'duplicate_workflows': {'enabled': True}}
+
+    agent = make_agent(attach_duplicates)
+    # Long enough for both runs to be in flight together
+    monkeypatch.setattr(agent.mcp_client.servers['atlas'], 'simulated_latency', 0.02)
+
+    def run_twice(**kwargs):
+        with ThreadPoolExecutor(2) as pool:
+            return list(pool.map(lambda _: agent.run(copy.deepcopy(demo_input), **kwargs), range(2)))
+
+    attached = run_twice(attach_duplicates=True)
+    assert sorted(run.attached for run in attached) == [False, True]
+    assert attached[0].workflow_id == attached[1].workflow_id
+
+    separate = run_twice()
+    assert not any(run.attached for run in separate)
+    assert separate[0].workflow_id != separate[1].workflow_id
+    # A finished workflow answers no duplicate (window_seconds: 0)
+    assert not agent.run(demo_input, attach_duplicates=True).attached
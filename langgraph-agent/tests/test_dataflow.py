@@ -0,0 +1,81 @@
+"""Dataflow declarations: every ability reads and returns only the fields its ABILITY_DATAFLOW entry declares."""
+
+import contextlib
+import io
+import json
+import os
+from collections.abc import Mapping
+
+import pytest
+
+from agent import LangGraphAgent
+from core.dataflow import ANY_FIELD
+from servers.atlas import get_server as get_atlas
+from servers.common import get_server as get_common
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Node's per-stage context (the stage's params), set around every call: not a state field
+NODE_FIELDS = {'_execution_context'}
+
+ABILITIES = [(server, name) for server in (get_common(), get_atlas()) for name in sorted(server.ABILITY_DATAFLOW)]
+
+
+class RecordingState(Mapping):
+    """A read-only state that records the fields read from it."""
+
+    def __init__(self, data):
+        self.data = data
+        self.reads = set()
+
+    def __getitem__(self, key):
+        self.reads.add(key)
+        return self.data[key]
+
+    def __contains__(self, key):
+        self.reads.add(key)
+        return key in self.data
+
+    def __iter__(self):
+        self.reads.add(ANY_FIELD)
+        return iter(self.data)
+
+    def __len__(self):
+        self.reads.add(ANY_FIELD)
+        return len(self.data)
+
+
+@pytest.fixture(scope="module")
+def states():
+    """States abilities see: empty, a fresh ticket, and a ticket after the whole workflow."""
+    with open(os.path.join(AGENT_DIR, "demo_input.json")) as f:
+        ticket = json.load(f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = LangGraphAgent(os.path.join(AGENT_DIR, "graph_config.yaml"))
+        finished = agent.run(dict(ticket)).state
+    return [{}, ticket, finished]
+
+
+@pytest.mark.parametrize("server, ability", ABILITIES, ids=[f"{type(s).__name__}.{a}" for s, a in ABILITIES])
+def test_ability_stays_within_its_declaration(server, ability, states):
+    declaration = server.ABILITY_DATAFLOW[ability]
+    fn = server.resolve_ability(ability)
+    assert fn is not None, f"{ability} is declared but not provided"
+
+    for state in states:
+        recording = RecordingState(state)
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                result = fn(recording)
+            except Exception:
+                # Reads made before failing must still be declared
+                result = None
+        if ANY_FIELD not in declaration['reads']:
+            assert recording.reads - NODE_FIELDS <= set(declaration['reads'])
+        if isinstance(result, dict) and ANY_FIELD not in declaration['writes']:
+            assert set(result) <= set(declaration['writes'])
+
+
+@pytest.mark.parametrize("server", [get_common(), get_atlas()], ids=lambda server: type(server).__name__)
+def test_every_ability_is_declared(server):
+    assert set(server.get_abilities()) <= set(server.ABILITY_DATAFLOW)
@@ -0,0 +1,67 @@
+"""Deadlines: an ability past its own budget fails alone, a stage or workflow past its budget ends with the timeout_error fallback."""
+
+import asyncio
+
+import pytest
+
+# Every Atlas call takes this long
+ATLAS_LATENCY = 0.3
+
+
+def stage(config, name):
+    return next(stage for stage in config['stages'] if stage['name'] == name)
+
+
+@pytest.fixture
+def slow_atlas(monkeypatch):
+    """Slow down the Atlas server (shared by every agent of the process) for one test."""
+    def slow_down(agent):
+        monkeypatch.setattr(agent.mcp_client.servers['atlas'], 'simulated_latency', ATLAS_LATENCY)
+        return agent
+    return slow_down
+
+
+def run(agent, payload, asynchronous):
+    if asynchronous:
+        return asyncio.run(agent.arun(payload))
+    return agent.run(payload)
+
+
+@pytest.mark.parametrize("asynchronous", [False, True], ids=["run", "arun"])
+def test_ability_past_its_budget_fails_and_the_workflow_goes_on(make_agent, slow_atlas, demo_input, asynchronous):
+    def short_ability_budget(config):
+        stage(config, "retrieve")['ability_timeout_seconds'] = 0.1
+
+    result = run(slow_atlas(make_agent(short_ability_budget)), demo_input, asynchronous)
+
+    assert result.status == 'completed'
+    assert result.state['knowledge_base_search_timed_out'] is True
+    assert "ability 'knowledge_base_search'" in result.state['knowledge_base_search_error']
+    assert 'fallback_response' not in result.state
+
+
+@pytest.mark.parametrize("asynchronous", [False, True], ids=["run", "arun"])
+def test_stage_past_its_budget_ends_with_the_timeout_fallback(make_agent, slow_atlas, demo_input, asynchronous):
+    def short_stage(config):
+        stage(config, "retrieve")['timeout_seconds'] = 0.1
+
+    agent = slow_atlas(make_agent(short_stage))
+    result = run(agent, demo_input, asynchronous)
+
+    assert result.status == 'timed_out'
+    assert result.state['timed_out_scope'] == 'stage'
+    assert result.state['failed_stage'] == 'retrieve'
+    assert result.state['fallback_response'] == 'timeout_error'
+    assert result.state['response_text'] == agent.plan.fallback_responses['timeout_error']
+    assert 'decide' not in result.state['stage_results']
+
+
+def test_workflow_past_its_budget_ends_with_the_timeout_fallback(make_agent, slow_atlas, demo_input):
+    def short_workflow(config):
+        config['settings']['performance']['max_total_workflow_time_seconds'] = 0.5
+
+    result = slow_atlas(make_agent(short_workflow)).run(demo_input)
+
+    assert result.status == 'timed_out'
+    assert result.state['timed_out_scope'] == 'workflow'
+    assert result.state['fallback_response'] == 'timeout_error'
@@ -0,0 +1,101 @@
+"""Per-server isolation: bulkheads that wait for a slot until the caller's deadline, and circuit breakers."""
+
+import asyncio
+import threading
+
+from core import isolation
+from core.isolation import CLOSED, HALF_OPEN, OPEN, Bulkhead, CircuitBreaker
+
+
+def release_later(bulkhead, seconds):
+    timer = threading.Timer(seconds, bulkhead.release)
+    timer.start()
+    return timer
+
+
+def test_bulkhead_waits_for_a_slot_until_the_timeout():
+    bulkhead = Bulkhead("atlas", max_concurrent=1, max_wait_seconds=0.0)
+    assert bulkhead.acquire()
+    # Without a timeout: max_wait_seconds
+    assert not bulkhead.acquire()
+
+    release_later(bulkhead, 0.05).join()
+    assert bulkhead.acquire()
+    timer = release_later(bulkhead, 0.05)
+    assert bulkhead.acquire(timeout=5)
+    timer.join()
+    assert not bulkhead.acquire(timeout=0.01)
+
+    state = bulkhead.get_state()
+    assert state['in_use'] == 1
+    assert state['admitted'] == 3
+    assert state['rejected'] == 2
+
+
+def test_async_bulkhead_waits_for_a_slot_until_the_timeout():
+    bulkhead = Bulkhead("atlas", max_concurrent=1, max_wait_seconds=0.0)
+
+    async def scenario():
+        assert await bulkhead.aacquire()
+        asyncio.get_running_loop().call_later(0.05, bulkhead.release)
+        assert await bulkhead.aacquire(timeout=5)
+        return await bulkhead.aacquire(timeout=0.01)
+
+    assert asyncio.run(scenario()) is False
+    assert bulkhead.get_state()['rejected'] == 1
+
+
+def test_breaker_opens_probes_half_open_and_closes(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(isolation.time, 'monotonic', lambda: clock[0])
+    breaker = CircuitBreaker("atlas", failure_rate_threshold=0.5, window_size=4, minimum_calls=4,
+                             open_seconds=30, half_open_calls=2)
+
+    for failed in (False, True, False, True):
+        assert breaker.allow()
+        breaker.record(failed, 0.01)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock[0] += 30
+    # Half-open: only half_open_calls probes at a time
+    assert breaker.allow() and breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+    assert breaker.get_state()['window_calls'] == 0
+    assert breaker.get_state()['rejected'] == 2
+
+
+def test_failed_or_slow_probe_opens_the_breaker_again(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(isolation.time, 'monotonic', lambda: clock[0])
+    breaker = CircuitBreaker("atlas", slow_call_seconds=1, slow_call_rate_threshold=0.5,
+                             window_size=2, minimum_calls=2, open_seconds=10, half_open_calls=1)
+
+    breaker.record(False, 2.0)
+    breaker.record(False, 2.0)
+    assert breaker.state == OPEN
+
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.get_state()['opened'] == 2
+
+
+def test_open_breaker_rejects_calls_without_retry(make_agent, demo_input, monkeypatch):
+    agent = make_agent(lambda config: None)
+    breaker = agent.mcp_client.circuit_breakers['atlas']
+    monkeypatch.setattr(breaker, 'allow', lambda: False)
+
+    result = agent.run(demo_input)
+
+    assert result.state['rejected_by'] == 'circuit_breaker'
+    assert result.state['retryable'] is False
+    assert result.state.get('knowledge_base_results') is None
+    # Rejections are not retried against an open circuit
+    assert agent.retry_engine.get_stats()['atlas']['retries'] == 0
@@ -0,0 +1,72 @@
+"""Streaming JSONL runs: after a crash, --resume leaves exactly one result per input line."""
+
+import json
+
+import pytest
+
+from core.jsonl_stream import CHECKPOINT_SUFFIX, load_checkpoint, run_jsonl
+
+
+class Killed(Exception):
+    """Stands in for the process dying mid-run."""
+
+
+def kill_after(monkeypatch, agent, results):
+    """Make ``agent.run_batch`` die after yielding ``results`` results."""
+    run_batch = agent.run_batch
+
+    def dying(*args, **kwargs):
+        for count, item in enumerate(run_batch(*args, **kwargs)):
+            if count == results:
+                raise Killed()
+            yield item
+
+    monkeypatch.setattr(agent, 'run_batch', dying)
+
+
+def test_resume_after_a_kill_writes_each_line_once(make_agent, demo_input, monkeypatch, tmp_path):
+    agent = make_agent(lambda config: None)
+    input_path, output_path = tmp_path / "tickets.jsonl", tmp_path / "results.jsonl"
+    tickets = [dict(demo_input, ticket_id=f"T-{i}") for i in range(7)]
+    lines = [json.dumps(ticket) for ticket in tickets]
+    lines.insert(3, "not json")
+    input_path.write_text("\n".join(lines) + "\n")
+
+    kill_after(monkeypatch, agent, 4)
+    with pytest.raises(Killed):
+        run_jsonl(agent, str(input_path), str(output_path), workers=2, checkpoint_every=2)
+    # A torn write after the last checkpoint
+    with open(output_path, "ab") as f:
+        f.write(b'{"line": 9, "summ')
+    checkpoint = load_checkpoint(str(output_path))
+    assert checkpoint['lines'] == 4
+    assert output_path.stat().st_size > checkpoint['output_offset']
+    monkeypatch.undo()
+
+    final = run_jsonl(agent, str(input_path), str(output_path), workers=2, resume=True, checkpoint_every=2)
+
+    records = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert [record['line'] for record in records] == list(range(1, 9))
+    assert 'invalid input line' in records[3]['error']
+    ticket_ids = [record['state']['ticket_id'] for record in records if 'state' in record]
+    assert ticket_ids == [ticket['ticket_id'] for ticket in tickets]
+    assert final['lines'] == 8
+    assert final['failed'] == 1
+    assert final['input_offset'] == input_path.stat().st_size
+    assert final['output_offset'] == output_path.stat().st_size
+
+
+def test_resume_needs_a_checkpoint_of_the_same_input(make_agent, tmp_path):
+    agent = make_agent(lambda config: None)
+    input_path, output_path = tmp_path / "tickets.jsonl", tmp_path / "results.jsonl"
+    input_path.write_text("")
+
+    with pytest.raises(ValueError, match="no checkpoint"):
+        run_jsonl(agent, str(input_path), str(output_path), resume=True)
+
+    run_jsonl(agent, str(input_path), str(output_path))
+    other = tmp_path / "other.jsonl"
+    other.write_text("")
+    with pytest.raises(ValueError, match="belongs to"):
+        run_jsonl(agent, str(other), str(output_path), resume=True)
+    assert (tmp_path / ("results.jsonl" + CHECKPOINT_SUFFIX)).exists()
@@ -0,0 +1,31 @@
+"""Stored keyword matches: reused for the text they were found in, never for another one."""
+
+import json
+
+from servers.keyword_matcher import keyword_matches, match_text_sources
+
+
+def test_stored_matches_are_reused_only_for_the_same_text():
+    state = {'query': "billing error on my invoice"}
+    state['keyword_matches'] = match_text_sources(state)
+    assert keyword_matches(state, 'query').any("flags.billing_related")
+
+    # Same length, other text: matched again
+    changed = dict(state, query="login broken, need a manager")
+    changed['query'] = changed['query'][:len(state['query'])].ljust(len(state['query']))
+    assert len(changed['query']) == len(state['query'])
+    matches = keyword_matches(changed, 'query')
+    assert not matches.any("flags.billing_related")
+    assert matches.any("flags.technical_issue")
+
+
+def test_stored_matches_leave_the_text_out_of_the_state():
+    description = "Stack trace follows. " + "ERROR timeout in worker pool\n" * 2000
+    state = {'query': description, 'request': {'subject': "Crash", 'description': description}}
+    stored = match_text_sources(state)
+
+    assert description not in json.dumps(stored)
+    assert len(json.dumps(stored)) < 2000
+    # A JSON round trip (checkpoints, result records) keeps them usable
+    state['keyword_matches'] = json.loads(json.dumps(stored))
+    assert keyword_matches(state, 'request_description').found("entities.technical") == ["error", "timeout"]
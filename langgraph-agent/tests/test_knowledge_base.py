@@ -0,0 +1,70 @@
+"""Knowledge base search: the pruned (MaxScore) search ranks like scoring every article with BM25."""
+
+import math
+from collections import Counter
+
+import pytest
+
+from benchmarks.knowledge_base import QUERIES, make_corpus
+from servers.knowledge_base import B, CATEGORY_BOOST, K1, TITLE_WEIGHT, KnowledgeBase, tokenize
+
+
+def brute_force(corpus, query, category=None):
+    """BM25 score of every article for ``query``, straight from the definition."""
+    documents = []
+    for article in corpus:
+        counts = Counter(tokenize(" ".join(article.get('solution_steps', []))))
+        for term in tokenize(article.get('title', '')):
+            counts[term] += TITLE_WEIGHT
+        documents.append(counts)
+    average_length = sum(sum(counts.values()) for counts in documents) / len(documents)
+    terms = set(tokenize(query))
+
+    scores = {}
+    for index, counts in enumerate(documents):
+        length = sum(counts.values())
+        score = 0.0
+        for term in terms:
+            if counts[term]:
+                frequency = sum(1 for other in documents if other[term])
+                idf = math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+                tf = counts[term]
+                score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+        if score and category and corpus[index].get('category') == category:
+            score *= CATEGORY_BOOST
+        if score:
+            scores[corpus[index]['id']] = score
+    return scores
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return make_corpus(400)
+
+
+@pytest.fixture(scope="module")
+def knowledge_base(corpus):
+    return KnowledgeBase(corpus)
+
+
+@pytest.mark.parametrize("query", QUERIES + ["login", "term1 term2 term3 refund", "nothing matches zzzz"])
+@pytest.mark.parametrize("category", [None, "billing"])
+@pytest.mark.parametrize("max_results, relevance_threshold", [(5, 0.0), (5, 0.75), (20, 0.3)])
+def test_search_matches_brute_force_bm25(corpus, knowledge_base, query, category, max_results, relevance_threshold):
+    expected = brute_force(corpus, query, category)
+    best = sorted(expected.values(), reverse=True)[:max_results]
+    best = [score for score in best if score >= best[0] * relevance_threshold]
+
+    results = knowledge_base.search(query, max_results=max_results,
+                                    relevance_threshold=relevance_threshold, category=category)
+
+    assert [article['score'] for article in results] == [round(score, 4) for score in best]
+    for article in results:
+        assert article['score'] == round(expected[article['id']], 4)
+        assert article['relevance'] == round(expected[article['id']] / best[0], 4)
+
+
+def test_empty_searches(knowledge_base):
+    assert knowledge_base.search("", max_results=5) == []
+    assert knowledge_base.search("the and of", max_results=5) == []
+    assert knowledge_base.search("password", max_results=0) == []
@@ -0,0 +1,58 @@
+"""Parking at the wait stage: the run is saved until the customer replies, and resumes exactly once."""
+
+import pytest
+
+from core.checkpoint_store import WAITING
+from core.plan import PlanError
+
+
+def wait_for_reply(config):
+    config['settings']['checkpoints'] = {'enabled': True, 'path': "checkpoints.sqlite3", 'keep_completed': False}
+    wait = next(stage for stage in config['stages'] if stage['name'] == "wait")
+    wait.pop('run_if', None)
+    wait['wait_for'] = {'field': "customer_response"}
+
+
+def count_executions(node):
+    """Wrap ``node.execute`` to count its calls."""
+    execute, calls = node.execute, []
+
+    def counted(state, *args, **kwargs):
+        calls.append(state['workflow_id'])
+        return execute(state, *args, **kwargs)
+
+    node.execute = counted
+    return calls
+
+
+def test_parked_workflow_resumes_once_with_the_reply(make_agent, demo_input):
+    agent = make_agent(wait_for_reply)
+    wait_calls = count_executions(agent.nodes['wait'])
+
+    parked = agent.run(demo_input)
+    assert parked.parked
+    assert parked.state['waiting_for'] == 'customer_response'
+    assert wait_calls == []
+    assert agent.checkpoints.load(parked.workflow_id).status == WAITING
+
+    with pytest.raises(ValueError):
+        agent.resume(parked.workflow_id, {'unrelated': "field"})
+
+    resumed = agent.resume(parked.workflow_id, {'customer_response': "It fails on every login since 2 AM"})
+    assert resumed.status == 'completed'
+    assert resumed.state['customer_response'] == "It fails on every login since 2 AM"
+    assert 'waiting_for' not in resumed.state
+    assert wait_calls == [parked.workflow_id]
+
+    with pytest.raises(LookupError):
+        agent.resume(parked.workflow_id, {'customer_response': "Any news?"})
+
+
+
+def test_wait_for_needs_checkpoints(make_agent):
+    def wait_without_checkpoints(config):
+        wait_for_reply(config)
+        config['settings']['checkpoints']['enabled'] = False
+
+    with pytest.raises(PlanError, match="enable settings.checkpoints"):
+        make_agent(wait_without_checkpoints)
@@ -0,0 +1,73 @@
+"""Stage conditions: compiled predicates, `run_if` skips and `next` edges."""
+
+import pytest
+
+from core.plan import PlanError
+from core.predicates import Predicate, PredicateError
+
+
+def stage(config, name):
+    return next(stage for stage in config['stages'] if stage['name'] == name)
+
+
+def test_predicates_read_nested_fields_and_items():
+    state = {
+        'knowledge_base_results': [{'score': 24.5, 'category': "billing"}],
+        'request': {'urgency': "high"},
+        'flags': {'requires_escalation': False},
+    }
+    assert Predicate("knowledge_base_results[0].score >= 20 and not flags.requires_escalation")(state)
+    assert Predicate("request.urgency in ['critical', 'high']")(state)
+    assert Predicate("len(knowledge_base_results) == 1")(state)
+    assert not Predicate("request['urgency'] == 'low' or knowledge_base_results[0].category != 'billing'")(state)
+
+
+def test_missing_fields_never_fail_a_predicate():
+    assert Predicate("customer.tier is None")({})
+    assert not Predicate("knowledge_base_results[0].score >= 20")({})
+    assert not Predicate("knowledge_base_results[0].score >= 20")({'knowledge_base_results': []})
+    assert not Predicate("priority > 3")({'priority': "high"})
+    assert Predicate("len(attachments) == 0")({})
+
+
+@pytest.mark.parametrize("source", ["", "priority ==", "f(priority)", "results[index]", "a + 1", "__import__('os')"])
+def test_unsupported_predicates_are_rejected(source):
+    with pytest.raises(PredicateError):
+        Predicate(source)
+
+
+def test_run_if_skips_a_stage(make_agent, demo_input):
+    def skip_decide(config):
+        stage(config, "decide")['run_if'] = "request.urgency != 'critical'"
+
+    run = make_agent(skip_decide).run(demo_input)
+
+    assert run.status == 'completed'
+    assert run.state['stage_results']['decide']['status'] == 'skipped'
+    assert 'evaluation_timestamp' not in run.state
+    assert run.state['stage_results']['create']['status'] == 'completed'
+
+
+def test_next_edge_jumps_over_the_stages_in_between(make_agent, demo_input):
+    def jump_to_create(config):
+        stage(config, "retrieve")['next'] = [
+            {'when': "request.urgency == 'low'", 'goto': "complete"},
+            {'when': "customer_context.subscription_tier == 'premium'", 'goto': "create"},
+        ]
+
+    run = make_agent(jump_to_create).run(demo_input)
+
+    assert run.status == 'completed'
+    assert run.state['stage_results']['decide'] == {'status': 'skipped', 'reason': "jumped to stage create"}
+    assert 'evaluation_timestamp' not in run.state
+    assert run.state['stage_results']['create']['status'] == 'completed'
+    assert run.state['stage_results']['complete']['status'] == 'completed'
+    assert 'skip_to_stage' not in run.state
+
+
+def test_next_edge_must_go_forward(make_agent):
+    def jump_back(config):
+        stage(config, "decide")['next'] = [{'when': "True", 'goto': "intake"}]
+
+    with pytest.raises(PlanError):
+        make_agent(jump_back)
@@ -0,0 +1,52 @@
+"""PreforkExecutor: a crashed worker is replaced and its task requeued, up to max_task_attempts."""
+
+import os
+
+import pytest
+
+from core.prefork import PreforkExecutor, WorkerCrashedError
+
+
+def crash_first_attempt(marker):
+    """Kill the worker the first time (no marker yet), then answer."""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(70)
+    return os.getpid()
+
+
+def always_crash():
+    os._exit(70)
+
+
+@pytest.fixture
+def executor():
+    executor = PreforkExecutor(2, handle_sigterm=False)
+    yield executor
+    executor.shutdown()
+
+
+def test_crashed_task_is_requeued_on_a_replacement_worker(executor, tmp_path):
+    original = set(executor.worker_pids())
+
+    pid = executor.submit(crash_first_attempt, str(tmp_path / "crashed")).result(timeout=30)
+
+    assert pid in executor.worker_pids()
+    assert len(set(executor.worker_pids()) - original) == 1
+    assert executor.submit(os.getpid).result(timeout=30) in executor.worker_pids()
+    stats = executor.get_stats()
+    assert stats['crashed_tasks'] == 1
+    assert stats['restarts'] == 1
+    assert stats['completed'] == 2
+    assert stats['failed'] == 0
+
+
+def test_task_crashing_every_attempt_fails(executor):
+    with pytest.raises(WorkerCrashedError):
+        executor.submit(always_crash).result(timeout=30)
+
+    stats = executor.get_stats()
+    assert stats['crashed_tasks'] == executor.max_task_attempts
+    assert stats['failed'] == 1
+    # The workers it killed were replaced
+    assert len(executor.worker_pids()) == 2
@@ -0,0 +1,113 @@
+"""Retries: only transient failures, with jittered backoff, within a per-server budget."""
+
+import random
+
+import pytest
+
+from core.retry import RetryBudget, RetryEngine, RetryPolicy
+
+SERVERS = {'common': {'type': "internal"}, 'atlas': {'type': "external"}}
+
+
+def test_only_external_servers_retry_unmarked_failures():
+    engine = RetryEngine.from_config({'max_retries': 3, 'retry_delay_seconds': 5}, SERVERS)
+    atlas, common = engine.policy_for("update_ticket", "atlas"), engine.policy_for("response_generation", "common")
+
+    failure = {'success': False, 'error': "boom"}
+    assert atlas.retries_result(failure) and atlas.retries_error(RuntimeError("boom"))
+    assert not common.retries_result(failure) and not common.retries_error(RuntimeError("boom"))
+    # Results marked retryable decide on both
+    assert common.retries_result(dict(failure, retryable=True))
+    assert not atlas.retries_result(dict(failure, retryable=False))
+    assert not atlas.retries_result({'success': True})
+
+    assert (atlas.base_delay, common.base_delay, common.max_delay) == (5, 0.05, 0.5)
+
+
+def test_ability_overrides_apply_on_top_of_the_server_policy():
+    engine = RetryEngine.from_config({'max_retries': 3, 'retry': {
+        'in_process': {'retry_delay_seconds': 0.01, 'max_delay_seconds': 0.1},
+        'abilities': {'knowledge_base_search': {'max_retries': 1, 'retry_delay_seconds': 1, 'max_delay_seconds': 2}},
+    }}, SERVERS)
+
+    search = engine.policy_for("knowledge_base_search", "atlas")
+    assert (search.max_retries, search.base_delay, search.max_delay, search.transient_failures) == (1, 1, 2, True)
+    assert engine.policy_for("response_generation", "common").base_delay == 0.01
+    with pytest.raises(ValueError):
+        RetryEngine.from_config({'retry': {'abilities': {'knowledge_base_search': {'retries': 1}}}}, SERVERS)
+
+
+def test_backoff_is_decorrelated_jitter_within_bounds():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    rng = random.Random(3)
+    delay, delays = None, []
+    for _ in range(50):
+        previous = delay
+        delay = policy.next_delay(previous, rng)
+        assert 0.5 <= delay <= min(4.0, 3 * (previous or 0.5))
+        delays.append(delay)
+    assert len(set(delays)) > 10
+    assert max(delays) == 4.0
+
+
+def test_budget_allows_retries_up_to_a_share_of_requests():
+    budget = RetryBudget(ratio=0.5, burst=2)
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    assert budget.get_stats() == {'requests': 2, 'retries': 3, 'rejected': 2, 'tokens': 0.0}
+
+
+def fail_first_calls(monkeypatch, agent, ability, failures):
+    """Make the first ``failures`` calls of ``ability`` return success: False; returns the call count."""
+    invoke, calls = agent.mcp_client.invoke, []
+
+    def failing(bound, context, *args):
+        if bound.name != ability:
+            return invoke(bound, context, *args)
+        calls.append(bound.name)
+        if len(calls) <= failures:
+            return {'success': False, 'error': "upstream unavailable"}
+        return invoke(bound, context, *args)
+
+    # The client is shared by every agent of the process
+    monkeypatch.setattr(agent.mcp_client, 'invoke', failing)
+    return calls
+
+
+def fast_retries(config):
+    config['settings']['retry']['abilities'] = {
+        'knowledge_base_search': {'max_retries': 2, 'retry_delay_seconds': 0.01, 'max_delay_seconds': 0.02}}
+
+
+def test_failed_external_call_is_retried(make_agent, demo_input, monkeypatch):
+    agent = make_agent(fast_retries)
+    calls = fail_first_calls(monkeypatch, agent, "knowledge_base_search", failures=1)
+
+    result = agent.run(demo_input)
+
+    assert len(calls) == 2
+    assert result.state['search_success'] is True
+    assert agent.retry_engine.get_stats()['atlas']['retries'] == 1
+
+
+def test_external_call_gives_up_after_max_retries(make_agent, demo_input, monkeypatch):
+    agent = make_agent(fast_retries)
+    calls = fail_first_calls(monkeypatch, agent, "knowledge_base_search", failures=10)
+
+    result = agent.run(demo_input)
+
+    assert len(calls) == 3
+    assert result.state['error'] == "upstream unavailable"
+
+
+def test_in_process_failure_is_not_retried(make_agent, demo_input, monkeypatch):
+    agent = make_agent(lambda config: None)
+    calls = fail_first_calls(monkeypatch, agent, "response_generation", failures=1)
+
+    agent.run(demo_input)
+
+    assert calls == ["response_generation"]
@@ -0,0 +1,112 @@
+"""Batch scheduling: EDF within priority lanes, promotion of at-risk tickets, and the SLA report."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from core import scheduler
+from core.predicates import Predicate
+from core.scheduler import DeadlineScheduler, Lane
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A manual clock for the scheduler module: ``clock[0]`` is the time in seconds."""
+    now = [0.0]
+    monkeypatch.setattr(scheduler, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def ticket(name, urgency="low", tier="basic", sla=None):
+    payload = {'name': name, 'request': {'urgency': urgency}, 'customer_context': {'subscription_tier': tier}}
+    if sla is not None:
+        payload['customer_context']['contract_details'] = {'sla_response_time': sla}
+    return payload
+
+
+def make_scheduler(**kwargs):
+    critical = Predicate("request.urgency == 'critical' and customer_context.subscription_tier in ['enterprise', 'premium']")
+    return DeadlineScheduler([Lane("critical", critical), Lane("bulk")], **kwargs)
+
+
+def drain(queue):
+    return [queue.pop().payload['name'] for _ in range(len(queue))]
+
+
+def test_lanes_are_served_in_order_and_earliest_deadline_first(clock):
+    queue = make_scheduler().queue()
+    for payload in [ticket("bulk-low"), ticket("bulk-high", urgency="high"),
+                    ticket("critical-1h", urgency="critical", tier="enterprise"),
+                    ticket("bulk-critical", urgency="critical"),
+                    ticket("critical-15m", urgency="critical", tier="premium", sla="15_minutes")]:
+        queue.push(len(queue), payload)
+
+    assert drain(queue) == ["critical-15m", "critical-1h", "bulk-critical", "bulk-high", "bulk-low"]
+
+
+def test_fifo_keeps_arrival_order(clock):
+    queue = make_scheduler(policy="fifo").queue()
+    for payload in [ticket("bulk-low"), ticket("critical", urgency="critical", tier="premium")]:
+        queue.push(len(queue), payload)
+
+    assert drain(queue) == ["bulk-low", "critical"]
+
+
+def test_at_risk_ticket_overtakes_the_lanes(clock):
+    queue = make_scheduler(promote_at_risk=0.1).queue()
+    queue.push(0, ticket("bulk", sla=100))
+    clock[0] = 91
+    queue.push(1, ticket("critical", urgency="critical", tier="premium"))
+
+    assert drain(queue) == ["bulk", "critical"]
+    assert queue.report()['lanes']['bulk']['promoted'] == 1
+
+
+def test_late_ticket_is_not_promoted(clock):
+    queue = make_scheduler(promote_at_risk=0.1).queue()
+    queue.push(0, ticket("bulk", sla=100))
+    clock[0] = 101
+    queue.push(1, ticket("critical", urgency="critical", tier="premium"))
+
+    assert drain(queue) == ["critical", "bulk"]
+
+
+def test_report_separates_misses_caused_by_queueing(clock):
+    queue = make_scheduler().queue()
+    for name in ["queued", "slow", "on-time"]:
+        queue.push(len(queue), ticket(name, sla=60))
+
+    queued = queue.pop()
+    clock[0] = 50
+    slow, on_time = queue.pop(), queue.pop()
+    clock[0] = 55
+    queue.finish(on_time)
+    clock[0] = 70
+    # Ran for 70 s: late whenever it had started
+    queue.finish(queued)
+    # Waited 50 s, then ran for 20 s: late only because it waited
+    queue.finish(slow)
+
+    report = queue.report()
+    assert report['tickets'] == 3
+    assert report['sla_missed'] == 2
+    assert report['missed_by_queueing'] == 1
+    bulk = report['lanes']['bulk']
+    assert bulk['missed_by_queueing'] == 1
+    assert bulk['wait_max'] == pytest.approx(50)
+    assert report['lanes']['critical']['tickets'] == 0
+
+
+def test_batch_reports_tickets_per_lane(make_agent, demo_input):
+    agent = make_agent(lambda config: None)
+    low = dict(demo_input, request=dict(demo_input['request'], urgency='low'),
+               customer_context=dict(demo_input['customer_context'], subscription_tier='basic', contract_details={}))
+
+    results = list(agent.run_batch([low, demo_input, low], workers=1))
+
+    assert len(results) == 3
+    report = agent.get_schedule_stats()
+    assert report['policy'] == 'edf'
+    assert report['tickets'] == 3
+    assert report['lanes']['critical']['tickets'] == 1
+    assert report['lanes']['bulk']['tickets'] == 2
@@ -0,0 +1,53 @@
+"""Tracer lanes: one per concurrently traced thread or task, reused once it finishes."""
+
+import asyncio
+import gc
+import threading
+
+from core.tracing import Tracer
+
+
+def test_finished_tasks_give_their_lanes_back():
+    tracer = Tracer(enabled=True)
+
+    async def traced(number):
+        with tracer.span("workflow", "workflow", number=number):
+            await asyncio.sleep(0)
+
+    async def burst():
+        await asyncio.gather(*(traced(number) for number in range(200)))
+
+    for _ in range(5):
+        asyncio.run(burst())
+
+    task_lanes = {span['lane'] for span in tracer.spans()}
+    assert len(task_lanes) == 200
+    assert len(tracer.to_chrome_trace()['traceEvents']) == 200 + 5 * 200
+    assert not tracer._task_lanes
+
+
+def test_exited_threads_give_their_lanes_back():
+    tracer = Tracer(enabled=True)
+
+    def traced():
+        with tracer.span("workflow", "workflow"):
+            pass
+
+    for _ in range(20):
+        thread = threading.Thread(target=traced)
+        thread.start()
+        thread.join()
+        gc.collect()
+
+    assert {span['lane'] for span in tracer.spans()} == {1}
+
+
+def test_nested_spans_record_their_parent():
+    tracer = Tracer(enabled=True)
+    with tracer.span("workflow", "workflow") as workflow:
+        with tracer.span("intake", "stage"):
+            pass
+
+    stage, outer = tracer.spans()
+    assert stage['args']['parent_id'] == workflow.span_id
+    assert 'parent_id' not in outer['args']